@@ -0,0 +1,102 @@
+import os
+import time
+import pickle
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Documents kept per collection, and how long one may be served before it is re-read
+DOCUMENT_CACHE_SIZE = int(os.getenv("DOCUMENT_CACHE_SIZE", "5000"))
+DOCUMENT_CACHE_TTL = float(os.getenv("DOCUMENT_CACHE_TTL", "300"))
+
+_MISSING = object()
+
+class TTLCache:
+    """LRU cache whose entries also expire ttl seconds after they were stored."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.entries.get(key, _MISSING)
+        if entry is _MISSING or entry[0] < time.monotonic():
+            if entry is not _MISSING:
+                del self.entries[key]
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+class DocumentCache:
+    """
+    Process-wide read-through cache of job and candidate documents, keyed by
+    document ID and projection. Entries are dropped on local writes (see storage)
+    and when the change stream reports a write from elsewhere, and expire after
+    DOCUMENT_CACHE_TTL as a safety net. Documents are kept pickled, so every
+    reader gets its own copy and mutating a result cannot leak into other requests.
+    """
+
+    def __init__(self, maxsize: int = DOCUMENT_CACHE_SIZE, ttl: float = DOCUMENT_CACHE_TTL):
+        self.caches: Dict[str, TTLCache] = {
+            'jobs': TTLCache(maxsize, ttl),
+            'candidates': TTLCache(maxsize, ttl),
+        }
+        self.projections: Dict[str, Set[Optional[Tuple]]] = {name: set() for name in self.caches}
+
+    def enabled(self, collection: str) -> bool:
+        return collection in self.caches and self.caches[collection].maxsize > 0
+
+    def get(self, collection: str, document_id: str, projection_key: Optional[Tuple]) -> Any:
+        """A fresh copy of the cached document, or _MISSING if it has to be read."""
+        payload = self.caches[collection].get((document_id, projection_key), _MISSING)
+        return payload if payload is _MISSING else pickle.loads(payload)
+
+    def set(self, collection: str, document_id: str, projection_key: Optional[Tuple], document: Optional[Dict]):
+        self.projections[collection].add(projection_key)
+        self.caches[collection].set((document_id, projection_key), pickle.dumps(document, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def invalidate(self, collection: str, document_id: str):
+        """Drop every cached projection of a document."""
+        if collection not in self.caches:
+            return
+        for projection_key in self.projections[collection]:
+            self.caches[collection].pop((str(document_id), projection_key))
+
+    def clear(self, collection: Optional[str] = None):
+        for name, cache in self.caches.items():
+            if collection is None or name == collection:
+                cache.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {'size': len(cache), 'hits': cache.hits, 'misses': cache.misses}
+            for name, cache in self.caches.items()
+        }
+
+def is_missing(value: Any) -> bool:
+    return value is _MISSING
+
+document_cache = DocumentCache()
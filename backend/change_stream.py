@@ -0,0 +1,123 @@
+import os
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from cache import document_cache
+from database import db
+from reverse_matcher import job_profiles
+from search import facet_cache
+from text_index import candidate_text_index, job_text_index
+from skill_index import document_skill_ids, skill_index
+from storage import get_storage
+from vector_index import candidate_text, candidate_vectors
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before reopening a change stream that failed
+CHANGE_STREAM_RETRY_SECONDS = float(os.getenv("CHANGE_STREAM_RETRY_SECONDS", "5"))
+
+# Server error code for change streams on a standalone (non replica set) server
+CHANGE_STREAM_UNSUPPORTED = 40573
+
+WATCHED_COLLECTIONS = ['jobs', 'candidates']
+
+_watcher: Optional[asyncio.Task] = None
+
+def _touches_extracted_info(change: Dict) -> bool:
+    if change["operationType"] != "update":
+        return True
+    updated = change.get("updateDescription", {})
+    fields = list(updated.get("updatedFields", {})) + list(updated.get("removedFields", []))
+    return any(field.split(".")[0] == "extracted_info" for field in fields)
+
+def apply_change(change: Dict):
+    """
+    Bring this worker's caches and in-memory indexes in line with one change
+    event on the jobs or candidates collection.
+    """
+    collection = change["ns"]["coll"]
+    document_id = str(change["documentKey"]["_id"])
+    document = change.get("fullDocument")
+    deleted = change["operationType"] == "delete" or document is None
+    document_cache.invalidate(collection, document_id)
+
+    # Texts are stored before their document is inserted and never change after
+    text_index = job_text_index if collection == "jobs" else candidate_text_index
+    if deleted:
+        text_index.remove(document_id)
+    elif change["operationType"] == "insert":
+        asyncio.ensure_future(text_index.refresh(document_id))
+
+    if collection == "jobs":
+        if deleted or document.get("status") == "closed":
+            job_profiles.remove(document_id)
+        elif _touches_extracted_info(change) or job_profiles.get(document_id) is None:
+            job_profiles.add(document_id, document)
+        return
+
+    facet_cache.clear()
+    if deleted:
+        skill_index.remove(document_id)
+        candidate_vectors.remove(document_id)
+    elif _touches_extracted_info(change):
+        extracted_info = document.get("extracted_info")
+        skill_index.add(document_id, document_skill_ids(extracted_info))
+        candidate_vectors.add(document_id, candidate_text(extracted_info))
+
+async def watch_changes():
+    """
+    Follow writes to jobs and candidates from every API worker through a MongoDB
+    change stream, resuming after errors. Change streams need a replica set; on a
+    standalone server the caches fall back to TTL expiry.
+    """
+    pipeline = [{"$match": {
+        "ns.coll": {"$in": WATCHED_COLLECTIONS},
+        "operationType": {"$in": ["insert", "update", "replace", "delete"]}
+    }}]
+    resume_token = None
+    while True:
+        try:
+            async with db.watch(pipeline, full_document="updateLookup", resume_after=resume_token) as stream:
+                logger.info("Watching job and candidate changes")
+                async for change in stream:
+                    resume_token = stream.resume_token
+                    try:
+                        apply_change(change)
+                    except Exception as e:
+                        logger.error(f"Error applying change {change.get('_id')}: {str(e)}")
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            if e.code == CHANGE_STREAM_UNSUPPORTED:
+                logger.warning("Change streams need a replica set; document caches will rely on TTL expiry")
+                return
+            logger.error(f"Change stream failed: {str(e)}")
+            # The resume point may have aged out of the oplog; start from now
+            resume_token = None
+        except PyMongoError as e:
+            logger.error(f"Change stream failed: {str(e)}")
+        # Anything missed while reconnecting is re-read on demand
+        document_cache.clear()
+        await asyncio.sleep(CHANGE_STREAM_RETRY_SECONDS)
+
+def start_watching():
+    global _watcher
+    if not get_storage().shared:
+        logger.info("Storage is local to this process, not watching for changes")
+        return
+    if _watcher is None or _watcher.done():
+        _watcher = asyncio.create_task(watch_changes())
+
+async def stop_watching():
+    global _watcher
+    if _watcher is not None:
+        _watcher.cancel()
+        try:
+            await _watcher
+        except asyncio.CancelledError:
+            pass
+        _watcher = None
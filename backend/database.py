@@ -1,11 +1,19 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from bson import ObjectId
+from bson import Binary, ObjectId
 from bson.errors import InvalidId
-from typing import List, Dict, Optional, AsyncGenerator
+from pymongo import ASCENDING, DESCENDING, DeleteMany, IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from datetime import datetime
+from typing import Any, List, Dict, Optional, AsyncGenerator
 import os
+import asyncio
 from dotenv import load_dotenv
 import logging
 import json
+import base64
+import zlib
+
+from skill_taxonomy import UNKNOWN_SKILL_ID_BASE
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -25,36 +33,172 @@ DATABASE_NAME = os.getenv("DATABASE_NAME", "talenthub")
 client = AsyncIOMotorClient(MONGO_URI)
 db = client[DATABASE_NAME]
 
+# Bump whenever INDEX_SPECS changes; recorded in meta once indexes are reconciled
+SCHEMA_VERSION = 8
+
+# Log entries expire this long after their timestamp
+LOG_RETENTION_SECONDS = int(os.getenv("LOG_RETENTION_DAYS", "30")) * 24 * 3600
+
+# Declarative index specs per collection; init_db builds whatever is missing
+INDEX_SPECS = {
+    'jobs': [
+        IndexModel([("file_id", ASCENDING)], name="file_id_1", unique=True, sparse=True),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_-1__id_-1"),
+    ],
+    'candidates': [
+        IndexModel([("file_id", ASCENDING)], name="file_id_1", unique=True, sparse=True),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_-1__id_-1"),
+        # Search filters: equality fields first, then the listing sort (multikey on skill_ids)
+        IndexModel([("extracted_info.skill_ids", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="extracted_info.skill_ids_1_created_at_-1__id_-1"),
+        IndexModel([("status", ASCENDING), ("location_key", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="status_1_location_key_1_created_at_-1__id_-1"),
+        IndexModel([("location_key", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="location_key_1_created_at_-1__id_-1"),
+        IndexModel([("parse_score", ASCENDING)], name="parse_score_1"),
+        IndexModel([("experience_timeline.total_years", ASCENDING)], name="experience_timeline.total_years_1"),
+    ],
+    'matches': [
+        IndexModel([("job_id", ASCENDING)], name="job_id_1"),
+        IndexModel([("candidate_id", ASCENDING)], name="candidate_id_1"),
+        IndexModel([("job_id", ASCENDING), ("candidate_id", ASCENDING), ("scoring_version", ASCENDING)], name="job_id_1_candidate_id_1_scoring_version_1", unique=True),
+        # Ranking reads sort on final_score then _id, so both end in _id
+        IndexModel([("job_id", ASCENDING), ("scoring_version", ASCENDING), ("shortlist", ASCENDING), ("final_score", DESCENDING), ("_id", ASCENDING)], name="job_id_1_scoring_version_1_shortlist_1_final_score_-1__id_1"),
+        IndexModel([("job_id", ASCENDING), ("scoring_version", ASCENDING), ("final_score", DESCENDING), ("_id", ASCENDING)], name="job_id_1_scoring_version_1_final_score_-1__id_1"),
+    ],
+    'reports': [
+        IndexModel([("job_id", ASCENDING)], name="job_id_1"),
+        IndexModel([("created_at", ASCENDING)], name="created_at_1"),
+    ],
+    'logs': [
+        IndexModel([("timestamp", ASCENDING)], name="timestamp_1", expireAfterSeconds=LOG_RETENTION_SECONDS),
+    ],
+    'texts': [
+        IndexModel([("owner", ASCENDING), ("owner_id", ASCENDING)], name="owner_1_owner_id_1"),
+    ],
+}
+
+# Indexes replaced by a renamed spec, dropped when found
+RETIRED_INDEXES = {
+    'matches': ["job_id_1_scoring_version_1_shortlist_1_final_score_-1", "job_id_1_scoring_version_1_final_score_-1"],
+}
+
+# Index options that make an existing index differ from its spec
+INDEX_OPTIONS = ['unique', 'sparse', 'expireAfterSeconds', 'partialFilterExpression']
+
+def _index_matches(existing: Dict, spec: Dict) -> bool:
+    """Whether an existing index (from index_information) has the spec's keys and options."""
+    if [tuple(key) for key in existing['key']] != list(spec['key'].items()):
+        return False
+    return all(existing.get(option) == spec.get(option) for option in INDEX_OPTIONS)
+
+async def reconcile_indexes() -> Dict[str, List[str]]:
+    """
+    Diff the existing indexes against INDEX_SPECS and build only what is missing
+    or changed, and drop RETIRED_INDEXES. Other indexes not in the specs are left alone.
+    Returns the names of the indexes built per collection.
+    """
+    built = {}
+    for name, specs in INDEX_SPECS.items():
+        existing = await db[name].index_information()
+        for model in specs:
+            spec = dict(model.document)
+            current = existing.get(spec['name'])
+            if current is not None and _index_matches(current, spec):
+                continue
+            if current is not None:
+                logger.info(f"Index {name}.{spec['name']} changed, rebuilding")
+                await db[name].drop_index(spec['name'])
+            keys = list(spec.pop('key').items())
+            try:
+                await db[name].create_index(keys, **spec)
+            except DuplicateKeyError:
+                # Upserts racing before the key was unique can have left duplicates behind
+                if name != 'matches':
+                    raise
+                removed = await _dedupe_matches()
+                logger.warning(f"Removed {removed} duplicate matches before building {spec['name']}")
+                await db[name].create_index(keys, **spec)
+            built.setdefault(name, []).append(spec['name'])
+        for retired in RETIRED_INDEXES.get(name, []):
+            if retired in existing:
+                logger.info(f"Dropping retired index {name}.{retired}")
+                await db[name].drop_index(retired)
+        if name in built:
+            logger.info(f"Built indexes on {name}: {built[name]}")
+    return built
+
+async def _dedupe_matches() -> int:
+    """Keep only the most recently updated match per (job_id, candidate_id, scoring_version)."""
+    pipeline = [
+        {"$sort": {"updated_at": -1, "_id": -1}},
+        {"$group": {
+            "_id": {"job_id": "$job_id", "candidate_id": "$candidate_id", "scoring_version": "$scoring_version"},
+            "ids": {"$push": "$_id"},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}}
+    ]
+    operations = [
+        DeleteMany({"_id": {"$in": group["ids"][1:]}})
+        async for group in db.matches.aggregate(pipeline, allowDiskUse=True)
+    ]
+    if not operations:
+        return 0
+    result = await db.matches.bulk_write(operations, ordered=False)
+    return result.deleted_count
+
+# Index reconciliation started by init_db, kept so it is not garbage-collected mid-run
+_reconcile_task: Optional[asyncio.Task] = None
+
+async def _reconcile_schema():
+    try:
+        await reconcile_indexes()
+        await db.meta.update_one(
+            {"_id": "schema"},
+            {"$set": {"version": SCHEMA_VERSION, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+        logger.info(f"Database schema at version {SCHEMA_VERSION}")
+    except Exception as e:
+        logger.error(f"Error reconciling indexes: {str(e)}")
+
 # Initialize database collections and indexes
 async def init_db():
+    global _reconcile_task
     try:
-        collections = ['jobs', 'candidates', 'matches', 'reports', 'logs']
-        for collection in collections:
-            if collection not in await db.list_collection_names():
+        existing = await db.list_collection_names()
+        for collection in INDEX_SPECS:
+            if collection not in existing:
                 await db.create_collection(collection)
                 logger.info(f"Created collection: {collection}")
 
-        # Drop existing indexes except _id
-        for name in ['jobs', 'candidates', 'matches', 'reports', 'logs']:
-            indexes = await db[name].index_information()
-            for index in indexes:
-                if index != "_id_":
-                    await db[name].drop_index(index)
-
-        # Create required indexes
-        await db.jobs.create_index("file_id", unique=True, sparse=True)
-        await db.candidates.create_index("file_id", unique=True, sparse=True)
-        await db.matches.create_index("job_id")
-        await db.matches.create_index("candidate_id")
-        await db.reports.create_index("job_id")
-        await db.reports.create_index("created_at")
-        await db.logs.create_index("timestamp")
+        # Indexes are reconciled in the background on every startup; an index
+        # dropped or changed by hand is rebuilt even if the schema version matches
+        schema = await db.meta.find_one({"_id": "schema"})
+        if schema is not None and schema.get("version") != SCHEMA_VERSION:
+            logger.info(f"Database schema at version {schema.get('version')}, upgrading to {SCHEMA_VERSION}")
+        _reconcile_task = asyncio.create_task(_reconcile_schema())
 
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Error initializing database: {str(e)}")
         raise e
 
+async def close_db():
+    """
+    Stop an index reconciliation still running at shutdown. Builds already sent
+    to the server carry on there, and the next startup reconciles whatever is left.
+    """
+    global _reconcile_task
+    if _reconcile_task is None:
+        return
+    if not _reconcile_task.done():
+        logger.info("Index reconciliation still running at shutdown, cancelling")
+        _reconcile_task.cancel()
+    try:
+        await _reconcile_task
+    except asyncio.CancelledError:
+        pass
+    _reconcile_task = None
+
 async def get_db() -> AsyncGenerator:
     try:
         yield db
@@ -147,9 +291,26 @@ async def clear_database():
         logger.error(f"Error clearing database: {str(e)}")
         return False
 
-async def get_matches(job_id: str) -> List[Dict]:
+# Version of the scoring that produced stored matches; bump when scoring changes
+# so matches from the old scoring are no longer read or updated
+SCORING_VERSION = 1
+
+# Score at or above which a match is shortlisted
+SHORTLIST_THRESHOLD = 70
+
+# Times an upsert that lost a race on the unique match key is retried
+UPSERT_RETRIES = 3
+
+async def get_matches(job_id: str, shortlist: Optional[bool] = None, limit: int = 0, skip: int = 0) -> List[Dict]:
+    """
+    Stored matches of a job, best final score first, optionally only the
+    shortlisted (or not shortlisted) ones, one page of limit at a time.
+    """
     try:
-        cursor = db.matches.find({"job_id": job_id})
+        query = {"job_id": job_id, "scoring_version": SCORING_VERSION}
+        if shortlist is not None:
+            query["shortlist"] = shortlist
+        cursor = db.matches.find(query).sort([("final_score", DESCENDING), ("_id", ASCENDING)]).skip(skip).limit(limit)
         matches = await cursor.to_list(length=None)
         for match in matches:
             match["_id"] = str(match["_id"])
@@ -158,6 +319,327 @@ async def get_matches(job_id: str) -> List[Dict]:
         logger.error(f"Error getting matches: {str(e)}")
         return []
 
+# zlib level for document text blobs
+TEXT_COMPRESSION_LEVEL = 6
+
+async def save_text(text: str, owner: str, owner_id: ObjectId) -> ObjectId:
+    """
+    Store a document's text as a compressed blob in the texts collection.
+    Returns the blob ID, kept on the owning document as text_id.
+    """
+    result = await db.texts.insert_one({
+        "owner": owner,
+        "owner_id": owner_id,
+        "data": Binary(zlib.compress(text.encode("utf-8"), TEXT_COMPRESSION_LEVEL)),
+        "size": len(text),
+        "created_at": datetime.utcnow()
+    })
+    return result.inserted_id
+
+def _decompress_text(blob: Dict) -> str:
+    return zlib.decompress(blob["data"]).decode("utf-8")
+
+async def get_text(document: Dict) -> Optional[str]:
+    """Text of a job or candidate document, from its blob or the legacy embedded text field."""
+    if document.get("text_id") is None:
+        return document.get("text")
+    blob = await db.texts.find_one({"_id": document["text_id"]})
+    return _decompress_text(blob) if blob else None
+
+async def attach_texts(documents: List[Dict]):
+    """Load the text of each blob-backed document into its text field, in one query."""
+    text_ids = [document["text_id"] for document in documents if document.get("text_id") is not None]
+    if not text_ids:
+        return
+    blobs = {blob["_id"]: blob async for blob in db.texts.find({"_id": {"$in": text_ids}})}
+    for document in documents:
+        blob = blobs.get(document.get("text_id"))
+        if blob:
+            document["text"] = _decompress_text(blob)
+
+async def get_texts(owner: str, owner_ids: List[str]) -> Dict[str, str]:
+    """Texts of the given documents of an owner collection, by document ID."""
+    object_ids = [ObjectId(owner_id) for owner_id in owner_ids if ObjectId.is_valid(owner_id)]
+    texts = {
+        str(blob["owner_id"]): _decompress_text(blob)
+        async for blob in db.texts.find({"owner": owner, "owner_id": {"$in": object_ids}})
+    }
+    legacy = [object_id for object_id in object_ids if str(object_id) not in texts]
+    if legacy:
+        async for document in db[owner].find({"_id": {"$in": legacy}, "text": {"$type": "string"}}, {"text": 1}):
+            texts[str(document["_id"])] = document["text"]
+    return texts
+
+async def iter_texts(owner: str) -> AsyncGenerator:
+    """(document ID, text) for every document of an owner collection, blobs first, then legacy embedded texts."""
+    async for blob in db.texts.find({"owner": owner}):
+        yield str(blob["owner_id"]), _decompress_text(blob)
+    async for document in db[owner].find({"text_id": {"$exists": False}, "text": {"$type": "string"}}, {"text": 1}):
+        yield str(document["_id"]), document["text"]
+
+async def delete_texts(owner: str, owner_ids: Optional[List[ObjectId]] = None) -> int:
+    """Delete the text blobs of the given documents, or of every document in the owner collection."""
+    query = {"owner": owner}
+    if owner_ids is not None:
+        query["owner_id"] = {"$in": owner_ids}
+    result = await db.texts.delete_many(query)
+    return result.deleted_count
+
+# Fields left out of list responses unless asked for
+LIST_EXCLUDED_FIELDS = ['text']
+
+# Sort keys the list endpoints page on, newest first
+LIST_SORT_FIELDS = ['_id', 'created_at']
+
+def encode_cursor(document: Dict, sort: str) -> str:
+    """
+    Opaque keyset cursor pointing just past the given document. A document
+    without a sort date gets a null value and is keyed on _id alone.
+    """
+    value = document.get(sort)
+    key = {"id": str(document["_id"]), "v": value.isoformat() if isinstance(value, datetime) else None}
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def decode_cursor(cursor: str, sort: str) -> Dict:
+    """Query filter for the documents after a cursor. Raises ValueError on a malformed cursor."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        last_id = ObjectId(key["id"])
+        if sort == "_id":
+            return {"_id": {"$lt": last_id}}
+        value = datetime.fromisoformat(key["v"]) if key["v"] is not None else None
+    except (KeyError, TypeError, ValueError, InvalidId) as e:
+        raise ValueError(f"Invalid cursor: {str(e)}")
+    # Newest first puts documents without the sort field last, ordered by _id
+    if value is None:
+        return {sort: None, "_id": {"$lt": last_id}}
+    return {"$or": [{sort: {"$lt": value}}, {sort: value, "_id": {"$lt": last_id}}, {sort: None}]}
+
+async def list_page(collection: str, limit: int, cursor: Optional[str] = None, sort: str = "_id", include_text: bool = False, query: Optional[Dict] = None) -> tuple:
+    """
+    One page of a collection (optionally filtered by query), newest first, using keyset
+    pagination on sort (with _id as tiebreak).
+    Returns the documents and the cursor for the next page (None on the last page).
+    """
+    query = query or {}
+    if cursor:
+        query = {"$and": [query, decode_cursor(cursor, sort)]} if query else decode_cursor(cursor, sort)
+    projection = None if include_text else {field: 0 for field in LIST_EXCLUDED_FIELDS}
+    order = [("_id", DESCENDING)] if sort == "_id" else [(sort, DESCENDING), ("_id", DESCENDING)]
+    documents = await db[collection].find(query, projection).sort(order).limit(limit + 1).to_list(length=None)
+    next_cursor = encode_cursor(documents[limit - 1], sort) if len(documents) > limit else None
+    documents = documents[:limit]
+    if include_text:
+        await attach_texts(documents)
+    return documents, next_cursor
+
+async def upsert_matches(matches: List[Dict], unset: Optional[List[str]] = None) -> int:
+    """
+    Bulk upsert match results, keyed on (job_id, candidate_id, scoring_version).
+    Fields listed in unset are removed from the stored matches. final_score
+    (the Claude score when there is one, else the Python score) and shortlist
+    are derived from the stored document, so partial updates keep them consistent.
+    Returns the number of matches written; write errors are logged and raised.
+    """
+    try:
+        if not matches:
+            return 0
+        now = datetime.utcnow()
+        operations = []
+        for match in matches:
+            fields = {field: {"$literal": value} for field, value in match.items()}
+            pipeline = [{"$set": {**fields, "scoring_version": SCORING_VERSION, "updated_at": now}}]
+            if unset:
+                pipeline.append({"$unset": unset})
+            pipeline.append({"$set": {"final_score": {"$ifNull": ["$claude_score", "$python_score"]}}})
+            pipeline.append({"$set": {"shortlist": {"$gte": ["$final_score", SHORTLIST_THRESHOLD]}}})
+            operations.append(UpdateOne(
+                {"job_id": match["job_id"], "candidate_id": match["candidate_id"], "scoring_version": SCORING_VERSION},
+                pipeline,
+                upsert=True
+            ))
+        saved = 0
+        for attempt in range(UPSERT_RETRIES + 1):
+            try:
+                result = await db.matches.bulk_write(operations, ordered=False)
+                return saved + result.upserted_count + result.modified_count
+            except BulkWriteError as e:
+                details = e.details
+                saved += details.get("nUpserted", 0) + details.get("nModified", 0)
+                # Two concurrent upserts of a new key: the loser hits the unique
+                # index and succeeds as an update when retried
+                duplicates = [error["index"] for error in details.get("writeErrors", []) if error.get("code") == 11000]
+                if attempt == UPSERT_RETRIES or len(duplicates) != len(details.get("writeErrors", [])):
+                    raise
+                operations = [operations[index] for index in duplicates]
+    except Exception as e:
+        logger.error(f"Error saving matches: {str(e)}")
+        raise
+
+async def save_matches(job_id: str, matches: List[Dict], unset: Optional[List[str]] = None) -> int:
+    """Upsert match results for a job, keyed on (job_id, candidate_id, scoring_version)."""
+    return await upsert_matches([{**match, "job_id": job_id} for match in matches], unset)
+
+async def get_stored_matches(job_id: str, candidate_ids: List[str]) -> Dict[str, Dict]:
+    """Stored matches of a job for the given candidates, keyed by candidate_id."""
+    try:
+        cursor = db.matches.find({"job_id": job_id, "candidate_id": {"$in": candidate_ids}, "scoring_version": SCORING_VERSION})
+        return {match["candidate_id"]: match async for match in cursor}
+    except Exception as e:
+        logger.error(f"Error getting stored matches: {str(e)}")
+        return {}
+
+# Values returned per skill and location facet
+FACET_LIMIT = 20
+
+# Bucket boundaries for the parse score and experience facets
+PARSE_SCORE_BUCKETS = [0, 25, 50, 75, 90, 101]
+EXPERIENCE_BUCKETS = [0, 2, 5, 10, 20, 100]
+
+def facet_pipeline(query: Dict[str, Any]) -> List[Dict]:
+    """Aggregation computing the search facet counts of the candidates matching query in one pass."""
+    return [
+        {"$match": query},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "status": [
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}}
+            ],
+            "skills": [
+                {"$unwind": "$extracted_info.skill_ids"},
+                {"$match": {"extracted_info.skill_ids": {"$lt": UNKNOWN_SKILL_ID_BASE}}},
+                {"$group": {"_id": "$extracted_info.skill_ids", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": FACET_LIMIT}
+            ],
+            "locations": [
+                {"$match": {"location_key": {"$ne": None}}},
+                {"$group": {"_id": "$location_key", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": FACET_LIMIT}
+            ],
+            "parse_score": [
+                {"$bucket": {"groupBy": "$parse_score", "boundaries": PARSE_SCORE_BUCKETS, "default": "unknown"}}
+            ],
+            "experience_years": [
+                {"$bucket": {"groupBy": "$experience_timeline.total_years", "boundaries": EXPERIENCE_BUCKETS, "default": "unknown"}}
+            ],
+        }}
+    ]
+
+# Shortlist exports only include matches with a complete Claude assessment
+COMPLETE_ANALYSIS = {
+    "claude_score": {"$type": "number"},
+    "claude_analysis.strengths.0": {"$exists": True},
+    "claude_analysis.gaps.0": {"$exists": True}
+}
+
+def report_pipeline(job_id: str, candidate_ids: Optional[List[str]] = None, shortlist_only: bool = False) -> List[Dict]:
+    """
+    Aggregation over a job's stored matches that joins each match to its
+    candidate and projects one report row, best final score first.
+    """
+    match = {"job_id": job_id, "scoring_version": SCORING_VERSION}
+    if candidate_ids is not None:
+        match["candidate_id"] = {"$in": candidate_ids}
+    if shortlist_only:
+        match["shortlist"] = True
+        match.update(COMPLETE_ANALYSIS)
+
+    return [
+        {"$match": match},
+        {"$sort": {"final_score": -1, "_id": 1}},
+        {"$lookup": {
+            "from": "candidates",
+            "let": {"candidate_id": {"$toObjectId": "$candidate_id"}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$candidate_id"]}}},
+                {"$project": {
+                    "_id": 0,
+                    "name": "$extracted_info.name",
+                    "email": "$extracted_info.email",
+                    "phone": "$extracted_info.phone",
+                    "current_role": {"$arrayElemAt": ["$extracted_info.experience.job_title", 0]},
+                    "current_company": {"$arrayElemAt": ["$extracted_info.experience.company", 0]}
+                }}
+            ],
+            "as": "candidate"
+        }},
+        {"$unwind": "$candidate"},
+        {"$project": {
+            "_id": 0,
+            "candidate_id": 1,
+            "name": {"$ifNull": ["$candidate.name", "Unknown"]},
+            "email": {"$ifNull": ["$candidate.email", ""]},
+            "phone": {"$ifNull": ["$candidate.phone", ""]},
+            "current_role": {"$ifNull": ["$candidate.current_role", ""]},
+            "current_company": {"$ifNull": ["$candidate.current_company", ""]},
+            "python_score": {"$ifNull": ["$python_score", 0]},
+            "claude_score": {"$ifNull": ["$claude_score", 0]},
+            "shortlisted": {"$ifNull": ["$shortlist", False]},
+            "strengths": {"$ifNull": ["$claude_analysis.strengths", []]},
+            "gaps": {"$ifNull": ["$claude_analysis.gaps", []]}
+        }}
+    ]
+
+async def count_matches(job_id: str, shortlist: Optional[bool] = None) -> int:
+    """Number of stored matches of a job, optionally only the shortlisted (or not shortlisted) ones."""
+    try:
+        query = {"job_id": job_id, "scoring_version": SCORING_VERSION}
+        if shortlist is not None:
+            query["shortlist"] = shortlist
+        return await db.matches.count_documents(query)
+    except Exception as e:
+        logger.error(f"Error counting matches: {str(e)}")
+        return 0
+
+async def delete_matches(job_id: Optional[str] = None, candidate_id: Optional[str] = None) -> int:
+    """Delete the stored matches of a job or of a candidate."""
+    try:
+        query = {"job_id": job_id} if job_id else {"candidate_id": candidate_id}
+        result = await db.matches.delete_many(query)
+        return result.deleted_count
+    except Exception as e:
+        logger.error(f"Error deleting matches: {str(e)}")
+        return 0
+
+# Field that ties matches to the documents of each collection
+MATCH_OWNER_FIELDS = {'jobs': 'job_id', 'candidates': 'candidate_id'}
+
+async def delete_documents(collection: str, query: Dict) -> Dict[str, Any]:
+    """
+    Delete the jobs or candidates matching query, cascading to their matches,
+    text blobs and (for jobs) reports with one delete_many per collection.
+    Returns the deleted counts and the deleted IDs (None when the whole collection was cleared).
+    """
+    owner_field = MATCH_OWNER_FIELDS[collection]
+    if not query:
+        deleted = await db[collection].delete_many({})
+        counts = {
+            "deleted": deleted.deleted_count,
+            "matches": (await db.matches.delete_many({})).deleted_count,
+            "reports": (await db.reports.delete_many({})).deleted_count if collection == "jobs" else 0,
+            "texts": await delete_texts(collection),
+            "ids": None
+        }
+        logger.info(f"Cleared {collection}: {counts}")
+        return counts
+
+    object_ids = [document["_id"] async for document in db[collection].find(query, {"_id": 1})]
+    ids = [str(object_id) for object_id in object_ids]
+    counts = {"deleted": 0, "matches": 0, "reports": 0, "texts": 0, "ids": ids}
+    if not object_ids:
+        return counts
+    counts["deleted"] = (await db[collection].delete_many({"_id": {"$in": object_ids}})).deleted_count
+    counts["matches"] = (await db.matches.delete_many({owner_field: {"$in": ids}})).deleted_count
+    if collection == "jobs":
+        # Reports have stored job_id both as an ObjectId and as a string
+        counts["reports"] = (await db.reports.delete_many({"job_id": {"$in": object_ids + ids}})).deleted_count
+    counts["texts"] = await delete_texts(collection, object_ids)
+    logger.info(f"Deleted {counts['deleted']} {collection} with {counts['matches']} matches, {counts['reports']} reports and {counts['texts']} texts")
+    return counts
+
 async def save_report(report: Dict) -> Optional[str]:
     try:
         required_fields = ['job_id', 'filename', 'created_at', 'content', 'status']
@@ -173,6 +655,11 @@ async def save_report(report: Dict) -> Optional[str]:
                 logger.error("Invalid job_id format in report")
                 return None
 
+        if '_id' in report:
+            # A report reserved ahead of time is filled in under its existing ID
+            await db.reports.replace_one({"_id": report['_id']}, report, upsert=True)
+            return str(report['_id'])
+
         result = await db.reports.insert_one(report)
         return str(result.inserted_id)
     except Exception as e:
@@ -185,6 +672,7 @@ async def get_reports(job_id: str) -> List[Dict]:
         reports = await cursor.to_list(length=None)
         for report in reports:
             report["id"] = str(report["_id"])
+            report["job_id"] = str(report["job_id"])
             del report["_id"]
         return reports
     except Exception as e:
@@ -196,6 +684,7 @@ async def get_report(report_id: str) -> Optional[Dict]:
         report = await db.reports.find_one({"_id": ObjectId(report_id)})
         if report:
             report["id"] = str(report["_id"])
+            report["job_id"] = str(report["job_id"])
             del report["_id"]
         return report
     except Exception as e:
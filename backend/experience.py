@@ -0,0 +1,196 @@
+import re
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bump when the timeline layout or parsing rules change so cached copies get rebuilt
+TIMELINE_VERSION = 1
+
+# Cached timelines resolve "Present" against the date they were built on
+TIMELINE_MAX_AGE_DAYS = 30
+
+# Indicators used to decide whether a role counts towards a job's domain
+ROLE_INDICATORS = {
+    'technical': ['engineer', 'developer', 'programmer', 'data', 'cloud', 'azure', 'aws', 'python', 'java', 'sql', 'devops'],
+    'hr': ['hr', 'human resources', 'recruitment', 'talent', 'people', 'employee'],
+    'finance': ['finance', 'accounting', 'financial', 'audit', 'tax'],
+}
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+# Precompiled patterns, shared by every call
+RANGE_SPLIT_RE = re.compile(r'\s*(?:–|—|-|\bto\b|\buntil\b)\s*', re.IGNORECASE)
+YEAR_RE = re.compile(r'\b((?:19|20)\d{2})\b')
+MONTH_NAME_RE = re.compile(r'\b(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?', re.IGNORECASE)
+NUMERIC_MONTH_RE = re.compile(r'\b(\d{1,2})\s*[/.]\s*((?:19|20)\d{2})\b')
+ONGOING_RE = re.compile(r'\b(present|current|currently|now|today|date|ongoing)\b', re.IGNORECASE)
+YEARS_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(?:years?|yrs?|y)\b', re.IGNORECASE)
+MONTHS_RE = re.compile(r'(\d+)\s*(?:months?|mos?|m)\b', re.IGNORECASE)
+
+def _parse_point(text: str) -> Optional[Tuple[int, bool]]:
+    """
+    Parse one side of a date range into an absolute month index (year * 12 + month - 1).
+    Returns the index and whether an explicit month was given, or None if no year is found.
+    """
+    numeric = NUMERIC_MONTH_RE.search(text)
+    if numeric and 1 <= int(numeric.group(1)) <= 12:
+        return int(numeric.group(2)) * 12 + int(numeric.group(1)) - 1, True
+
+    year_match = YEAR_RE.search(text)
+    if not year_match:
+        return None
+
+    month_match = MONTH_NAME_RE.search(text)
+    if month_match:
+        return int(year_match.group(1)) * 12 + MONTHS[month_match.group(1).lower()] - 1, True
+    return int(year_match.group(1)) * 12, False
+
+def _month_index(date: datetime) -> int:
+    return date.year * 12 + date.month - 1
+
+def parse_interval(duration: str, reference_date: Optional[datetime] = None) -> Optional[Tuple[int, int, bool]]:
+    """
+    Parse a duration string into a (start_month, end_month, ongoing) interval.
+    Handles formats like:
+    - "March 2003 – January 2005"
+    - "2015-2020"
+    - "03/2019 - 05/2021"
+    - "2019 – Present"
+    Returns None if the string does not describe a date range.
+    """
+    if not duration or not isinstance(duration, str):
+        return None
+
+    reference_date = reference_date or datetime.utcnow()
+    parts = RANGE_SPLIT_RE.split(duration.strip(), maxsplit=1)
+    if len(parts) != 2:
+        return None
+
+    start = _parse_point(parts[0])
+    if start is None:
+        return None
+    start_month, _ = start
+
+    ongoing = bool(ONGOING_RE.search(parts[1]))
+    if ongoing:
+        end_month = _month_index(reference_date) + 1
+    else:
+        end = _parse_point(parts[1])
+        if end is None:
+            return None
+        end_month, has_month = end
+        # Month-precise ranges are inclusive of the final month
+        if has_month:
+            end_month += 1
+
+    if end_month <= start_month:
+        return None
+    return start_month, end_month, ongoing
+
+def duration_years(duration: str, reference_date: Optional[datetime] = None) -> float:
+    """
+    Parse a duration string into years.
+    Handles date ranges as well as "2 years", "6 months" and "1 year 6 months".
+    """
+    try:
+        interval = parse_interval(duration, reference_date)
+        if interval:
+            return (interval[1] - interval[0]) / 12
+
+        years = YEARS_RE.search(duration)
+        months = MONTHS_RE.search(duration)
+        if years or months:
+            return (float(years.group(1)) if years else 0.0) + (int(months.group(1)) / 12 if months else 0.0)
+    except Exception as e:
+        logger.warning(f"Failed to parse duration '{duration}': {str(e)}")
+    return 0.0
+
+def merge_intervals(intervals: List[Tuple[int, int]]) -> List[List[int]]:
+    """Merge overlapping or touching [start, end) month intervals."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def _span_years(intervals: List[List[int]]) -> float:
+    return sum(end - start for start, end in intervals) / 12
+
+def _role_text(exp: Dict[str, Any]) -> str:
+    responsibilities = exp.get('responsibilities') or []
+    if isinstance(responsibilities, str):
+        responsibilities = [responsibilities]
+    return f"{exp.get('job_title') or ''} {exp.get('company') or ''} {' '.join(str(r) for r in responsibilities)}".lower()
+
+def normalize_timeline(experience: Optional[List[Dict[str, Any]]], reference_date: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Build the normalized experience timeline for a candidate.
+
+    Every role is parsed into a month interval once, overlapping roles are merged so
+    concurrent jobs are not double counted, and the per-domain totals used by scoring
+    are precomputed. The result is stored on the candidate document.
+    """
+    reference_date = reference_date or datetime.utcnow()
+    dated = []
+    undated_years = 0.0
+    relevant_dated = {role_type: [] for role_type in ROLE_INDICATORS}
+    relevant_undated = {role_type: 0.0 for role_type in ROLE_INDICATORS}
+    current_role = {role_type: False for role_type in ROLE_INDICATORS}
+
+    for exp in experience or []:
+        if not isinstance(exp, dict):
+            continue
+        duration = exp.get('duration')
+        if not isinstance(duration, str):
+            continue
+
+        interval = parse_interval(duration, reference_date)
+        years = 0.0
+        if interval:
+            dated.append(interval[:2])
+        else:
+            years = duration_years(duration, reference_date)
+            if years <= 0:
+                continue
+            undated_years += years
+
+        ongoing = bool(interval[2]) if interval else bool(ONGOING_RE.search(duration))
+        exp_text = _role_text(exp)
+        for role_type, indicators in ROLE_INDICATORS.items():
+            if any(indicator in exp_text for indicator in indicators):
+                if interval:
+                    relevant_dated[role_type].append(interval[:2])
+                else:
+                    relevant_undated[role_type] += years
+                if ongoing:
+                    current_role[role_type] = True
+
+    intervals = merge_intervals(dated)
+    return {
+        'version': TIMELINE_VERSION,
+        'reference_date': reference_date,
+        'intervals': intervals,
+        'total_years': round(_span_years(intervals) + undated_years, 2),
+        'relevant_years': {
+            role_type: round(_span_years(merge_intervals(relevant_dated[role_type])) + relevant_undated[role_type], 2)
+            for role_type in ROLE_INDICATORS
+        },
+        'current_role': current_role,
+    }
+
+def is_timeline_stale(timeline: Optional[Dict[str, Any]], now: Optional[datetime] = None) -> bool:
+    """Check whether a cached timeline needs rebuilding."""
+    if not timeline or timeline.get('version') != TIMELINE_VERSION:
+        return True
+    reference_date = timeline.get('reference_date')
+    if not isinstance(reference_date, datetime):
+        return True
+    return ((now or datetime.utcnow()) - reference_date).days > TIMELINE_MAX_AGE_DAYS
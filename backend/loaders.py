@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from cache import document_cache, is_missing
+from storage import get_storage
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class DocumentLoader:
+    """
+    DataLoader-style reader for one collection and projection.
+    Lookups made in the same event loop tick are coalesced into one $in query,
+    and every document is read at most once per loader. Documents are served
+    from the process-wide document cache when it has them.
+    """
+
+    def __init__(self, collection: str, projection: Optional[Dict[str, Any]] = None):
+        self.collection = collection
+        self.projection = projection
+        self.projection_key = projection_key(projection)
+        self.shared = document_cache.enabled(collection)
+        self.cache: Dict[str, asyncio.Future] = {}
+        self.pending: Dict[str, asyncio.Future] = {}
+
+    def load(self, document_id: str) -> asyncio.Future:
+        """Future resolving to the document with this ID, or None if there is none."""
+        document_id = str(document_id)
+        future = self.cache.get(document_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self.cache[document_id] = future
+            if self.shared:
+                document = document_cache.get(self.collection, document_id, self.projection_key)
+                if not is_missing(document):
+                    future.set_result(document)
+                    return future
+            if not self.pending:
+                asyncio.ensure_future(self._dispatch())
+            self.pending[document_id] = future
+        return future
+
+    async def load_many(self, document_ids: List[str]) -> List[Optional[Dict]]:
+        """Documents for the given IDs, in order (None where missing)."""
+        return list(await asyncio.gather(*[self.load(document_id) for document_id in document_ids]))
+
+    def prime(self, document_id: str, document: Dict):
+        """Seed the cache with a document the caller already has."""
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(document)
+        self.cache[str(document_id)] = future
+
+    def clear(self, document_id: str):
+        """Forget a cached document, e.g. after writing to it."""
+        self.cache.pop(str(document_id), None)
+
+    async def _dispatch(self):
+        # Let the tasks scheduled in this tick queue their lookups before the batch is taken
+        await asyncio.sleep(0)
+        batch, self.pending = self.pending, {}
+        try:
+            found = await get_storage().find_documents(self.collection, list(batch), self.projection)
+            documents = {str(document["_id"]): document for document in found}
+            if self.shared:
+                for document_id, document in documents.items():
+                    document_cache.set(self.collection, document_id, self.projection_key, document)
+            for document_id, future in batch.items():
+                if not future.done():
+                    future.set_result(documents.get(document_id))
+        except Exception as e:
+            logger.error(f"Error loading {self.collection}: {str(e)}")
+            for document_id, future in batch.items():
+                self.cache.pop(document_id, None)
+                if not future.done():
+                    future.set_exception(e)
+
+def projection_key(projection: Optional[Dict[str, Any]]) -> Optional[Tuple]:
+    """Hashable form of a projection."""
+    return tuple(sorted(projection.items())) if projection else None
+
+class RequestLoaders:
+    """The document loaders of one request, one per collection and projection."""
+
+    def __init__(self):
+        self.loaders: Dict[Tuple[str, Optional[Tuple]], DocumentLoader] = {}
+
+    def loader(self, collection: str, projection: Optional[Dict[str, Any]] = None) -> DocumentLoader:
+        key = (collection, projection_key(projection))
+        loader = self.loaders.get(key)
+        if loader is None:
+            loader = self.loaders[key] = DocumentLoader(collection, projection)
+        return loader
+
+    @property
+    def jobs(self) -> DocumentLoader:
+        return self.loader("jobs")
+
+    @property
+    def candidates(self) -> DocumentLoader:
+        return self.loader("candidates")
+
+_request_loaders: ContextVar[Optional[RequestLoaders]] = ContextVar("request_loaders", default=None)
+
+def begin_request():
+    """Give the current request its own loaders. Returns the token for end_request."""
+    return _request_loaders.set(RequestLoaders())
+
+def end_request(token):
+    _request_loaders.reset(token)
+
+def get_loaders() -> RequestLoaders:
+    """Loaders of the current request; code running outside a request gets fresh ones."""
+    loaders = _request_loaders.get()
+    return loaders if loaders is not None else RequestLoaders()
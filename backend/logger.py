@@ -1,8 +1,11 @@
+import os
+import asyncio
 import logging
+from collections import Counter, deque
 from datetime import datetime
-from typing import Optional, Dict
-from models import LogEntry
-from database import db
+from typing import Dict, List, Optional
+
+from storage import get_storage
 
 # Configure logging
 logging.basicConfig(
@@ -12,8 +15,113 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Entries buffered before the sink starts shedding load
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Entries per insert_many, and the longest an entry waits to be written
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "500"))
+LOG_FLUSH_SECONDS = float(os.getenv("LOG_FLUSH_SECONDS", "2"))
+
+# Past this share of the queue, only 1 in LOG_SAMPLE_RATE DEBUG/INFO entries is kept
+LOG_HIGH_WATER = 0.75
+LOG_SAMPLE_RATE = int(os.getenv("LOG_SAMPLE_RATE", "10"))
+
+# Levels shed first under overload
+LOW_PRIORITY_LEVELS = {'DEBUG', 'INFO'}
+
+class LogSink:
+    """
+    Bounded in-memory buffer of log entries, written to the logs collection in
+    batches by a background task, so logging never waits on the database.
+    Under overload DEBUG/INFO entries are sampled, then dropped; once the queue
+    is full a WARNING/ERROR entry displaces the oldest entry. Drop counts are
+    written with the next batch.
+    """
+
+    def __init__(self, maxsize: int = LOG_QUEUE_SIZE, batch_size: int = LOG_BATCH_SIZE, flush_seconds: float = LOG_FLUSH_SECONDS):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.queue: deque = deque()
+        self.dropped: Counter = Counter()
+        self.sampled = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def enqueue(self, entry: Dict):
+        """Buffer one entry, applying the overload policy. Never blocks."""
+        level = entry['level']
+        size = len(self.queue)
+        if level in LOW_PRIORITY_LEVELS:
+            if size >= self.maxsize:
+                self.dropped[level] += 1
+                return
+            if size >= LOG_HIGH_WATER * self.maxsize:
+                self.sampled += 1
+                if self.sampled % LOG_SAMPLE_RATE:
+                    self.dropped[level] += 1
+                    return
+        elif size >= self.maxsize:
+            self.dropped[self.queue.popleft()['level']] += 1
+        self.queue.append(entry)
+        if len(self.queue) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _take_batch(self) -> List[Dict]:
+        batch = [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+        if self.dropped:
+            batch.append({
+                'level': 'WARNING',
+                'message': f"Dropped {sum(self.dropped.values())} log entries under load",
+                'timestamp': datetime.utcnow(),
+                'metadata': {'dropped': dict(self.dropped)}
+            })
+            logger.warning(f"Log sink dropped entries under load: {dict(self.dropped)}")
+            self.dropped.clear()
+        return batch
+
+    async def flush(self):
+        """Write everything buffered so far."""
+        while self.queue or self.dropped:
+            batch = self._take_batch()
+            try:
+                await get_storage().insert_logs(batch)
+            except Exception as e:
+                logger.error(f"Error writing {len(batch)} log entries to database: {str(e)}")
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background writer after it has flushed what is left."""
+        if self._task is not None:
+            # Woken rather than cancelled, so a batch being written is not lost
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {'queued': len(self.queue), 'dropped': sum(self.dropped.values())}
+
+log_sink = LogSink()
+
 async def log_to_db(level: str, message: str, metadata: Optional[Dict] = None):
-    """Log message to both console and database."""
+    """Log message to the console, and queue it for the database."""
     try:
         # Log to console
         if level == 'INFO':
@@ -24,16 +132,14 @@ async def log_to_db(level: str, message: str, metadata: Optional[Dict] = None):
             logger.error(message)
         elif level == 'DEBUG':
             logger.debug(message)
-        
-        # Create log entry
-        log_entry = LogEntry(
-            level=level,
-            message=message,
-            metadata=metadata
-        )
-        
-        # Save to database
-        await db.logs.insert_one(log_entry.dict(by_alias=True))
-        
+
+        # Written in the background by the log sink
+        log_sink.enqueue({
+            'level': level,
+            'message': message,
+            'timestamp': datetime.utcnow(),
+            'metadata': metadata
+        })
+
     except Exception as e:
         logger.error(f"Error logging to database: {str(e)}")
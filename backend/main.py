@@ -20,24 +20,39 @@ logger.addHandler(handler)
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '.env'))
 
 import mimetypes
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form, BackgroundTasks
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, BackgroundTasks, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse
 from bson.objectid import ObjectId
 from pymongo import MongoClient
 from datetime import datetime
 import json
-from typing import Union, List, Optional
+from typing import Any, Dict, Union, List, Optional
 from motor.motor_asyncio import AsyncIOMotorClient
 import asyncio
 import pandas as pd
 from io import BytesIO
 
 # Import local modules
-from models import ErrorCode, ErrorResponse, JobResponse, CandidateResponse, MatchRequest, MatchResponse, MatchRecord, JobInfo, CandidateInfo
-from matcher import process_matches, get_job, get_candidates
-from database import db, init_db, get_job, get_matches, get_reports, get_report
+from models import MAX_TOP_CANDIDATES, MAX_TOP_K, ErrorCode, ErrorResponse, JobResponse, CandidateResponse, MatchRequest, MatrixMatchRequest, BulkDeleteRequest, CandidateSearchResponse, TextSearchHit, TextSearchResponse, JobUpdateRequest, MatchResponse, MatchRecord, JobInfo, CandidateInfo
+from matcher import process_matches
+from database import LIST_SORT_FIELDS
 from doc_parser import parse_document
+from experience import normalize_timeline
+from skill_index import skill_index, document_skill_ids
+from skill_taxonomy import skill_ids
+from vector_index import candidate_vectors, candidate_text
+from reverse_matcher import MAX_REVERSE_CLAUDE_TOP, MAX_REVERSE_LIMIT, job_profiles, process_reverse_matches
+from matrix_matcher import process_matrix_matches
+from sharded_matcher import shutdown_executor
+from ranking import prescore_job, rank_candidate
+from reports import generate_report, reserve_report
+from loaders import begin_request, end_request, get_loaders
+from change_stream import start_watching, stop_watching
+from storage import get_storage
+from logger import log_sink
+from search import candidate_facets, normalize_location, search_candidates, search_query
+from text_index import TextIndex, candidate_text_index, job_text_index, snippets
 
 # Constants
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
@@ -88,21 +103,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Add startup and shutdown events
+@app.middleware("http")
+async def request_scoped_loaders(request: Request, call_next):
+    """Give each request its own batching document loaders."""
+    token = begin_request()
+    try:
+        return await call_next(request)
+    finally:
+        end_request(token)
+
 @app.on_event("startup")
 async def startup_db_client():
     try:
-        # Initialize database
-        await init_db()
-        logger.info("Successfully connected to MongoDB")
+        # Initialize the storage engine
+        await get_storage().init()
+        logger.info(f"Storage initialized: {type(get_storage()).__name__}")
+        
+        # Build in-memory search structures
+        await skill_index.build()
+        await job_profiles.build()
+        await candidate_vectors.build()
+        asyncio.create_task(candidate_text_index.build())
+        asyncio.create_task(job_text_index.build())
+        
+        # Keep caches and in-memory structures in line with writes from every worker
+        start_watching()
+        log_sink.start()
     except Exception as e:
         logger.error(f"Failed to connect to MongoDB: {str(e)}")
         raise
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await stop_watching()
+    await log_sink.stop()
+    shutdown_executor()
+    await get_storage().close()
     logger.info("Closed MongoDB connection")
 
 @app.post("/upload", response_model=Union[JobResponse, CandidateResponse])
@@ -154,6 +194,10 @@ async def upload_and_parse(
         # Parse the document
         try:
             cleaned_text, metadata = parse_document(bytes(file_bytes), content_type, "job" if is_job else "candidate")
+            
+            # Canonicalize skills against the taxonomy
+            metadata["extracted_info"] = metadata["extracted_info"] or {}
+            metadata["extracted_info"]["skill_ids"] = skill_ids(metadata["extracted_info"].get("skills"))
         except Exception as e:
             logger.error(f"Error parsing document: {str(e)}")
             raise HTTPException(
@@ -167,11 +211,12 @@ async def upload_and_parse(
             )
         
         if is_job:
-            # Create job document
+            # Create job document, with its text in a compressed blob
+            document_id = ObjectId()
             job_doc = {
+                "_id": document_id,
                 "filename": file.filename,
                 "content_type": content_type,
-                "text": cleaned_text,
                 "word_count": metadata["word_count"],
                 "parse_score": metadata["parse_score"],
                 "preview": metadata["preview"],
@@ -182,11 +227,15 @@ async def upload_and_parse(
             
             # Insert into MongoDB
             try:
-                result = await db.jobs.insert_one(job_doc)
-                job_id = str(result.inserted_id)
+                storage = get_storage()
+                job_doc["text_id"] = await storage.save_text(cleaned_text, "jobs", document_id)
+                job_id = await storage.insert_document("jobs", job_doc)
+                job_profiles.add(job_id, job_doc)
+                job_text_index.add(job_id, cleaned_text)
                 
                 # Start async processing
                 asyncio.create_task(process_job_with_claude(job_id, job_doc))
+                asyncio.create_task(prescore_job(job_id))
                 
                 return JobResponse(
                     job_id=job_id,
@@ -212,26 +261,34 @@ async def upload_and_parse(
                     ).dict()
                 )
         else:
-            # Create candidate document
+            # Create candidate document, with its text in a compressed blob
+            document_id = ObjectId()
             candidate_doc = {
+                "_id": document_id,
                 "filename": file.filename,
                 "content_type": content_type,
-                "text": cleaned_text,
                 "word_count": metadata["word_count"],
                 "parse_score": metadata["parse_score"],
                 "preview": metadata["preview"],
                 "extracted_info": metadata["extracted_info"],
+                "experience_timeline": normalize_timeline(metadata["extracted_info"].get("experience")),
+                "location_key": normalize_location(metadata["extracted_info"].get("location")),
                 "created_at": datetime.utcnow(),
                 "status": "processing"  # Initial status
             }
             
             # Insert into MongoDB
             try:
-                result = await db.candidates.insert_one(candidate_doc)
-                candidate_id = str(result.inserted_id)
+                storage = get_storage()
+                candidate_doc["text_id"] = await storage.save_text(cleaned_text, "candidates", document_id)
+                candidate_id = await storage.insert_document("candidates", candidate_doc)
+                skill_index.add(candidate_id, metadata["extracted_info"]["skill_ids"])
+                candidate_vectors.add(candidate_id, candidate_text(metadata["extracted_info"]))
+                candidate_text_index.add(candidate_id, cleaned_text)
                 
                 # Start async processing
                 asyncio.create_task(process_candidate_with_claude(candidate_id, candidate_doc))
+                asyncio.create_task(rank_candidate(candidate_id, candidate_doc))
                 
                 return CandidateResponse(
                     candidate_id=candidate_id,
@@ -279,28 +336,22 @@ async def process_job_with_claude(job_id: str, job_doc: dict):
         claude_result = get_claude_match(job_info, None)  # Pass None for candidate as we're just processing the job
         
         # Update job document with Claude results
-        await db.jobs.update_one(
-            {"_id": ObjectId(job_id)},
-            {
-                "$set": {
-                    "status": "completed",
-                    "claude_analysis": claude_result,
-                    "updated_at": datetime.utcnow()
-                }
+        await get_storage().set_fields("jobs", {
+            job_id: {
+                "status": "completed",
+                "claude_analysis": claude_result,
+                "updated_at": datetime.utcnow()
             }
-        )
+        })
     except Exception as e:
         logger.error(f"Error processing job with Claude: {str(e)}")
-        await db.jobs.update_one(
-            {"_id": ObjectId(job_id)},
-            {
-                "$set": {
-                    "status": "failed",
-                    "error": str(e),
-                    "updated_at": datetime.utcnow()
-                }
+        await get_storage().set_fields("jobs", {
+            job_id: {
+                "status": "failed",
+                "error": str(e),
+                "updated_at": datetime.utcnow()
             }
-        )
+        })
 
 async def process_candidate_with_claude(candidate_id: str, candidate_doc: dict):
     """Process candidate with Claude AI asynchronously"""
@@ -310,39 +361,57 @@ async def process_candidate_with_claude(candidate_id: str, candidate_doc: dict):
         claude_result = get_claude_match(None, candidate_info)  # Pass None for job as we're just processing the candidate
         
         # Update candidate document with Claude results
-        await db.candidates.update_one(
-            {"_id": ObjectId(candidate_id)},
-            {
-                "$set": {
-                    "status": "completed",
-                    "claude_analysis": claude_result,
-                    "updated_at": datetime.utcnow()
-                }
+        await get_storage().set_fields("candidates", {
+            candidate_id: {
+                "status": "completed",
+                "claude_analysis": claude_result,
+                "updated_at": datetime.utcnow()
             }
-        )
+        })
     except Exception as e:
         logger.error(f"Error processing candidate with Claude: {str(e)}")
-        await db.candidates.update_one(
-            {"_id": ObjectId(candidate_id)},
-            {
-                "$set": {
-                    "status": "failed",
-                    "error": str(e),
-                    "updated_at": datetime.utcnow()
-                }
+        await get_storage().set_fields("candidates", {
+            candidate_id: {
+                "status": "failed",
+                "error": str(e),
+                "updated_at": datetime.utcnow()
             }
-        )
+        })
 
 @app.get("/jobs/all", response_model=list[JobResponse])
-async def get_all_jobs():
+async def get_all_jobs(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: str = Query("_id", regex=f"^({'|'.join(LIST_SORT_FIELDS)})$"),
+    include_text: bool = False
+):
+    """
+    One page of jobs, newest first. The cursor for the next page is returned
+    in the X-Next-Cursor header, which is absent on the last page.
+    """
     try:
-        cursor = db.jobs.find()
+        try:
+            page, next_cursor = await get_storage().list_page("jobs", limit, cursor, sort, include_text)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=400,
+                detail=ErrorResponse(
+                    code=ErrorCode.INVALID_CURSOR,
+                    message=str(e),
+                    timestamp=datetime.utcnow().isoformat()
+                ).dict()
+            )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         jobs = []
-        async for job in cursor:
+        for job in page:
             job["job_id"] = str(job["_id"])
             del job["_id"]
             jobs.append(JobResponse(**job))
         return jobs
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting all jobs: {str(e)}")
         raise HTTPException(
@@ -355,6 +424,28 @@ async def get_all_jobs():
             ).dict()
         )
 
+@app.get("/jobs/text-search", response_model=TextSearchResponse)
+async def text_search_jobs(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    skip: int = Query(0, ge=0),
+    match: str = Query("all", regex="^(all|any)$")
+):
+    """Keyword search over job text, e.g. q=pyspark databricks. With match=all every term must appear."""
+    try:
+        return await text_search("jobs", job_text_index, q, limit, skip, match)
+    except Exception as e:
+        logger.error(f"Error searching job text: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=ErrorResponse(
+                code=ErrorCode.UNKNOWN_ERROR,
+                message="Error searching job text",
+                details=str(e),
+                timestamp=datetime.utcnow()
+            ).dict()
+        )
+
 @app.get("/jobs/{file_id}/text")
 async def get_job_text(file_id: str):
     try:
@@ -368,12 +459,7 @@ async def get_job_text(file_id: str):
 
         # Try to find the document by either _id or file_id
         try:
-            job = await db.jobs.find_one({
-                "$or": [
-                    {"_id": ObjectId(file_id)},
-                    {"file_id": file_id}
-                ]
-            })
+            job = await get_storage().find_document("jobs", file_id, {"_id": 1})
         except Exception as e:
             logger.error(f"Database query failed for file_id {file_id}: {str(e)}")
             return JSONResponse(
@@ -390,7 +476,7 @@ async def get_job_text(file_id: str):
             )
 
         # Get text content
-        text = job.get("text", "")
+        text = (await get_storage().get_texts("jobs", [str(job["_id"])])).get(str(job["_id"]))
         if not text:
             logger.warning(f"No text content found for file_id: {file_id}")
             return JSONResponse(
@@ -408,6 +494,150 @@ async def get_job_text(file_id: str):
             content={"error": f"Failed to process request: {str(e)}"}
         )
 
+@app.patch("/jobs/{job_id}")
+async def update_job(job_id: str, request: JobUpdateRequest):
+    """
+    Edit a job's extracted info or status.
+    The job's ranking is re-scored; closing a job removes it from matching.
+    """
+    try:
+        if not ObjectId.is_valid(job_id):
+            return JSONResponse(
+                status_code=400,
+                content={"error": "Invalid job ID format"}
+            )
+        
+        storage = get_storage()
+        job = (await storage.find_documents("jobs", [job_id]) or [None])[0]
+        if not job:
+            return JSONResponse(
+                status_code=404,
+                content={"error": "Job not found"}
+            )
+        
+        update = {"updated_at": datetime.utcnow()}
+        if request.extracted_info is not None:
+            extracted_info = {**(job.get("extracted_info") or {}), **request.extracted_info.dict(exclude_unset=True)}
+            extracted_info["skill_ids"] = skill_ids(extracted_info.get("skills"))
+            update["extracted_info"] = extracted_info
+        if request.status is not None:
+            update["status"] = request.status
+        await storage.set_fields("jobs", {job_id: update})
+        job.update(update)
+        
+        # Re-score only this job's pool
+        if job.get("status") == "closed":
+            job_profiles.remove(job_id)
+        else:
+            job_profiles.add(job_id, job)
+            if request.extracted_info is not None:
+                asyncio.create_task(prescore_job(job_id, reset_claude=True))
+        
+        return JSONResponse(
+            status_code=200,
+            content={"status": "updated", "job_id": job_id}
+        )
+    
+    except Exception as e:
+        logger.error(f"Error updating job {job_id}: {str(e)}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Failed to update job: {str(e)}"}
+        )
+
+def bulk_delete_query(request: BulkDeleteRequest) -> Dict[str, Any]:
+    """Mongo filter for a bulk delete request. Raises HTTPException when nothing is selected."""
+    query = {}
+    if request.ids is not None:
+        invalid = [document_id for document_id in request.ids if not ObjectId.is_valid(document_id)]
+        if invalid:
+            raise HTTPException(
+                status_code=400,
+                detail=ErrorResponse(
+                    code=ErrorCode.INVALID_ID,
+                    message=f"Invalid ID format: {', '.join(invalid[:10])}",
+                    timestamp=datetime.utcnow().isoformat()
+                ).dict()
+            )
+        query["_id"] = {"$in": [ObjectId(document_id) for document_id in request.ids]}
+    if request.status is not None:
+        query["status"] = request.status
+    if request.created_before is not None or request.created_after is not None:
+        query["created_at"] = {}
+        if request.created_before is not None:
+            query["created_at"]["$lt"] = request.created_before
+        if request.created_after is not None:
+            query["created_at"]["$gte"] = request.created_after
+    if not query and not request.all:
+        raise HTTPException(status_code=400, detail="Select documents by ids, status or creation time, or set all")
+    return query
+
+async def bulk_delete(collection: str, query: Dict[str, Any]) -> Dict[str, Any]:
+    """Delete jobs or candidates with their matches, reports and texts, and drop them from the in-memory indexes."""
+    counts = await get_storage().delete_documents(collection, query)
+    ids = counts.pop("ids")
+    if collection == "jobs":
+        if ids is None:
+            await job_profiles.build()
+            await job_text_index.build()
+        else:
+            for job_id in ids:
+                job_profiles.remove(job_id)
+                job_text_index.remove(job_id)
+    else:
+        if ids is None:
+            await skill_index.build()
+            await candidate_vectors.build()
+            await candidate_text_index.build()
+        else:
+            for candidate_id in ids:
+                skill_index.remove(candidate_id)
+                candidate_vectors.remove(candidate_id)
+                candidate_text_index.remove(candidate_id)
+    return {"status": "deleted", **counts}
+
+async def text_search(collection: str, index: TextIndex, q: str, limit: int, skip: int, match: str) -> TextSearchResponse:
+    """Rank one collection's documents by BM25 against q and cut highlighted snippets for the page."""
+    total, ranked = index.search(q, limit, skip, match_all=match == "all")
+    doc_ids = [doc_id for doc_id, _ in ranked]
+    texts = await get_storage().get_texts(collection, doc_ids)
+    documents = await get_loaders().loader(collection, {"filename": 1}).load_many(doc_ids)
+    hits = [
+        TextSearchHit(
+            id=doc_id,
+            filename=document.get("filename") if document else None,
+            score=round(score, 4),
+            snippets=snippets(texts.get(doc_id, ""), q)
+        )
+        for (doc_id, score), document in zip(ranked, documents)
+    ]
+    return TextSearchResponse(query=q, total=total, hits=hits)
+
+@app.post("/jobs/bulk-delete")
+async def bulk_delete_jobs(request: BulkDeleteRequest):
+    """Delete the selected jobs in one pass, cascading to their matches, reports and texts."""
+    try:
+        return await bulk_delete("jobs", bulk_delete_query(request))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error bulk deleting jobs: {str(e)}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Failed to delete jobs: {str(e)}"}
+        )
+
+@app.delete("/jobs/all")
+async def delete_all_jobs():
+    try:
+        return await bulk_delete("jobs", {})
+    except Exception as e:
+        logger.error(f"Error deleting all jobs: {str(e)}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Failed to delete all jobs: {str(e)}"}
+        )
+
 @app.delete("/jobs/{file_id}")
 async def delete_job(file_id: str):
     try:
@@ -419,19 +649,22 @@ async def delete_job(file_id: str):
                 content={"error": "Invalid file ID format"}
             )
 
-        # Try to delete by either _id or file_id
-        result = await db.jobs.delete_one({
+        # Try to delete by either _id or file_id, with the job's matches, reports and texts
+        counts = await get_storage().delete_documents("jobs", {
             "$or": [
                 {"_id": ObjectId(file_id)},
                 {"file_id": file_id}
             ]
         })
 
-        if result.deleted_count == 0:
+        if not counts["ids"]:
             return JSONResponse(
                 status_code=404,
                 content={"error": "Job not found"}
             )
+        for job_id in counts["ids"]:
+            job_profiles.remove(job_id)
+            job_text_index.remove(job_id)
 
         return JSONResponse(
             status_code=200,
@@ -445,38 +678,128 @@ async def delete_job(file_id: str):
             content={"error": f"Failed to delete job: {str(e)}"}
         )
 
-@app.delete("/jobs/all")
-def delete_all_jobs():
+@app.get("/candidates/all", response_model=list[CandidateResponse])
+async def get_all_candidates(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: str = Query("_id", regex=f"^({'|'.join(LIST_SORT_FIELDS)})$"),
+    include_text: bool = False
+):
+    """
+    One page of candidates, newest first. The cursor for the next page is returned
+    in the X-Next-Cursor header, which is absent on the last page.
+    """
     try:
-        result = db.jobs.delete_many({})
-        return JSONResponse(
-            status_code=200,
-            content={"status": "deleted", "count": result.deleted_count}
-        )
+        try:
+            page, next_cursor = await get_storage().list_page("candidates", limit, cursor, sort, include_text)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=400,
+                detail=ErrorResponse(
+                    code=ErrorCode.INVALID_CURSOR,
+                    message=str(e),
+                    timestamp=datetime.utcnow().isoformat()
+                ).dict()
+            )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        candidates = []
+        for candidate in page:
+            candidate["candidate_id"] = str(candidate["_id"])
+            del candidate["_id"]
+            candidates.append(CandidateResponse(**candidate))
+        return candidates
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error deleting all jobs: {str(e)}")
-        return JSONResponse(
+        logger.error(f"Error getting all candidates: {str(e)}")
+        raise HTTPException(
             status_code=500,
-            content={"error": f"Failed to delete all jobs: {str(e)}"}
+            detail=ErrorResponse(
+                code=ErrorCode.DATABASE_ERROR,
+                message="Error retrieving candidates",
+                details=str(e),
+                timestamp=datetime.utcnow()
+            ).dict()
         )
 
-@app.get("/candidates/all", response_model=list[CandidateResponse])
-async def get_all_candidates():
+@app.get("/candidates/search", response_model=CandidateSearchResponse)
+async def search_all_candidates(
+    response: Response,
+    skills: List[str] = Query([]),
+    location: Optional[str] = None,
+    min_parse_score: Optional[float] = Query(None, ge=0, le=100),
+    max_parse_score: Optional[float] = Query(None, ge=0, le=100),
+    min_years: Optional[float] = Query(None, ge=0),
+    max_years: Optional[float] = Query(None, ge=0),
+    status: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: str = Query("created_at", regex=f"^({'|'.join(LIST_SORT_FIELDS)})$"),
+    facets: bool = True
+):
+    """
+    Filter candidates by skills (all required), location, parse score, years of
+    experience and status, newest first. Facet counts cover every match, not just
+    this page, and are only computed when facets is set.
+    """
     try:
-        cursor = db.candidates.find()
+        query = search_query(skills, location, min_parse_score, max_parse_score, min_years, max_years, status)
+        try:
+            page, next_cursor = await search_candidates(query, limit, cursor, sort)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=400,
+                detail=ErrorResponse(
+                    code=ErrorCode.INVALID_CURSOR,
+                    message=str(e),
+                    timestamp=datetime.utcnow().isoformat()
+                ).dict()
+            )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         candidates = []
-        async for candidate in cursor:
+        for candidate in page:
             candidate["candidate_id"] = str(candidate["_id"])
             del candidate["_id"]
             candidates.append(CandidateResponse(**candidate))
-        return candidates
+        return CandidateSearchResponse(
+            candidates=candidates,
+            next_cursor=next_cursor,
+            facets=await candidate_facets(query) if facets else None
+        )
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error getting all candidates: {str(e)}")
+        logger.error(f"Error searching candidates: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=ErrorResponse(
                 code=ErrorCode.DATABASE_ERROR,
-                message="Error retrieving candidates",
+                message="Error searching candidates",
+                details=str(e),
+                timestamp=datetime.utcnow()
+            ).dict()
+        )
+
+@app.get("/candidates/text-search", response_model=TextSearchResponse)
+async def text_search_candidates(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    skip: int = Query(0, ge=0),
+    match: str = Query("all", regex="^(all|any)$")
+):
+    """Keyword search over candidate text, e.g. q=pyspark databricks. With match=all every term must appear."""
+    try:
+        return await text_search("candidates", candidate_text_index, q, limit, skip, match)
+    except Exception as e:
+        logger.error(f"Error searching candidate text: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=ErrorResponse(
+                code=ErrorCode.UNKNOWN_ERROR,
+                message="Error searching candidate text",
                 details=str(e),
                 timestamp=datetime.utcnow()
             ).dict()
@@ -493,14 +816,9 @@ async def get_candidate_text(candidate_id: str):
                 content={"error": "Invalid candidate ID format"}
             )
 
-        # Try to find the document by either _id or candidate_id
+        # Try to find the document by either _id or file_id
         try:
-            candidate = await db.candidates.find_one({
-                "$or": [
-                    {"_id": ObjectId(candidate_id)},
-                    {"candidate_id": candidate_id}
-                ]
-            })
+            candidate = await get_storage().find_document("candidates", candidate_id, {"_id": 1})
         except Exception as e:
             logger.error(f"Database query failed for candidate_id {candidate_id}: {str(e)}")
             return JSONResponse(
@@ -517,7 +835,7 @@ async def get_candidate_text(candidate_id: str):
             )
 
         # Get text content
-        text = candidate.get("text", "")
+        text = (await get_storage().get_texts("candidates", [str(candidate["_id"])])).get(str(candidate["_id"]))
         if not text:
             logger.warning(f"No text content found for candidate_id: {candidate_id}")
             return JSONResponse(
@@ -535,6 +853,31 @@ async def get_candidate_text(candidate_id: str):
             content={"error": f"Failed to process request: {str(e)}"}
         )
 
+@app.post("/candidates/bulk-delete")
+async def bulk_delete_candidates(request: BulkDeleteRequest):
+    """Delete the selected candidates in one pass, cascading to their matches and texts."""
+    try:
+        return await bulk_delete("candidates", bulk_delete_query(request))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error bulk deleting candidates: {str(e)}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Failed to delete candidates: {str(e)}"}
+        )
+
+@app.delete("/candidates/all")
+async def delete_all_candidates():
+    try:
+        return await bulk_delete("candidates", {})
+    except Exception as e:
+        logger.error(f"Error deleting all candidates: {str(e)}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Failed to delete all candidates: {str(e)}"}
+        )
+
 @app.delete("/candidates/{candidate_id}")
 async def delete_candidate(candidate_id: str):
     try:
@@ -546,19 +889,23 @@ async def delete_candidate(candidate_id: str):
                 content={"error": "Invalid candidate ID format"}
             )
 
-        # Try to delete by either _id or candidate_id
-        result = await db.candidates.delete_one({
+        # Try to delete by either _id or candidate_id, with the candidate's matches and text
+        counts = await get_storage().delete_documents("candidates", {
             "$or": [
                 {"_id": ObjectId(candidate_id)},
                 {"candidate_id": candidate_id}
             ]
         })
 
-        if result.deleted_count == 0:
+        if not counts["ids"]:
             return JSONResponse(
                 status_code=404,
                 content={"error": "Candidate not found"}
             )
+        for deleted_id in counts["ids"]:
+            skill_index.remove(deleted_id)
+            candidate_vectors.remove(deleted_id)
+            candidate_text_index.remove(deleted_id)
 
         return JSONResponse(
             status_code=200,
@@ -572,23 +919,8 @@ async def delete_candidate(candidate_id: str):
             content={"error": f"Failed to delete candidate: {str(e)}"}
         )
 
-@app.delete("/candidates/all")
-def delete_all_candidates():
-    try:
-        result = db.candidates.delete_many({})
-        return JSONResponse(
-            status_code=200,
-            content={"status": "deleted", "count": result.deleted_count}
-        )
-    except Exception as e:
-        logger.error(f"Error deleting all candidates: {str(e)}")
-        return JSONResponse(
-            status_code=500,
-            content={"error": f"Failed to delete all candidates: {str(e)}"}
-        )
-
 @app.post("/match")
-async def match_candidates(request: MatchRequest):
+async def match_candidates(request: MatchRequest, background_tasks: BackgroundTasks):
     """Match candidates against a job description."""
     try:
         # Validate job_id format
@@ -615,7 +947,12 @@ async def match_candidates(request: MatchRequest):
                 )
 
         # Process matches using the matcher module
-        result = await process_matches(request.job_id, request.candidate_ids)
+        result = await process_matches(
+            request.job_id,
+            request.candidate_ids,
+            request.top_k,
+            request.claude_budget.dict() if request.claude_budget else None
+        )
         if not result:
             raise HTTPException(
                 status_code=404,
@@ -626,65 +963,15 @@ async def match_candidates(request: MatchRequest):
                 ).dict()
             )
             
-        # Create and save report automatically
-        report_id = None
-        try:
-            # Get job details
-            job = await get_job(request.job_id)
-            if not job:
-                logger.warning(f"Job not found when creating report: {request.job_id}")
-            else:
-                # Prepare report data
-                report_data = []
-                for match in result.get('matches', []):
-                    candidate = await get_candidates(match['candidate_id'])
-                    if candidate:
-                        report_data.append({
-                            'name': candidate.get('name', 'Unknown'),
-                            'email': candidate.get('email', ''),
-                            'phone': candidate.get('phone', ''),
-                            'current_role': candidate.get('current_role', ''),
-                            'current_company': candidate.get('current_company', ''),
-                            'python_score': match.get('python_score', 0),
-                            'claude_score': match.get('claude_score', 0),
-                            'shortlisted': match.get('shortlisted', False),
-                            'strengths': match.get('claude_analysis', {}).get('strengths', []),
-                            'gaps': match.get('claude_analysis', {}).get('gaps', [])
-                        })
-                
-                # Create report document
-                report_doc = {
-                    'job_id': request.job_id,
-                    'filename': f"match_results_{request.job_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json",
-                    'created_at': datetime.utcnow().isoformat(),
-                    'content': report_data,
-                    'status': 'completed',
-                    'job_title': job.get('title', 'Unknown Job'),
-                    'job_description': job.get('description', ''),
-                    'total_candidates': len(report_data),
-                    'shortlisted_candidates': len([c for c in report_data if c['shortlisted']])
-                }
-                
-                # Save report to database
-                logger.info(f"Attempting to save report for job_id: {request.job_id}")
-                report_id = await save_report(report_doc)
-                
-                if report_id:
-                    logger.info(f"Successfully saved report with ID: {report_id}")
-                    logger.info(f"Report data: {json.dumps(report_doc, default=str)}")
-                    
-                    # Verify the report was saved
-                    saved_report = await get_report(report_id)
-                    if saved_report:
-                        logger.info(f"Verified report exists in database with ID: {report_id}")
-                    else:
-                        logger.error(f"Report verification failed for ID: {report_id}")
-                else:
-                    logger.error(f"Failed to save report for job_id: {request.job_id}")
-                
-        except Exception as e:
-            logger.error(f"Error saving automatic match report: {str(e)}")
-            # Don't raise the error as we still want to return the match results
+        # Build the match report after the response is sent; its placeholder is written now
+        report_id = await reserve_report(request.job_id)
+        if report_id:
+            background_tasks.add_task(
+                generate_report,
+                request.job_id,
+                report_id,
+                [match['candidate_id'] for match in result.get('matches', [])]
+            )
             
         # Return the result dictionary directly with the report_id added
         result['report_id'] = report_id
@@ -704,8 +991,126 @@ async def match_candidates(request: MatchRequest):
             ).dict()
         )
 
+@app.post("/match/matrix")
+async def match_matrix(request: MatrixMatchRequest):
+    """
+    Score several jobs against one candidate pool in a single request.
+    Returns the top_n candidates per job and optionally persists them as matches;
+    parallel shards the scoring across worker processes.
+    """
+    for object_id in [*request.job_ids, *(request.candidate_ids or [])]:
+        if not ObjectId.is_valid(object_id):
+            raise HTTPException(
+                status_code=400,
+                detail=ErrorResponse(
+                    code=ErrorCode.INVALID_ID,
+                    message=f"Invalid ID format: {object_id}",
+                    timestamp=datetime.utcnow().isoformat()
+                ).dict()
+            )
+    return await process_matrix_matches(request.job_ids, request.candidate_ids, request.top_n, request.persist, request.parallel)
+
+@app.post("/match/candidate/{candidate_id}")
+async def match_jobs_for_candidate(candidate_id: str, limit: int = Query(20, ge=1, le=MAX_REVERSE_LIMIT), claude_top: int = Query(0, ge=0, le=MAX_REVERSE_CLAUDE_TOP)):
+    """
+    Rank all open jobs for a candidate.
+    Claude assessments are run only for the best claude_top jobs.
+    """
+    if not ObjectId.is_valid(candidate_id):
+        raise HTTPException(
+            status_code=400,
+            detail=ErrorResponse(
+                code=ErrorCode.INVALID_ID,
+                message="Invalid candidate ID format",
+                timestamp=datetime.utcnow().isoformat()
+            ).dict()
+        )
+    return await process_reverse_matches(candidate_id, limit, claude_top)
+
+@app.get("/match/{job_id}/ranking")
+async def get_job_ranking(job_id: str, limit: int = Query(50, ge=1, le=500), skip: int = Query(0, ge=0), shortlist: Optional[bool] = None):
+    """
+    Serve a job's maintained ranking without re-scoring, one page at a time.
+    The ranking is kept current as candidates are added and the job is edited.
+    With shortlist set, only shortlisted (or only non-shortlisted) matches are returned.
+    """
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job ID format")
+    matches, total = await asyncio.gather(
+        get_storage().get_matches(job_id, shortlist, limit, skip),
+        get_storage().count_matches(job_id, shortlist)
+    )
+    return {
+        'job_id': job_id,
+        'matches': matches,
+        'total_candidates': total
+    }
+
+@app.post("/match/{job_id}/top")
+async def match_top_candidates(
+    job_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_TOP_CANDIDATES),
+    top_k: Optional[int] = Query(None, ge=1, le=MAX_TOP_K),
+    max_claude_calls: Optional[int] = Query(None, ge=0)
+):
+    """
+    Match a job against the whole candidate pool.
+    Only candidates sharing at least one skill with the job are loaded and scored,
+    and top_k keeps just the best top_k of them.
+    max_claude_calls overrides the default Claude call budget.
+    """
+    try:
+        if not ObjectId.is_valid(job_id):
+            raise HTTPException(
+                status_code=400,
+                detail=ErrorResponse(
+                    code=ErrorCode.INVALID_ID,
+                    message="Invalid job ID format",
+                    timestamp=datetime.utcnow().isoformat()
+                ).dict()
+            )
+        
+        job = await get_loaders().jobs.load(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        
+        # Retrieve candidates through the inverted skill index
+        candidate_ids = skill_index.lookup(document_skill_ids(job.get("extracted_info")), limit)
+        logger.info(f"Skill index returned {len(candidate_ids)} candidates for job_id: {job_id}")
+        if not candidate_ids:
+            raise HTTPException(
+                status_code=404,
+                detail=ErrorResponse(
+                    code=ErrorCode.NOT_FOUND,
+                    message="No candidates share skills with this job",
+                    timestamp=datetime.utcnow().isoformat()
+                ).dict()
+            )
+        
+        claude_budget = {'max_calls': max_claude_calls} if max_claude_calls is not None else None
+        return await process_matches(job_id, candidate_ids, top_k, claude_budget)
+        
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        logger.error(f"Error in match_top_candidates: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=ErrorResponse(
+                code=ErrorCode.PROCESSING_ERROR,
+                message="Error processing match request",
+                details=str(e),
+                timestamp=datetime.utcnow().isoformat()
+            ).dict()
+        )
+
 @app.post("/export/shortlisted/{job_id}")
-async def export_shortlisted_report(job_id: str):
+async def export_shortlisted_report(job_id: str, background_tasks: BackgroundTasks, background: bool = False):
+    """
+    Export a report of a job's shortlisted candidates with complete Claude assessments.
+    With background set, the report is built after the response is sent and its
+    ID is returned straight away with status "processing".
+    """
     try:
         logger.info(f"Starting report generation for job_id: {job_id}")
         
@@ -713,116 +1118,29 @@ async def export_shortlisted_report(job_id: str):
         if not ObjectId.is_valid(job_id):
             logger.error(f"Invalid job_id format: {job_id}")
             raise HTTPException(status_code=400, detail="Invalid job ID format")
-            
-        # Get job details
-        logger.info(f"Fetching job details for job_id: {job_id}")
-        job = await get_job(job_id)
-        if not job:
-            logger.error(f"Job not found: {job_id}")
-            raise HTTPException(status_code=404, detail="Job not found")
-            
-        # Get matches for this job
-        logger.info(f"Fetching matches for job_id: {job_id}")
-        matches = await get_matches(job_id)
-        if not matches:
-            logger.error(f"No matches found for job_id: {job_id}")
-            raise HTTPException(status_code=404, detail="No matches found for this job")
-            
-        # Filter for shortlisted candidates and validate data completeness
-        valid_matches = []
-        for match in matches:
-            if not match.get('shortlisted', False):
-                continue
-                
-            # Check for required fields
-            required_fields = ['candidate_id', 'python_score', 'claude_score', 'claude_analysis']
-            missing_fields = [field for field in required_fields if not match.get(field)]
-            
-            if missing_fields:
-                logger.warning(f"Match {match.get('_id')} missing required fields: {missing_fields}")
-                continue
-                
-            # Check for valid scores
-            if not isinstance(match['python_score'], (int, float)) or not isinstance(match['claude_score'], (int, float)):
-                logger.warning(f"Match {match.get('_id')} has invalid score types")
-                continue
-                
-            # Check for valid claude_analysis
-            claude_analysis = match.get('claude_analysis', {})
-            if not isinstance(claude_analysis, dict) or not claude_analysis.get('strengths') or not claude_analysis.get('gaps'):
-                logger.warning(f"Match {match.get('_id')} has invalid claude_analysis format")
-                continue
-                
-            valid_matches.append(match)
-            
-        if not valid_matches:
+        
+        if background:
+            report_id = await reserve_report(job_id, shortlist_only=True)
+            if not report_id:
+                raise HTTPException(status_code=404, detail="Job not found")
+            background_tasks.add_task(generate_report, job_id, report_id, None, True)
+            return {
+                'report_id': report_id,
+                'status': 'processing'
+            }
+        
+        report_id = await generate_report(job_id, shortlist_only=True)
+        if not report_id:
             logger.error(f"No valid shortlisted candidates found for job_id: {job_id}")
             raise HTTPException(
                 status_code=404,
                 detail="No valid shortlisted candidates found. Please ensure all shortlisted candidates have complete match data."
             )
-            
-        logger.info(f"Found {len(valid_matches)} valid shortlisted candidates")
-            
-        # Get candidate details for valid matches
-        candidates = []
-        for match in valid_matches:
-            candidate = await get_candidates(match['candidate_id'])
-            if candidate:
-                claude_analysis = match.get('claude_analysis', {})
-                candidates.append({
-                    'name': candidate.get('name', 'Unknown'),
-                    'email': candidate.get('email', ''),
-                    'phone': candidate.get('phone', ''),
-                    'current_role': candidate.get('current_role', ''),
-                    'current_company': candidate.get('current_company', ''),
-                    'python_score': match['python_score'],
-                    'claude_score': match['claude_score'],
-                    'shortlisted': match['shortlisted'],
-                    'strengths': claude_analysis.get('strengths', []),
-                    'gaps': claude_analysis.get('gaps', [])
-                })
-        
-        if not candidates:
-            logger.error(f"No candidate details found for valid matches in job_id: {job_id}")
-            raise HTTPException(
-                status_code=404,
-                detail="No candidate details found for valid matches"
-            )
-            
-        # Create report document
-        report_doc = {
-            'job_id': job_id,
-            'filename': f"shortlisted_candidates_{job_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json",
-            'created_at': datetime.utcnow().isoformat(),
-            'content': candidates,
-            'status': 'completed',
-            'job_title': job.get('title', 'Unknown Job'),
-            'job_description': job.get('description', ''),
-            'total_candidates': len(candidates),
-            'shortlisted_candidates': len([c for c in candidates if c['shortlisted']])
-        }
-        
-        # Save report to database
-        logger.info(f"Saving report to database for job_id: {job_id}")
-        result = await db.reports.insert_one(report_doc)
-        report_id = str(result.inserted_id)
-        logger.info(f"Report saved successfully with ID: {report_id}")
-        
-        # Verify the report was saved
-        saved_report = await get_report(report_id)
-        if saved_report:
-            logger.info(f"Verified report exists in database with ID: {report_id}")
-        else:
-            logger.error(f"Report verification failed for ID: {report_id}")
-            raise HTTPException(
-                status_code=500,
-                detail="Failed to verify report was saved"
-            )
         
+        report = await get_storage().get_report(report_id)
         return {
             'report_id': report_id,
-            'filename': report_doc['filename'],
+            'filename': report['filename'],
             'status': 'completed'
         }
         
@@ -848,7 +1166,7 @@ async def get_reports_endpoint(job_id: str):
             logger.error(f"Invalid job_id format: {job_id}")
             raise HTTPException(status_code=400, detail="Invalid job ID format")
             
-        reports = await get_reports(job_id)
+        reports = await get_storage().get_reports(job_id)
         logger.info(f"Found {len(reports)} reports for job_id: {job_id}")
         
         if not reports:
@@ -870,7 +1188,7 @@ async def download_report(report_id: str):
         if not ObjectId.is_valid(report_id):
             raise HTTPException(status_code=400, detail="Invalid report ID format")
             
-        report = await get_report(report_id)
+        report = await get_storage().get_report(report_id)
         if not report:
             raise HTTPException(status_code=404, detail="Report not found")
             
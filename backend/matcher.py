@@ -7,7 +7,7 @@ current_dir = Path(__file__).resolve().parent
 sys.path.append(str(current_dir))
 
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 from datetime import datetime
 from models import JobInfo, CandidateInfo, MatchRecord
 from bson.objectid import ObjectId
@@ -15,9 +15,16 @@ from anthropic import Anthropic
 import os
 import json
 import re
+import heapq
+import asyncio
+import time
 from dotenv import load_dotenv
 from fastapi import HTTPException
-from database import db
+from loaders import get_loaders
+from experience import ROLE_INDICATORS, duration_years, normalize_timeline, is_timeline_stale
+from vector_index import candidate_vectors, job_text
+from skill_taxonomy import taxonomy
+from storage import get_storage
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -41,144 +48,146 @@ except Exception as e:
     logger.error(f"Failed to initialize Anthropic client: {str(e)}")
     anthropic_client = None
 
+# Minimum TF-IDF cosine similarity between job and candidate text for the Claude stage
+SEMANTIC_MIN_SIMILARITY = float(os.getenv("SEMANTIC_MIN_SIMILARITY", "0.1"))
+
+# Default per-request Claude budget for the match cascade (0 disables a limit)
+CLAUDE_BUDGET = {
+    # Most Claude assessments per match request
+    'max_calls': int(os.getenv("CLAUDE_MAX_CALLS", "20")),
+    # Most input plus output tokens spent per match request
+    'max_tokens': int(os.getenv("CLAUDE_MAX_TOKENS", "0")),
+    # Most wall-clock seconds spent in the Claude stage per match request
+    'max_seconds': float(os.getenv("CLAUDE_MAX_SECONDS", "0")),
+    # Stop after this many consecutive assessments that leave the shortlist unchanged
+    'stable_calls': int(os.getenv("CLAUDE_STABLE_CALLS", "5")),
+}
+
+# Minimum heuristic score for a candidate to enter the Claude cascade
+CLAUDE_MIN_PYTHON_SCORE = 50
+
 def parse_duration(duration: str) -> float:
     """
     Parse duration string into years.
     Handles formats like:
     - "March 2003 – January 2005"
+    - "2019 – Present"
     - "2 years"
     - "6 months"
     - "2015-2020"
     """
-    try:
-        # Handle month-year format
-        if '–' in duration or '-' in duration:
-            parts = duration.split('–') if '–' in duration else duration.split('-')
-            if len(parts) == 2:
-                start = parts[0].strip()
-                end = parts[1].strip()
-                
-                # Extract years
-                start_year = None
-                end_year = None
-                
-                # Try to extract years from dates
-                for part in [start, end]:
-                    year_match = re.search(r'\b(19|20)\d{2}\b', part)
-                    if year_match:
-                        if start_year is None:
-                            start_year = int(year_match.group())
-                        else:
-                            end_year = int(year_match.group())
-                
-                if start_year and end_year:
-                    return end_year - start_year
-                
-        # Handle "X years" format
-        year_match = re.search(r'(\d+)\s*(?:year|yr|y)', duration.lower())
-        if year_match:
-            return float(year_match.group(1))
-            
-        # Handle "X months" format
-        month_match = re.search(r'(\d+)\s*(?:month|mo|m)', duration.lower())
-        if month_match:
-            return float(month_match.group(1)) / 12
-            
-        # Handle year range format (e.g., "2015-2020")
-        range_match = re.search(r'(\d{4})\s*-\s*(\d{4})', duration)
-        if range_match:
-            start_year = int(range_match.group(1))
-            end_year = int(range_match.group(2))
-            return end_year - start_year
-            
-    except Exception as e:
-        logger.warning(f"Failed to parse duration '{duration}': {str(e)}")
-        return 0.0
-        
-    return 0.0
+    return duration_years(duration)
+
+# Heuristic score weights (sum of the maximum component scores is 100)
+SCORE_WEIGHTS = {
+    'skills': 0.3,
+    'experience': 0.3,
+    'education': 0.2,
+    'completeness': 0.1,
+    'current_role': 0.1
+}
+
+# Skills counted towards the skill score for domain-specific roles
+ROLE_SKILLS = {
+    'technical': {'python', 'java', 'sql', 'azure', 'aws', 'cloud', 'data', 'devops', 'ci/cd', 'spark', 'pyspark'},
+    'hr': {'hr', 'recruitment', 'talent', 'employee', 'people', 'management', 'leadership'},
+}
+ROLE_SKILL_IDS = {role_type: taxonomy.skill_ids(skills) for role_type, skills in ROLE_SKILLS.items()}
 
-def calculate_python_score(job: JobInfo, candidate: CandidateInfo) -> float:
+# Degree terms counted as relevant education per role type
+EDUCATION_TERMS = {
+    'technical': ['computer', 'engineering', 'science', 'technology', 'data'],
+    'hr': ['human resources', 'psychology', 'business', 'management'],
+    'finance': ['finance', 'accounting', 'business', 'economics'],
+}
+
+# Candidate fields read by the scoring hot path
+SCORING_PROJECTION = {
+    "filename": 1,
+    "extracted_info.name": 1,
+    "extracted_info.summary": 1,
+    "extracted_info.skills": 1,
+    "extracted_info.skill_ids": 1,
+    "extracted_info.experience": 1,
+    "extracted_info.education": 1,
+    "experience_timeline": 1,
+}
+
+class ScoringCandidate:
     """
-    Calculate a basic matching score between a job and candidate using Python heuristics.
-    Returns a score between 0 and 100.
+    Slim, unvalidated view of a candidate document for the scoring hot path.
+    Exposes the CandidateInfo attributes that calculate_python_score and
+    get_claude_match read; full validation stays at the API boundary.
     """
-    score = 0
-    max_score = 100
-    weights = {
-        'skills': 0.3,
-        'experience': 0.3,
-        'education': 0.2,
-        'completeness': 0.1,
-        'current_role': 0.1
-    }
+    __slots__ = ('candidate_id', 'filename', 'name', 'summary', 'skills', 'skill_ids', 'experience', 'education', 'timeline')
 
+    def __init__(self, document: Dict):
+        info = document.get('extracted_info') or {}
+        experience = info.get('experience')
+        education = info.get('education')
+        self.candidate_id = str(document.get('_id'))
+        self.filename = document.get('filename')
+        self.name = info.get('name')
+        self.summary = info.get('summary')
+        self.skills = info.get('skills')
+        self.skill_ids = info.get('skill_ids')
+        self.experience = [exp for exp in experience if isinstance(exp, dict)] if experience else None
+        self.education = [edu for edu in education if isinstance(edu, dict)] if education else None
+        self.timeline = document.get('experience_timeline')
+
+def compile_job_profile(job: JobInfo) -> Dict[str, Any]:
+    """
+    Precompute everything about a job that calculate_python_score needs,
+    so it is done once per job instead of once per candidate.
+    """
     # Determine role type from job title and requirements
     role_type = "other"
     job_text = f"{job.title} {job.summary} {' '.join(job.requirements or [])} {' '.join(job.skills or [])}".lower()
-    
-    technical_indicators = ['engineer', 'developer', 'programmer', 'data', 'cloud', 'azure', 'aws', 'python', 'java', 'sql', 'devops']
-    hr_indicators = ['hr', 'human resources', 'recruitment', 'talent', 'people', 'employee']
-    finance_indicators = ['finance', 'accounting', 'financial', 'audit', 'tax']
-    
-    if any(indicator in job_text for indicator in technical_indicators):
-        role_type = "technical"
-    elif any(indicator in job_text for indicator in hr_indicators):
-        role_type = "hr"
-    elif any(indicator in job_text for indicator in finance_indicators):
-        role_type = "finance"
+    for candidate_role_type, indicators in ROLE_INDICATORS.items():
+        if any(indicator in job_text for indicator in indicators):
+            role_type = candidate_role_type
+            break
+
+    job_skills = frozenset(job.skill_ids) if job.skill_ids is not None else taxonomy.skill_ids(job.skills)
+    role_skills = ROLE_SKILL_IDS.get(role_type)
+    return {
+        'job': job,
+        'role_type': role_type,
+        'job_skills': job_skills,
+        # Role-specific skill matching only counts the role's own skills
+        'match_skills': job_skills.intersection(role_skills) if role_skills is not None else job_skills,
+        'has_requirements': bool(job.requirements),
+        'education_terms': EDUCATION_TERMS.get(role_type, []),
+    }
+
+def calculate_python_score(job: JobInfo, candidate: Union[CandidateInfo, ScoringCandidate], timeline: Optional[Dict] = None, profile: Optional[Dict] = None) -> float:
+    """
+    Calculate a basic matching score between a job and candidate using Python heuristics.
+    Uses the candidate's cached experience timeline and the compiled job profile when
+    given, otherwise builds them.
+    Returns a score between 0 and 100.
+    """
+    if profile is None:
+        profile = compile_job_profile(job)
+    score = 0
+    weights = SCORE_WEIGHTS
+    role_type = profile['role_type']
 
     # Skills matching (30%)
-    if job.skills and candidate.skills:
-        job_skills = set(skill.lower() for skill in job.skills)
-        candidate_skills = set(skill.lower() for skill in candidate.skills)
-        
-        # Role-specific skill matching
-        if role_type == "technical":
-            technical_skills = {'python', 'java', 'sql', 'azure', 'aws', 'cloud', 'data', 'devops', 'ci/cd', 'spark', 'pyspark'}
-            candidate_technical_skills = candidate_skills.intersection(technical_skills)
-            skill_matches = len(job_skills.intersection(candidate_technical_skills))
-        elif role_type == "hr":
-            hr_skills = {'hr', 'recruitment', 'talent', 'employee', 'people', 'management', 'leadership'}
-            candidate_hr_skills = candidate_skills.intersection(hr_skills)
-            skill_matches = len(job_skills.intersection(candidate_hr_skills))
-        else:
-            skill_matches = len(job_skills.intersection(candidate_skills))
-            
-        skill_score = (skill_matches / len(job_skills)) * 100 if job_skills else 0
+    job_skills = profile['job_skills']
+    if job_skills and candidate.skills:
+        candidate_skills = frozenset(candidate.skill_ids) if candidate.skill_ids is not None else taxonomy.skill_ids(candidate.skills)
+        skill_matches = len(profile['match_skills'].intersection(candidate_skills))
+        skill_score = (skill_matches / len(job_skills)) * 100
         score += skill_score * weights['skills']
 
     # Experience matching (30%)
-    if job.requirements and candidate.experience:
-        total_years = 0
-        relevant_years = 0
-        current_role_match = False
-        
-        for exp in candidate.experience:
-            if 'duration' in exp:
-                duration = exp['duration']
-                if isinstance(duration, str):
-                    years = parse_duration(duration)
-                    total_years += years
-                    
-                    # Check if experience is relevant to role type
-                    exp_text = f"{exp.get('job_title', '').lower()} {exp.get('company', '').lower()} {' '.join(exp.get('responsibilities', []))}"
-                    
-                    if role_type == "technical":
-                        if any(indicator in exp_text for indicator in technical_indicators):
-                            relevant_years += years
-                            # Check if this is the current role
-                            if 'present' in duration.lower() or 'current' in duration.lower():
-                                current_role_match = True
-                    elif role_type == "hr":
-                        if any(indicator in exp_text for indicator in hr_indicators):
-                            relevant_years += years
-                            if 'present' in duration.lower() or 'current' in duration.lower():
-                                current_role_match = True
-                    elif role_type == "finance":
-                        if any(indicator in exp_text for indicator in finance_indicators):
-                            relevant_years += years
-                            if 'present' in duration.lower() or 'current' in duration.lower():
-                                current_role_match = True
+    if profile['has_requirements'] and candidate.experience:
+        if timeline is None:
+            timeline = normalize_timeline(candidate.experience)
+        total_years = timeline.get('total_years', 0)
+        relevant_years = timeline.get('relevant_years', {}).get(role_type, 0)
+        current_role_match = timeline.get('current_role', {}).get(role_type, False)
         
         # Score based on relevant experience
         exp_score = min(100, (relevant_years / 5) * 100) if total_years > 0 else 0
@@ -189,25 +198,12 @@ def calculate_python_score(job: JobInfo, candidate: CandidateInfo) -> float:
             score += 100 * weights['current_role']
 
     # Education matching (20%)
-    if job.requirements and candidate.education:
-        has_relevant_education = False
-        for edu in candidate.education:
-            degree = edu.get('degree', '').lower()
-            institution = edu.get('institution', '').lower()
-            
-            if role_type == "technical":
-                if any(term in degree for term in ['computer', 'engineering', 'science', 'technology', 'data']):
-                    has_relevant_education = True
-                    break
-            elif role_type == "hr":
-                if any(term in degree for term in ['human resources', 'psychology', 'business', 'management']):
-                    has_relevant_education = True
-                    break
-            elif role_type == "finance":
-                if any(term in degree for term in ['finance', 'accounting', 'business', 'economics']):
-                    has_relevant_education = True
-                    break
-        
+    if profile['has_requirements'] and candidate.education:
+        education_terms = profile['education_terms']
+        has_relevant_education = any(
+            any(term in (edu.get('degree') or '').lower() for term in education_terms)
+            for edu in candidate.education
+        )
         score += (100 if has_relevant_education else 0) * weights['education']
 
     # Completeness (10%)
@@ -226,10 +222,52 @@ def calculate_python_score(job: JobInfo, candidate: CandidateInfo) -> float:
 
     return round(score, 2)
 
-def get_claude_match(job: JobInfo, candidate: CandidateInfo) -> Optional[Dict[str, Any]]:
+def python_score_upper_bound(profile: Dict[str, Any], candidate: Dict) -> float:
+    """
+    Cheap upper bound on calculate_python_score for a raw candidate document.
+    Reads only list lengths, truthiness and the cached timeline, so it skips
+    model validation and set building.
+    """
+    info = candidate.get('extracted_info') or {}
+    weights = SCORE_WEIGHTS
+    bound = 0
+    skills = info.get('skills')
+    experience = info.get('experience')
+    education = info.get('education')
+
+    # Skills: at most one match per candidate skill
+    match_skills = profile['match_skills']
+    if profile['job_skills'] and skills:
+        best = min(len(match_skills), len(skills))
+        bound += (best / len(profile['job_skills'])) * 100 * weights['skills']
+
+    # Experience and current role: exact when the cached timeline is fresh
+    if profile['has_requirements'] and experience:
+        timeline = candidate.get('experience_timeline')
+        if is_timeline_stale(timeline):
+            bound += 100 * (weights['experience'] + weights['current_role'])
+        else:
+            role_type = profile['role_type']
+            if timeline.get('total_years', 0) > 0:
+                bound += min(100, (timeline.get('relevant_years', {}).get(role_type, 0) / 5) * 100) * weights['experience']
+            if timeline.get('current_role', {}).get(role_type, False):
+                bound += 100 * weights['current_role']
+
+    # Education: assume a relevant degree if any is listed
+    if profile['has_requirements'] and education and profile['education_terms']:
+        bound += 100 * weights['education']
+
+    # Completeness is exact
+    filled = sum(1 for field in (info.get('name'), experience, education, skills, info.get('summary')) if field)
+    bound += filled * 20 * weights['completeness']
+
+    return round(bound, 2)
+
+def get_claude_match(job: JobInfo, candidate: Union[CandidateInfo, ScoringCandidate], usage: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
     """
     Get matching assessment from Claude AI.
     Returns None if Claude is not available or fails.
+    When usage is given, the tokens spent on the call are added to usage['tokens'].
     """
     if not anthropic_client:
         logger.warning("Anthropic client not available")
@@ -300,6 +338,9 @@ def get_claude_match(job: JobInfo, candidate: CandidateInfo) -> Optional[Dict[st
             ]
         )
 
+        if usage is not None and getattr(message, 'usage', None) is not None:
+            usage['tokens'] = usage.get('tokens', 0) + message.usage.input_tokens + message.usage.output_tokens
+
         if not message.content:
             logger.warning("Empty response from Claude")
             return None
@@ -322,83 +363,215 @@ def get_claude_match(job: JobInfo, candidate: CandidateInfo) -> Optional[Dict[st
         logger.error(f"Error getting Claude match: {str(e)}")
         return None
 
-async def get_job(job_id: str) -> Optional[Dict]:
-    """Get job from database by ID."""
-    try:
-        job = await db.jobs.find_one({"_id": ObjectId(job_id)})
-        if job:
-            job["_id"] = str(job["_id"])  # Convert ObjectId to string
-        return job
-    except Exception as e:
-        logger.error(f"Error getting job {job_id}: {str(e)}")
+def score_candidate(profile: Dict[str, Any], candidate: Dict, stale_timelines: Dict[str, Dict]) -> Optional[Tuple[float, ScoringCandidate]]:
+    """
+    Compute the heuristic score for one candidate document.
+    Returns the score and the candidate's scoring view, or None if the candidate has no extracted info.
+    Rebuilt experience timelines are queued on stale_timelines for write-back.
+    """
+    if not candidate.get('extracted_info'):
+        logger.warning(f"No extracted info for candidate {candidate.get('filename')}")
         return None
+    
+    scoring_candidate = ScoringCandidate(candidate)
+    
+    # Use the cached experience timeline, rebuilding it if missing or stale
+    if is_timeline_stale(scoring_candidate.timeline):
+        scoring_candidate.timeline = normalize_timeline(scoring_candidate.experience)
+        candidate['experience_timeline'] = scoring_candidate.timeline
+        stale_timelines[str(candidate['_id'])] = {"experience_timeline": scoring_candidate.timeline}
+    
+    return calculate_python_score(profile['job'], scoring_candidate, scoring_candidate.timeline, profile), scoring_candidate
 
-async def get_candidates(candidate_ids: List[str]) -> List[Dict]:
-    """Get candidates from database by IDs."""
-    try:
-        candidate_ids = [ObjectId(cid) for cid in candidate_ids]
-        cursor = db.candidates.find({"_id": {"$in": candidate_ids}})
-        candidates = await cursor.to_list(length=None)
-        for candidate in candidates:
-            candidate["_id"] = str(candidate["_id"])
-        return candidates
-    except Exception as e:
-        logger.error(f"Error getting candidates: {str(e)}")
-        return []
+def rank_top_k(profile: Dict[str, Any], candidates: List[Dict], k: int, stale_timelines: Dict[str, Dict]) -> Tuple[List[Tuple[float, Dict, ScoringCandidate]], int]:
+    """
+    Keep the k best candidates by heuristic score using a bounded min-heap.
+    Candidates are visited in order of their score upper bound, and the scan stops
+    as soon as no remaining candidate can beat the current k-th best (WAND-style).
+    Returns the top k (best first) and the number of candidates pruned without scoring.
+    """
+    if k <= 0:
+        return [], len(candidates)
+    bounded = sorted(
+        ((python_score_upper_bound(profile, candidate), index) for index, candidate in enumerate(candidates)),
+        reverse=True
+    )
+    heap = []
+    scored = 0
+    for bound, index in bounded:
+        if len(heap) >= k and bound <= heap[0][0]:
+            break
+        candidate = candidates[index]
+        try:
+            result = score_candidate(profile, candidate, stale_timelines)
+        except Exception as e:
+            logger.error(f"Error scoring candidate {candidate.get('filename')}: {str(e)}")
+            result = None
+        scored += 1
+        if result is None:
+            continue
+        python_score, scoring_candidate = result
+        entry = (python_score, -index, candidate, scoring_candidate)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif python_score > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+    
+    top = sorted(heap, key=lambda entry: (entry[0], entry[1]), reverse=True)
+    return [(python_score, candidate, info) for python_score, _, candidate, info in top], len(candidates) - scored
+
+async def run_claude_cascade(job: JobInfo, queue: List[Tuple[str, float, ScoringCandidate]], shortlisted: set, budget: Dict[str, Any]) -> Tuple[Dict[str, Dict], Dict[str, Any]]:
+    """
+    Spend the Claude budget on the queued (candidate_id, python_score, candidate)
+    entries, most promising first. shortlisted holds the IDs currently on the
+    shortlist and is updated as assessments come in.
+    The cascade stops when a call, token or time limit is reached, or once
+    budget['stable_calls'] assessments in a row have left the shortlist unchanged.
+    Returns the analyses by candidate ID and a summary of the spend.
+    """
+    analyses = {}
+    usage = {'tokens': 0}
+    calls = 0
+    stable = 0
+    stop_reason = 'exhausted'
+    started = time.monotonic()
+    for candidate_id, python_score, candidate in queue:
+        if budget['max_calls'] and calls >= budget['max_calls']:
+            stop_reason = 'max_calls'
+            break
+        if budget['max_tokens'] and usage['tokens'] >= budget['max_tokens']:
+            stop_reason = 'max_tokens'
+            break
+        if budget['max_seconds'] and time.monotonic() - started >= budget['max_seconds']:
+            stop_reason = 'max_seconds'
+            break
+        if budget['stable_calls'] and stable >= budget['stable_calls']:
+            stop_reason = 'stable'
+            break
+
+        calls += 1
+        # Each call blocks for seconds, so it runs in a worker thread
+        analysis = await asyncio.to_thread(get_claude_match, job, candidate, usage)
+        if not analysis:
+            continue
+        analyses[candidate_id] = analysis
+        claude_score = analysis.get('match_score')
+        on_shortlist = claude_score >= 70 if claude_score is not None else python_score >= 70
+        if on_shortlist == (candidate_id in shortlisted):
+            stable += 1
+        else:
+            stable = 0
+            if on_shortlist:
+                shortlisted.add(candidate_id)
+            else:
+                shortlisted.discard(candidate_id)
+
+    summary = {
+        'calls': calls,
+        'tokens': usage['tokens'],
+        'seconds': round(time.monotonic() - started, 2),
+        'stop_reason': stop_reason
+    }
+    logger.info(f"Claude cascade: {calls} calls, {usage['tokens']} tokens, stopped on {stop_reason}")
+    return analyses, summary
 
-async def process_matches(job_id: str, candidate_ids: List[str]) -> Dict:
-    """Process matches between a job and candidates using both Python and Claude."""
+async def process_matches(job_id: str, candidate_ids: List[str], top_k: Optional[int] = None, claude_budget: Optional[Dict[str, Any]] = None) -> Dict:
+    """
+    Process matches between a job and candidates using both Python and Claude.
+    With top_k set, only the top_k candidates by heuristic score are kept and
+    candidates that cannot reach them are pruned before scoring.
+    Claude assessments are limited by claude_budget (overriding CLAUDE_BUDGET
+    per key) and spent on the highest scoring candidates first.
+    """
     try:
-        # Get job and candidates from MongoDB
-        job = await db.jobs.find_one({"_id": ObjectId(job_id)})
+        # Get job and candidates through the request's loaders, loading only the candidate fields scoring reads
+        loaders = get_loaders()
+        job = await loaders.jobs.load(job_id)
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         
-        # Convert candidate IDs to ObjectId
-        candidate_ids = [ObjectId(cid) for cid in candidate_ids]
-        cursor = db.candidates.find({"_id": {"$in": candidate_ids}})
-        candidates = await cursor.to_list(length=None)
+        candidate_docs = await loaders.loader("candidates", SCORING_PROJECTION).load_many(list(dict.fromkeys(candidate_ids)))
+        candidates = [dict(candidate) for candidate in candidate_docs if candidate]
         
         if not candidates:
             raise HTTPException(status_code=404, detail="No candidates found")
         
-        # Convert job info to JobInfo object
+        # Convert job info to JobInfo object and compile its scoring profile
         job_info = JobInfo(**job.get('extracted_info', {})) if job.get('extracted_info') else JobInfo()
+        profile = compile_job_profile(job_info)
         
         # Initialize results
         matches = []
         total_candidates = len(candidates)
         processed_candidates = 0
-        
-        # Process each candidate
+        pruned_candidates = 0
+        stale_timelines = {}
         for candidate in candidates:
+            candidate["_id"] = str(candidate["_id"])
+        
+        # Heuristic stage
+        if top_k:
+            scored, pruned_candidates = rank_top_k(profile, candidates, top_k, stale_timelines)
+        else:
+            scored = []
+            for candidate in candidates:
+                try:
+                    result = score_candidate(profile, candidate, stale_timelines)
+                    if result is not None:
+                        scored.append((result[0], candidate, result[1]))
+                except Exception as e:
+                    logger.error(f"Error processing candidate {candidate.get('filename')}: {str(e)}")
+        
+        # Semantic prefilter: similarity between job and candidate text from the local vector index
+        semantic_scores = candidate_vectors.similarities(
+            job_text(job.get('extracted_info')),
+            [candidate['_id'] for _, candidate, _ in scored]
+        )
+        
+        # Claude results already in the job's maintained ranking are reused
+        stored_matches = await get_storage().get_stored_matches(job_id, [candidate['_id'] for _, candidate, _ in scored])
+        
+        # Claude cascade: candidates scoring 50% or above with related text and no stored
+        # analysis are queued best first, and assessed until the budget or stop rule ends it
+        budget = {**CLAUDE_BUDGET, **{key: value for key, value in (claude_budget or {}).items() if value is not None}}
+        queue = []
+        shortlisted = set()
+        for python_score, candidate, scoring_candidate in scored:
+            stored = stored_matches.get(candidate['_id'], {})
+            if stored.get('claude_score') is not None:
+                if stored['claude_score'] >= 70:
+                    shortlisted.add(candidate['_id'])
+            elif python_score >= 70:
+                shortlisted.add(candidate['_id'])
+            semantic_score = semantic_scores.get(candidate['_id'])
+            semantically_related = semantic_score is None or semantic_score >= SEMANTIC_MIN_SIMILARITY
+            if stored.get('claude_analysis') is None and python_score >= CLAUDE_MIN_PYTHON_SCORE and semantically_related:
+                queue.append((candidate['_id'], python_score, scoring_candidate, semantic_score or 0.0))
+        queue.sort(key=lambda entry: (entry[1], entry[3]), reverse=True)
+        
+        claude_analyses = {}
+        cascade = {'calls': 0, 'tokens': 0, 'seconds': 0.0, 'stop_reason': 'disabled'}
+        if queue and anthropic_client is not None:
             try:
-                # Convert _id to string
-                candidate["_id"] = str(candidate["_id"])
-                
-                # Get candidate's extracted info
-                candidate_info = candidate.get('extracted_info', {})
-                if not candidate_info:
-                    logger.warning(f"No extracted info for candidate {candidate.get('filename')}")
-                    continue
-                
-                # Convert candidate info to CandidateInfo object
-                candidate_info_obj = CandidateInfo(**candidate_info) if candidate_info else CandidateInfo()
-                
-                # Calculate Python match score
-                python_score = calculate_python_score(job_info, candidate_info_obj)
+                claude_analyses, cascade = await run_claude_cascade(
+                    job_info, [entry[:3] for entry in queue], shortlisted, budget
+                )
+            except Exception as e:
+                logger.error(f"Error getting Claude analysis: {str(e)}")
+        cascade['queued'] = len(queue)
+        
+        # Process each scored candidate
+        for python_score, candidate, scoring_candidate in scored:
+            try:
+                semantic_score = semantic_scores.get(candidate['_id'])
+                stored = stored_matches.get(candidate['_id'], {})
                 
-                # Only process with Claude if Python score is 50% or above
-                claude_score = None
-                claude_analysis = None
-                if python_score >= 50 and anthropic_client is not None:
-                    try:
-                        # Get Claude's analysis
-                        claude_analysis = get_claude_match(job_info, candidate_info_obj)
-                        if claude_analysis:
-                            claude_score = claude_analysis.get('match_score')
-                    except Exception as e:
-                        logger.error(f"Error getting Claude analysis: {str(e)}")
+                # Reuse a stored Claude result, or take the cascade's new one
+                claude_score = stored.get('claude_score')
+                claude_analysis = stored.get('claude_analysis')
+                if candidate['_id'] in claude_analyses:
+                    claude_analysis = claude_analyses[candidate['_id']]
+                    claude_score = claude_analysis.get('match_score')
                 
                 # Determine shortlist status
                 shortlist = False
@@ -411,28 +584,51 @@ async def process_matches(job_id: str, candidate_ids: List[str]) -> Dict:
                 matches.append({
                     'candidate_id': candidate['_id'],
                     'python_score': python_score,
+                    'semantic_score': round(semantic_score, 4) if semantic_score is not None else None,
                     'claude_score': claude_score,
                     'claude_analysis': claude_analysis,
                     'shortlist': shortlist
                 })
                 
                 processed_candidates += 1
-                logger.info(f"Processed {processed_candidates}/{total_candidates} candidates")
+                logger.info(f"Processed {processed_candidates}/{len(scored)} candidates")
                 
             except Exception as e:
                 logger.error(f"Error processing candidate {candidate.get('filename')}: {str(e)}")
                 continue
         
+        # Write back any timelines rebuilt during scoring
+        if stale_timelines:
+            try:
+                await get_storage().set_fields('candidates', stale_timelines)
+            except Exception as e:
+                logger.warning(f"Failed to cache experience timelines: {str(e)}")
+        
         # Sort matches by score (best matches first)
         matches.sort(key=lambda x: x['claude_score'] if x['claude_score'] is not None else x['python_score'], reverse=True)
         
+        # Keep the job's ranking current. Claude fields are written only for candidates
+        # this run assessed or reused, so a result stored meanwhile is not cleared
+        try:
+            await get_storage().save_matches(job_id, [
+                match if match['claude_analysis'] is not None
+                else {key: value for key, value in match.items() if key not in ('claude_score', 'claude_analysis')}
+                for match in matches
+            ])
+        except Exception as e:
+            logger.error(f"Failed to store matches for job {job_id}: {str(e)}")
+        
         return {
             'job_id': job_id,
             'matches': matches,
             'total_candidates': total_candidates,
-            'processed_candidates': processed_candidates
+            'processed_candidates': processed_candidates,
+            'pruned_candidates': pruned_candidates,
+            'claude_cascade': cascade
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in process_matches: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+
+from matcher import SCORING_PROJECTION, compile_job_profile
+from models import JobInfo
+from scoring_features import build_candidate_features, score_matrix
+from sharded_matcher import score_top_k_sharded
+from storage import get_storage
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def top_n_per_job(scores: np.ndarray, top_n: int) -> List[List[Tuple[float, int]]]:
+    """Pick the best top_n (score, candidate row) pairs from each row of the score matrix, best first."""
+    results = []
+    top_n = min(top_n, scores.shape[1])
+    for row in scores:
+        if top_n <= 0:
+            results.append([])
+            continue
+        top = np.argpartition(-row, top_n - 1)[:top_n]
+        top = top[np.argsort(-row[top], kind='stable')]
+        results.append([(float(row[i]), int(i)) for i in top])
+    return results
+
+def _format_matches(pairs: List[Tuple[float, int]], candidate_ids: List[str]) -> List[Dict]:
+    matches = []
+    for score, row in pairs:
+        python_score = round(score, 2)
+        matches.append({
+            'candidate_id': candidate_ids[row],
+            'python_score': python_score,
+            'shortlist': python_score >= 70
+        })
+    return matches
+
+async def process_matrix_matches(job_ids: List[str], candidate_ids: Optional[List[str]] = None, top_n: int = 20, persist: bool = False, parallel: bool = False) -> Dict:
+    """
+    Score many jobs against one candidate pool with the Python heuristics.
+    The pool (given IDs, or every candidate) is loaded once for all jobs.
+    With parallel set, scoring is sharded across worker processes.
+    """
+    try:
+        storage = get_storage()
+        jobs = await storage.find_documents('jobs', job_ids, {"extracted_info": 1})
+        if not jobs:
+            raise HTTPException(status_code=404, detail="No jobs found")
+
+        if candidate_ids:
+            candidates = await storage.find_documents('candidates', candidate_ids, SCORING_PROJECTION)
+        else:
+            candidates = [candidate async for candidate in storage.iter_documents('candidates', SCORING_PROJECTION)]
+        candidates = [candidate for candidate in candidates if candidate.get('extracted_info')]
+        if not candidates:
+            raise HTTPException(status_code=404, detail="No candidates found")
+
+        profiles = [compile_job_profile(JobInfo(**(job.get('extracted_info') or {}))) for job in jobs]
+        pool_ids = [str(candidate['_id']) for candidate in candidates]
+        if parallel:
+            ranked = await score_top_k_sharded(candidates, profiles, top_n)
+        else:
+            # Feature building and scoring are CPU-bound, so they run in a worker thread
+            ranked = await asyncio.to_thread(lambda: top_n_per_job(score_matrix(build_candidate_features(candidates), profiles), top_n))
+
+        results = []
+        for job, pairs in zip(jobs, ranked):
+            job_id = str(job['_id'])
+            matches = _format_matches(pairs, pool_ids)
+            if persist:
+                await storage.save_matches(job_id, matches)
+            results.append({'job_id': job_id, 'matches': matches})
+
+        return {
+            'results': results,
+            'total_jobs': len(jobs),
+            'total_candidates': len(candidates)
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in process_matrix_matches: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
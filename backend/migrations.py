@@ -0,0 +1,326 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from bson import Binary
+from pymongo import ReplaceOne, ReturnDocument, UpdateOne
+
+from database import TEXT_COMPRESSION_LEVEL, db
+from experience import TIMELINE_VERSION, is_timeline_stale, normalize_timeline
+from search import normalize_location
+from skill_taxonomy import skill_ids
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Documents read and written per bulk_write
+MIGRATION_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "1000"))
+
+# _id ranges migrated at the same time
+MIGRATION_CONCURRENCY = int(os.getenv("MIGRATION_CONCURRENCY", "4"))
+
+# A run that has not checkpointed for this long is presumed dead and may be taken over
+MIGRATION_LEASE_SECONDS = int(os.getenv("MIGRATION_LEASE_SECONDS", "120"))
+
+# Seconds between progress log lines
+MIGRATION_LOG_SECONDS = 5
+
+class MigrationLeaseHeld(Exception):
+    """Another live run holds the lease on a migration."""
+
+class Migration:
+    """
+    One versioned data migration over a collection. Documents matching query
+    are visited in _id order, and transform returns the update for a document
+    (or None to leave it alone). Transforms must be idempotent, since a
+    resumed run may revisit the batch it was interrupted in.
+    """
+
+    def __init__(self, version: int, name: str, collection: str, transform: Callable[[Dict], Optional[Dict]], query: Optional[Dict] = None, projection: Optional[Dict] = None):
+        self.version = version
+        self.name = name
+        self.collection = collection
+        self.transform = transform
+        self.query = query or {}
+        self.projection = projection
+
+    async def write_batch(self, documents: List[Dict]) -> int:
+        """Apply the transform to one batch with a single bulk_write. Returns the number of documents modified."""
+        operations = []
+        for document in documents:
+            update = self.transform(document)
+            if update:
+                operations.append(UpdateOne({"_id": document["_id"]}, update))
+        if not operations:
+            return 0
+        result = await db[self.collection].bulk_write(operations, ordered=False)
+        return result.modified_count
+
+class TextBlobMigration(Migration):
+    """Move texts embedded in documents into compressed blobs in the texts collection."""
+
+    def __init__(self, version: int, collection: str):
+        super().__init__(
+            version, f"{collection}_text_blobs", collection, None,
+            query={"text": {"$type": "string"}, "text_id": {"$exists": False}},
+            projection={"text": 1}
+        )
+
+    async def write_batch(self, documents):
+        if not documents:
+            return 0
+        # Blobs reuse the owner's _id so a resumed batch overwrites rather than duplicates them
+        now = datetime.utcnow()
+        await db.texts.bulk_write([
+            ReplaceOne({"_id": document["_id"]}, {
+                "owner": self.collection,
+                "owner_id": document["_id"],
+                "data": Binary(zlib.compress(document["text"].encode("utf-8"), TEXT_COMPRESSION_LEVEL)),
+                "size": len(document["text"]),
+                "created_at": now
+            }, upsert=True)
+            for document in documents
+        ], ordered=False)
+        result = await db[self.collection].bulk_write([
+            UpdateOne({"_id": document["_id"]}, {"$set": {"text_id": document["_id"]}, "$unset": {"text": ""}})
+            for document in documents
+        ], ordered=False)
+        return result.modified_count
+
+def _wrap_string_entries(document: Dict) -> Optional[Dict]:
+    """Education and experience entries stored as bare strings become {"note": ...}; other non-dicts are dropped."""
+    extracted_info = document.get("extracted_info") or {}
+    fixed = {}
+    for field in ("education", "experience"):
+        items = extracted_info.get(field)
+        if not isinstance(items, list):
+            continue
+        new_items = [item if isinstance(item, dict) else {"note": item} for item in items if isinstance(item, (dict, str))]
+        if new_items != items:
+            fixed[f"extracted_info.{field}"] = new_items
+    return {"$set": fixed} if fixed else None
+
+def _backfill_skill_ids(document: Dict) -> Optional[Dict]:
+    extracted_info = document.get("extracted_info")
+    if not isinstance(extracted_info, dict):
+        return None
+    ids = skill_ids(extracted_info.get("skills"))
+    if extracted_info.get("skill_ids") == ids:
+        return None
+    return {"$set": {"extracted_info.skill_ids": ids}}
+
+def _backfill_experience_timeline(document: Dict) -> Optional[Dict]:
+    if not is_timeline_stale(document.get("experience_timeline")):
+        return None
+    experience = (document.get("extracted_info") or {}).get("experience")
+    return {"$set": {"experience_timeline": normalize_timeline(experience)}}
+
+def _backfill_location_key(document: Dict) -> Optional[Dict]:
+    location_key = normalize_location((document.get("extracted_info") or {}).get("location"))
+    if "location_key" in document and document["location_key"] == location_key:
+        return None
+    return {"$set": {"location_key": location_key}}
+
+# Every migration, in the order they are applied. Never renumber; append new ones.
+MIGRATIONS = [
+    Migration(1, "wrap_string_entries", "candidates", _wrap_string_entries,
+              projection={"extracted_info.education": 1, "extracted_info.experience": 1}),
+    TextBlobMigration(2, "jobs"),
+    TextBlobMigration(3, "candidates"),
+    Migration(4, "job_skill_ids", "jobs", _backfill_skill_ids,
+              projection={"extracted_info.skills": 1, "extracted_info.skill_ids": 1}),
+    Migration(5, "candidate_skill_ids", "candidates", _backfill_skill_ids,
+              projection={"extracted_info.skills": 1, "extracted_info.skill_ids": 1}),
+    Migration(6, "candidate_experience_timelines", "candidates", _backfill_experience_timeline,
+              query={"experience_timeline.version": {"$ne": TIMELINE_VERSION}},
+              projection={"extracted_info.experience": 1, "experience_timeline": 1}),
+    Migration(7, "candidate_location_keys", "candidates", _backfill_location_key,
+              query={"location_key": {"$exists": False}},
+              projection={"extracted_info.location": 1, "location_key": 1}),
+]
+
+async def _partition(migration: Migration, parts: int, batch_size: int) -> List[Dict]:
+    """Split the documents to migrate into up to parts _id ranges of similar size."""
+    collection = db[migration.collection]
+    total = await collection.count_documents(migration.query)
+    parts = max(1, min(parts, total // batch_size))
+    bounds = []
+    for i in range(1, parts):
+        cursor = collection.find(migration.query, {"_id": 1}).sort("_id", 1).skip(total * i // parts).limit(1)
+        bounds.extend(document["_id"] for document in await cursor.to_list(length=1))
+    edges = [None, *sorted(set(bounds)), None]
+    return [{"low": low, "high": high, "last_id": None, "done": False} for low, high in zip(edges, edges[1:])]
+
+async def _acquire(migration: Migration, parts: int, batch_size: int) -> Optional[Dict]:
+    """
+    Claim a migration and return its checkpoint state, creating it (with its _id
+    ranges) on the first run. Returns None if it is complete, and raises
+    MigrationLeaseHeld if another live run holds it.
+    """
+    now = datetime.utcnow()
+    state = await db.migrations.find_one({"_id": migration.version})
+    if state and state.get("status") == "completed":
+        return None
+    if state is None:
+        state = {
+            "name": migration.name,
+            "collection": migration.collection,
+            "ranges": await _partition(migration, parts, batch_size),
+            "processed": 0,
+            "updated": 0,
+            "started_at": now,
+        }
+        await db.migrations.update_one({"_id": migration.version}, {"$setOnInsert": state}, upsert=True)
+
+    # Take the lease unless a live run still holds it
+    state = await db.migrations.find_one_and_update(
+        {"_id": migration.version, "status": {"$ne": "completed"}, "$or": [
+            {"status": {"$ne": "running"}},
+            {"heartbeat": {"$lt": now - timedelta(seconds=MIGRATION_LEASE_SECONDS)}}
+        ]},
+        {"$set": {"status": "running", "heartbeat": now}},
+        return_document=ReturnDocument.AFTER
+    )
+    if state is None:
+        # Completed by the other run since the first read, or still being run by it
+        current = await db.migrations.find_one({"_id": migration.version}, {"status": 1, "heartbeat": 1})
+        if current and current.get("status") == "completed":
+            return None
+        raise MigrationLeaseHeld(
+            f"Migration {migration.version} ({migration.name}) is being run elsewhere "
+            f"(last heartbeat {current.get('heartbeat') if current else None})"
+        )
+    return state
+
+async def _migrate_range(migration: Migration, index: int, checkpoint: Dict, batch_size: int, progress: Dict):
+    """Migrate one _id range batch by batch, checkpointing after every bulk write."""
+    collection = db[migration.collection]
+    last_id = checkpoint["last_id"]
+    while True:
+        id_filter = {"$gt": last_id} if last_id is not None else ({"$gte": checkpoint["low"]} if checkpoint["low"] is not None else {})
+        if checkpoint["high"] is not None:
+            id_filter["$lt"] = checkpoint["high"]
+        query = {**migration.query, "_id": id_filter} if id_filter else migration.query
+        documents = await collection.find(query, migration.projection).sort("_id", 1).limit(batch_size).to_list(length=None)
+        if not documents:
+            await db.migrations.update_one({"_id": migration.version}, {"$set": {f"ranges.{index}.done": True}})
+            return
+
+        updated = await migration.write_batch(documents)
+        last_id = documents[-1]["_id"]
+        await db.migrations.update_one(
+            {"_id": migration.version},
+            {
+                "$set": {f"ranges.{index}.last_id": last_id, "heartbeat": datetime.utcnow()},
+                "$inc": {"processed": len(documents), "updated": updated}
+            }
+        )
+        progress["processed"] += len(documents)
+        progress["updated"] += updated
+        if time.monotonic() - progress["logged"] >= MIGRATION_LOG_SECONDS:
+            progress["logged"] = time.monotonic()
+            elapsed = time.monotonic() - progress["started"]
+            logger.info(
+                f"Migration {migration.version} ({migration.name}): {progress['processed']} documents, "
+                f"{progress['updated']} updated, {progress['processed'] / elapsed:.0f} docs/s"
+            )
+
+async def run_migration(migration: Migration, batch_size: int = MIGRATION_BATCH_SIZE, concurrency: int = MIGRATION_CONCURRENCY) -> Optional[Dict[str, Any]]:
+    """
+    Run (or resume) one migration, with up to concurrency _id ranges in flight.
+    Returns the run's statistics, or None if there was nothing to do.
+    Raises MigrationLeaseHeld if another live run holds the migration.
+    """
+    state = await _acquire(migration, concurrency, batch_size)
+    if state is None:
+        return None
+
+    progress = {"processed": 0, "updated": 0, "started": time.monotonic(), "logged": time.monotonic()}
+    logger.info(f"Running migration {migration.version} ({migration.name}) over {len(state['ranges'])} _id ranges")
+    workers = [
+        asyncio.ensure_future(_migrate_range(migration, index, checkpoint, batch_size, progress))
+        for index, checkpoint in enumerate(state["ranges"])
+        if not checkpoint["done"]
+    ]
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        # Release the lease so the next run resumes from the checkpoints immediately
+        await db.migrations.update_one({"_id": migration.version}, {"$set": {"status": "interrupted"}})
+        raise
+
+    elapsed = time.monotonic() - progress["started"]
+    stats = {
+        "version": migration.version,
+        "name": migration.name,
+        "processed": progress["processed"],
+        "updated": progress["updated"],
+        "seconds": round(elapsed, 2),
+        "docs_per_second": round(progress["processed"] / elapsed) if elapsed else None,
+    }
+    await db.migrations.update_one(
+        {"_id": migration.version},
+        {"$set": {"status": "completed", "finished_at": datetime.utcnow()}}
+    )
+    logger.info(f"Completed migration {migration.version} ({migration.name}): {stats}")
+    return stats
+
+async def run_migrations(target: Optional[int] = None, batch_size: int = MIGRATION_BATCH_SIZE, concurrency: int = MIGRATION_CONCURRENCY) -> List[Dict[str, Any]]:
+    """
+    Run every pending migration up to target (default: all), in version order.
+    Stops with MigrationLeaseHeld at the first migration another run holds, so
+    no later migration runs before it.
+    """
+    results = []
+    for migration in MIGRATIONS:
+        if target is not None and migration.version > target:
+            break
+        stats = await run_migration(migration, batch_size, concurrency)
+        if stats is not None:
+            results.append(stats)
+    return results
+
+async def migration_status() -> List[Dict[str, Any]]:
+    """Each migration with its stored state."""
+    states = {state["_id"]: state async for state in db.migrations.find({}, {"ranges": 0})}
+    return [
+        {"version": migration.version, "name": migration.name, "collection": migration.collection,
+         "status": states.get(migration.version, {}).get("status", "pending"),
+         "processed": states.get(migration.version, {}).get("processed", 0),
+         "updated": states.get(migration.version, {}).get("updated", 0)}
+        for migration in MIGRATIONS
+    ]
+
+async def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Apply pending data migrations.")
+    parser.add_argument("--to", type=int, default=None, help="stop after this migration version")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=MIGRATION_CONCURRENCY)
+    parser.add_argument("--status", action="store_true", help="list migrations and their state, then exit")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        for row in await migration_status():
+            print(f"{row['version']:>3}  {row['name']:<32} {row['status']:<12} processed={row['processed']} updated={row['updated']}")
+        return
+    try:
+        results = await run_migrations(args.to, args.batch_size, args.concurrency)
+    except MigrationLeaseHeld as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
+    for stats in results:
+        print(f"{stats['version']:>3}  {stats['name']:<32} processed={stats['processed']} updated={stats['updated']} "
+              f"in {stats['seconds']}s ({stats['docs_per_second']} docs/s)")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    asyncio.run(main(sys.argv[1:]))
@@ -13,6 +13,7 @@ class ErrorCode(str, Enum):
     DATABASE_ERROR = "DATABASE_ERROR"
     NOT_FOUND = "NOT_FOUND"
     INVALID_ID = "INVALID_ID"
+    INVALID_CURSOR = "INVALID_CURSOR"
     UNKNOWN_ERROR = "UNKNOWN_ERROR"
     PROCESSING_ERROR = "PROCESSING_ERROR"
     API_ERROR = "API_ERROR"
@@ -131,6 +132,7 @@ class JobInfo(BaseModel):
     skills: Optional[list[str]] = None
     salary: Optional[str] = None
     benefits: Optional[list[str]] = None
+    skill_ids: Optional[list[int]] = None
 
     class Config:
         from_attributes = True
@@ -149,6 +151,7 @@ class CandidateInfo(BaseModel):
     skills: Optional[list[str]] = None
     languages: Optional[list[str]] = None
     certifications: Optional[list[str]] = None
+    skill_ids: Optional[list[int]] = None
 
     class Config:
         from_attributes = True
@@ -160,7 +163,7 @@ class JobResponse(BaseModel):
     job_id: str
     filename: str
     content_type: str
-    text: str
+    text: Optional[str] = None
     word_count: int
     parse_score: float
     preview: str
@@ -177,7 +180,7 @@ class CandidateResponse(BaseModel):
     candidate_id: str
     filename: str
     content_type: str
-    text: str
+    text: Optional[str] = None
     word_count: int
     parse_score: float
     preview: str
@@ -190,6 +193,24 @@ class CandidateResponse(BaseModel):
             datetime: lambda v: v.isoformat()
         }
 
+class CandidateSearchResponse(BaseModel):
+    """One page of candidate search results, with facet counts over all matches."""
+    candidates: List[CandidateResponse]
+    next_cursor: Optional[str] = None
+    facets: Optional[Dict[str, Any]] = None
+
+class TextSearchHit(BaseModel):
+    id: str
+    filename: Optional[str] = None
+    score: float
+    snippets: List[str] = []
+
+class TextSearchResponse(BaseModel):
+    """One page of keyword search results, best match first."""
+    query: str
+    total: int
+    hits: List[TextSearchHit]
+
 class CandidateDetail(BaseModel):
     candidate_id: str
     filename: str
@@ -204,16 +225,83 @@ class CandidateDetail(BaseModel):
             datetime: lambda v: v.isoformat()
         }
 
+class ClaudeBudget(BaseModel):
+    """Per-request limits on the Claude stage of matching; unset fields use the server defaults (0 disables a limit)."""
+    max_calls: Optional[int] = Field(None, ge=0)
+    max_tokens: Optional[int] = Field(None, ge=0)
+    max_seconds: Optional[float] = Field(None, ge=0)
+    stable_calls: Optional[int] = Field(None, ge=0)
+
+# Largest top_k a match request may ask for
+MAX_TOP_K = 500
+
+# Most candidates /match/{job_id}/top may retrieve from the skill index
+MAX_TOP_CANDIDATES = 10000
+
 class MatchRequest(BaseModel):
     """Request model for matching candidates to a job."""
     job_id: str
     candidate_ids: List[str]
+    top_k: Optional[int] = Field(None, ge=1, le=MAX_TOP_K)
+    claude_budget: Optional[ClaudeBudget] = None
 
     class Config:
         schema_extra = {
             "example": {
                 "job_id": "507f1f77bcf86cd799439011",
-                "candidate_ids": ["507f1f77bcf86cd799439012", "507f1f77bcf86cd799439013"]
+                "candidate_ids": ["507f1f77bcf86cd799439012", "507f1f77bcf86cd799439013"],
+                "top_k": 20,
+                "claude_budget": {"max_calls": 10, "stable_calls": 5}
+            }
+        }
+
+class JobUpdateRequest(BaseModel):
+    """Request model for editing a job; only the fields given are changed."""
+    extracted_info: Optional[JobInfo] = None
+    status: Optional[str] = None
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "extracted_info": {"skills": ["Python", "SQL", "Azure"]},
+                "status": "closed"
+            }
+        }
+
+class BulkDeleteRequest(BaseModel):
+    """Select the documents to delete: by ID, by status and creation time, or all of them."""
+    ids: Optional[List[str]] = None
+    status: Optional[str] = None
+    created_before: Optional[datetime] = None
+    created_after: Optional[datetime] = None
+    all: bool = False
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "ids": ["507f1f77bcf86cd799439012", "507f1f77bcf86cd799439013"]
+            }
+        }
+
+# Most jobs one /match/matrix request may score
+MAX_MATRIX_JOBS = 50
+
+class MatrixMatchRequest(BaseModel):
+    """Request model for matching many jobs against one candidate pool."""
+    job_ids: List[str] = Field(..., min_items=1, max_items=MAX_MATRIX_JOBS)
+    candidate_ids: Optional[List[str]] = None
+    top_n: int = Field(20, ge=1, le=MAX_TOP_K)
+    persist: bool = False
+    parallel: bool = False
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "job_ids": ["507f1f77bcf86cd799439011", "507f1f77bcf86cd799439014"],
+                "candidate_ids": None,
+                "top_n": 20,
+                "persist": True,
+                "parallel": False
             }
         }
 
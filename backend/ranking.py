@@ -0,0 +1,140 @@
+import os
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from experience import is_timeline_stale, normalize_timeline
+from matcher import CLAUDE_MIN_PYTHON_SCORE, SCORING_PROJECTION, SEMANTIC_MIN_SIMILARITY, ScoringCandidate, anthropic_client, calculate_python_score, get_claude_match
+from reverse_matcher import job_profiles
+from scoring_features import build_candidate_features, score_matrix
+from storage import get_storage
+from vector_index import candidate_vectors, job_text
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Claude results are tied to the job text they assessed and are dropped when it changes
+CLAUDE_FIELDS = ['claude_score', 'claude_analysis']
+
+# Candidates per new job assessed by Claude ahead of the first /match (0 disables)
+SPECULATIVE_TOP_N = int(os.getenv("SPECULATIVE_TOP_N", "10"))
+
+# Speculative Claude calls run one at a time, off the event loop
+_speculative_slot = asyncio.Semaphore(1)
+
+async def rank_candidate(candidate_id: str, candidate_doc: Dict) -> int:
+    """
+    Score a newly parsed candidate against every active job and add it to their rankings.
+    Returns the number of rankings updated.
+    """
+    try:
+        candidate_info = ScoringCandidate(candidate_doc)
+        timeline = candidate_info.timeline
+        if is_timeline_stale(timeline):
+            timeline = normalize_timeline(candidate_info.experience)
+
+        matches = []
+        for job_id, profile in list(job_profiles.profiles.items()):
+            python_score = calculate_python_score(profile['job'], candidate_info, timeline, profile)
+            matches.append({
+                'job_id': job_id,
+                'candidate_id': candidate_id,
+                'python_score': python_score
+            })
+        await get_storage().upsert_matches(matches)
+        logger.info(f"Ranked candidate {candidate_id} against {len(matches)} jobs")
+        return len(matches)
+    except Exception as e:
+        logger.error(f"Error ranking candidate {candidate_id}: {str(e)}")
+        return 0
+
+async def rank_job(job_id: str, candidate_ids: Optional[List[str]] = None, reset_claude: bool = False) -> int:
+    """
+    Score one job against its candidate pool (the given IDs, or every candidate)
+    and store the results as its ranking. With reset_claude set, Claude results
+    from a previous version of the job are discarded.
+    Returns the number of candidates ranked.
+    """
+    try:
+        profile = job_profiles.get(job_id)
+        if profile is None:
+            logger.warning(f"No active job profile for {job_id}, skipping ranking")
+            return 0
+
+        storage = get_storage()
+        if candidate_ids is not None:
+            candidates = await storage.find_documents('candidates', candidate_ids, SCORING_PROJECTION)
+        else:
+            candidates = [candidate async for candidate in storage.iter_documents('candidates', SCORING_PROJECTION)]
+        candidates = [candidate for candidate in candidates if candidate.get('extracted_info')]
+        if not candidates:
+            return 0
+
+        # Feature building and scoring are CPU-bound, so they run in a worker thread
+        scores = await asyncio.to_thread(lambda: score_matrix(build_candidate_features(candidates), [profile])[0])
+        matches = []
+        for candidate, score in zip(candidates, scores):
+            matches.append({
+                'candidate_id': str(candidate['_id']),
+                'python_score': round(float(score), 2)
+            })
+        await storage.save_matches(job_id, matches, CLAUDE_FIELDS if reset_claude else None)
+        logger.info(f"Ranked {len(matches)} candidates for job {job_id}")
+        return len(matches)
+    except Exception as e:
+        logger.error(f"Error ranking job {job_id}: {str(e)}")
+        return 0
+
+async def prescore_job(job_id: str, reset_claude: bool = False, top_n: int = SPECULATIVE_TOP_N) -> int:
+    """
+    Speculative pre-scoring for a new or changed job: rank the whole pool, then
+    assess the top_n unassessed candidates with Claude in the background so the
+    first /match for the job is served from the match store.
+    Returns the number of Claude assessments stored.
+    """
+    ranked = await rank_job(job_id, reset_claude=reset_claude)
+    if not ranked or top_n <= 0 or anthropic_client is None:
+        return 0
+
+    try:
+        storage = get_storage()
+        pending = await storage.get_unassessed_matches(job_id, CLAUDE_MIN_PYTHON_SCORE, top_n)
+        if not pending:
+            return 0
+
+        profile = job_profiles.get(job_id)
+        candidate_ids = [match['candidate_id'] for match in pending]
+        semantic_scores = candidate_vectors.similarities(job_text(profile['job'].dict()), candidate_ids)
+        candidates = await storage.find_documents('candidates', candidate_ids, SCORING_PROJECTION)
+        candidates = {str(candidate['_id']): candidate for candidate in candidates}
+
+        stored = 0
+        for match in pending:
+            candidate_id = match['candidate_id']
+            semantic_score = semantic_scores.get(candidate_id)
+            if candidate_id not in candidates or (semantic_score is not None and semantic_score < SEMANTIC_MIN_SIMILARITY):
+                continue
+            # The job may have been edited or closed while earlier calls ran
+            if job_profiles.get(job_id) is not profile:
+                logger.info(f"Job {job_id} changed during speculative pre-scoring, stopping")
+                break
+            async with _speculative_slot:
+                claude_analysis = await asyncio.to_thread(get_claude_match, profile['job'], ScoringCandidate(candidates[candidate_id]))
+            if not claude_analysis:
+                continue
+            # Drop the result if the job changed while Claude was assessing it
+            if job_profiles.get(job_id) is not profile:
+                logger.info(f"Job {job_id} changed during speculative pre-scoring, discarding stale result")
+                break
+            await storage.upsert_matches([{
+                'job_id': job_id,
+                'candidate_id': candidate_id,
+                'claude_score': claude_analysis.get('match_score'),
+                'claude_analysis': claude_analysis
+            }])
+            stored += 1
+        logger.info(f"Speculatively assessed {stored} candidates for job {job_id}")
+        return stored
+    except Exception as e:
+        logger.error(f"Error pre-scoring job {job_id}: {str(e)}")
+        return 0
@@ -0,0 +1,85 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from bson.objectid import ObjectId
+
+from loaders import get_loaders
+from storage import get_storage
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def _report_document(job_id: str, job: Optional[Dict], report_id: ObjectId, rows: List[Dict], shortlist_only: bool, status: str) -> Dict:
+    job = job or {}
+    extracted_info = job.get('extracted_info') or {}
+    prefix = "shortlisted_candidates" if shortlist_only else "match_results"
+    return {
+        '_id': report_id,
+        'job_id': ObjectId(job_id),
+        'filename': f"{prefix}_{job_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json",
+        'created_at': datetime.utcnow().isoformat(),
+        'content': rows,
+        'status': status,
+        'job_title': extracted_info.get('title') or job.get('filename', 'Unknown Job'),
+        'job_description': extracted_info.get('summary') or '',
+        'total_candidates': len(rows),
+        'shortlisted_candidates': len([row for row in rows if row['shortlisted']])
+    }
+
+async def reserve_report(job_id: str, shortlist_only: bool = False) -> Optional[str]:
+    """
+    Write a placeholder report with status "processing" for generate_report to
+    fill in later, so an ID handed out before the report is built always resolves.
+    Returns the report ID, or None if the job does not exist.
+    """
+    job = await get_loaders().jobs.load(job_id)
+    if not job:
+        return None
+    return await get_storage().save_report(_report_document(job_id, job, ObjectId(), [], shortlist_only, 'processing'))
+
+async def _close_placeholder(job_id: str, job: Optional[Dict], report_id: ObjectId, shortlist_only: bool, status: str, error: Optional[str] = None):
+    """Mark a reserved report that will not be filled in as "empty" or "failed"."""
+    report_doc = _report_document(job_id, job, ObjectId(report_id), [], shortlist_only, status)
+    if error:
+        report_doc['error'] = error
+    try:
+        await get_storage().save_report(report_doc)
+    except Exception as e:
+        logger.error(f"Error marking report {report_id} as {status}: {str(e)}")
+
+async def generate_report(job_id: str, report_id: Optional[ObjectId] = None, candidate_ids: Optional[List[str]] = None, shortlist_only: bool = False) -> Optional[str]:
+    """
+    Build a match report for a job in one aggregation and write it once.
+    Pass the report_id of a reserve_report placeholder to fill it in, e.g. when
+    this runs as a background task; the placeholder is marked "empty" when there
+    are no matches and "failed" when the report cannot be built.
+    Returns the report ID, or None if there were no matches to report.
+    """
+    job = None
+    try:
+        job = await get_loaders().jobs.load(job_id)
+        if not job:
+            logger.warning(f"Job not found when creating report: {job_id}")
+            if report_id is not None:
+                await _close_placeholder(job_id, None, report_id, shortlist_only, 'failed', "Job not found")
+            return None
+
+        storage = get_storage()
+        rows = await storage.report_rows(job_id, candidate_ids, shortlist_only)
+        if not rows:
+            logger.warning(f"No matches to report for job_id: {job_id}")
+            if report_id is not None:
+                await _close_placeholder(job_id, job, report_id, shortlist_only, 'empty')
+            return None
+
+        report_doc = _report_document(job_id, job, ObjectId(report_id) if report_id else ObjectId(), rows, shortlist_only, 'completed')
+        if not await storage.save_report(report_doc):
+            return None
+        logger.info(f"Saved report {report_doc['_id']} with {len(rows)} candidates for job_id: {job_id}")
+        return str(report_doc['_id'])
+    except Exception as e:
+        logger.error(f"Error generating report for job_id {job_id}: {str(e)}")
+        if report_id is not None:
+            await _close_placeholder(job_id, job, report_id, shortlist_only, 'failed', str(e))
+        return None
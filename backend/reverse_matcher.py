@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from experience import is_timeline_stale, normalize_timeline
+from loaders import get_loaders
+from matcher import SCORING_PROJECTION, ScoringCandidate, anthropic_client, calculate_python_score, compile_job_profile, get_claude_match
+from models import JobInfo
+from storage import get_storage
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Upper bounds on the jobs returned and the jobs assessed by Claude per request
+MAX_REVERSE_LIMIT = 200
+MAX_REVERSE_CLAUDE_TOP = 10
+
+class JobProfileRegistry:
+    """
+    Compiled scoring profiles for every open job, held in memory.
+    Built once at startup and kept current as jobs are uploaded and deleted.
+    """
+
+    def __init__(self):
+        self.profiles: Dict[str, Dict[str, Any]] = {}
+
+    async def build(self):
+        """Rebuild the registry from the jobs collection."""
+        self.profiles = {}
+        async for job in get_storage().iter_documents('jobs', {"extracted_info": 1, "filename": 1, "status": 1}):
+            if job.get("status") != "closed":
+                self.add(str(job["_id"]), job)
+        logger.info(f"Job profile registry built: {len(self.profiles)} jobs")
+
+    def add(self, job_id: str, job: Dict):
+        """Compile (or recompile) the profile for a job document."""
+        extracted_info = job.get("extracted_info") or {}
+        profile = compile_job_profile(JobInfo(**extracted_info))
+        profile["job_id"] = job_id
+        profile["title"] = extracted_info.get("title") or job.get("filename")
+        self.profiles[job_id] = profile
+
+    def remove(self, job_id: str):
+        self.profiles.pop(job_id, None)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.profiles.get(job_id)
+
+job_profiles = JobProfileRegistry()
+
+async def process_reverse_matches(candidate_id: str, limit: int = 20, claude_top: int = 0) -> Dict:
+    """
+    Rank open jobs for a single candidate using the in-memory job profiles.
+    Claude assessments are run only for the best claude_top jobs.
+    """
+    try:
+        candidate = await get_loaders().loader("candidates", SCORING_PROJECTION).load(candidate_id)
+        if not candidate:
+            raise HTTPException(status_code=404, detail="Candidate not found")
+
+        candidate_info = ScoringCandidate(candidate)
+        timeline = candidate_info.timeline
+        if is_timeline_stale(timeline):
+            timeline = normalize_timeline(candidate_info.experience)
+
+        # Heuristic stage against every open job
+        ranked = []
+        for job_id, profile in list(job_profiles.profiles.items()):
+            try:
+                python_score = calculate_python_score(profile["job"], candidate_info, timeline, profile)
+                ranked.append({
+                    'job_id': job_id,
+                    'title': profile["title"],
+                    'python_score': python_score,
+                    'claude_score': None,
+                    'claude_analysis': None,
+                    'shortlist': python_score >= 70
+                })
+            except Exception as e:
+                logger.error(f"Error scoring job {job_id}: {str(e)}")
+        ranked.sort(key=lambda x: x['python_score'], reverse=True)
+        ranked = ranked[:limit]
+
+        # Optional Claude stage on the best few jobs
+        if claude_top and anthropic_client is not None:
+            for match in ranked[:claude_top]:
+                # The job may have been closed while earlier calls ran
+                profile = job_profiles.get(match['job_id'])
+                if profile is None:
+                    continue
+                claude_analysis = await asyncio.to_thread(get_claude_match, profile["job"], candidate_info)
+                if claude_analysis:
+                    match['claude_analysis'] = claude_analysis
+                    match['claude_score'] = claude_analysis.get('match_score')
+                    if match['claude_score'] is not None:
+                        match['shortlist'] = match['claude_score'] >= 70
+            ranked.sort(key=lambda x: x['claude_score'] if x['claude_score'] is not None else x['python_score'], reverse=True)
+
+        return {
+            'candidate_id': candidate_id,
+            'matches': ranked,
+            'total_jobs': len(job_profiles.profiles)
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in process_reverse_matches: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
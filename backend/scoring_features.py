@@ -0,0 +1,112 @@
+import numpy as np
+from typing import Any, Dict, List
+
+from experience import is_timeline_stale, normalize_timeline
+from matcher import EDUCATION_TERMS, SCORE_WEIGHTS
+from skill_index import document_skill_ids
+
+# Row order of the per-role feature arrays
+ROLE_TYPES = ['technical', 'hr', 'finance', 'other']
+ROLE_POSITIONS = {role_type: position for position, role_type in enumerate(ROLE_TYPES)}
+
+def build_candidate_features(candidates: List[Dict]) -> Dict[str, Any]:
+    """
+    Lay out the heuristic scoring inputs of a candidate pool as numpy arrays.
+    Skill IDs are stored in CSR form (indptr/indices) so the layout does not
+    depend on any particular job; role-dependent components get one row per role type.
+    """
+    count = len(candidates)
+    indptr = np.zeros(count + 1, dtype=np.int64)
+    indices = []
+    completeness = np.zeros(count, dtype=np.float64)
+    has_experience = np.zeros(count, dtype=bool)
+    has_education = np.zeros(count, dtype=bool)
+    exp_score = np.zeros((len(ROLE_TYPES), count), dtype=np.float64)
+    current_role = np.zeros((len(ROLE_TYPES), count), dtype=bool)
+    edu_relevant = np.zeros((len(ROLE_TYPES), count), dtype=bool)
+
+    for row, candidate in enumerate(candidates):
+        info = candidate.get('extracted_info') or {}
+        skills = info.get('skills')
+        # Non-dict entries are dropped exactly as ScoringCandidate drops them
+        experience = [exp for exp in info.get('experience') or [] if isinstance(exp, dict)]
+        education = [edu for edu in info.get('education') or [] if isinstance(edu, dict)]
+
+        ids = sorted(document_skill_ids(info)) if skills else []
+        indices.extend(ids)
+        indptr[row + 1] = indptr[row] + len(ids)
+
+        filled = sum(1 for field in (info.get('name'), experience, education, skills, info.get('summary')) if field)
+        completeness[row] = filled * 20
+
+        if experience:
+            has_experience[row] = True
+            timeline = candidate.get('experience_timeline')
+            if is_timeline_stale(timeline):
+                timeline = normalize_timeline(experience)
+            if timeline.get('total_years', 0) > 0:
+                for role_type, years in timeline.get('relevant_years', {}).items():
+                    exp_score[ROLE_POSITIONS[role_type], row] = min(100, (years / 5) * 100)
+            for role_type, current in timeline.get('current_role', {}).items():
+                current_role[ROLE_POSITIONS[role_type], row] = current
+
+        if education:
+            has_education[row] = True
+            degrees = [(edu.get('degree') or '').lower() for edu in education]
+            for role_type, terms in EDUCATION_TERMS.items():
+                edu_relevant[ROLE_POSITIONS[role_type], row] = any(term in degree for degree in degrees for term in terms)
+
+    return {
+        'indptr': indptr,
+        'indices': np.array(indices, dtype=np.int64),
+        'completeness': completeness,
+        'has_experience': has_experience,
+        'has_education': has_education,
+        'exp_score': exp_score,
+        'current_role': current_role,
+        'edu_relevant': edu_relevant,
+    }
+
+def score_matrix(features: Dict[str, Any], profiles: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Compute the jobs x candidates heuristic score matrix in one vectorized pass.
+    Entries equal calculate_python_score for every pair before its final rounding.
+    """
+    weights = SCORE_WEIGHTS
+    indptr, indices = features['indptr'], features['indices']
+    count = len(indptr) - 1
+    scores = np.zeros((len(profiles), count), dtype=np.float64)
+    if not profiles or not count:
+        return scores
+
+    # Skills: project candidate skill IDs onto the jobs' skill vocabulary and multiply
+    vocabulary = np.array(sorted(set().union(*(profile['job_skills'] for profile in profiles))), dtype=np.int64)
+    if len(vocabulary) and len(indices):
+        rows = np.repeat(np.arange(count), np.diff(indptr))
+        columns = np.searchsorted(vocabulary, indices).clip(max=len(vocabulary) - 1)
+        known = vocabulary[columns] == indices
+        candidate_skills = np.zeros((count, len(vocabulary)), dtype=np.float32)
+        candidate_skills[rows[known], columns[known]] = 1
+        job_skills = np.zeros((len(profiles), len(vocabulary)), dtype=np.float32)
+        job_sizes = np.zeros(len(profiles), dtype=np.float64)
+        for position, profile in enumerate(profiles):
+            if profile['match_skills']:
+                job_skills[position, np.searchsorted(vocabulary, sorted(profile['match_skills']))] = 1
+            job_sizes[position] = len(profile['job_skills'])
+        hits = (job_skills @ candidate_skills.T).astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores += np.where(job_sizes[:, None] > 0, hits / job_sizes[:, None], 0) * 100 * weights['skills']
+
+    # Experience, current role and education depend on each job's role type
+    role_rows = np.array([ROLE_POSITIONS[profile['role_type']] for profile in profiles])
+    requirements = np.array([profile['has_requirements'] for profile in profiles])[:, None]
+    with_experience = requirements & features['has_experience'][None, :]
+    scores += np.where(with_experience, features['exp_score'][role_rows], 0) * weights['experience']
+    scores += np.where(with_experience & features['current_role'][role_rows], 100 * weights['current_role'], 0)
+    with_education = requirements & features['has_education'][None, :]
+    scores += np.where(with_education & features['edu_relevant'][role_rows], 100 * weights['education'], 0)
+
+    # Completeness
+    scores += features['completeness'][None, :] * weights['completeness']
+
+    return scores
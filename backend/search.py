@@ -0,0 +1,97 @@
+import os
+import re
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from cache import TTLCache
+from database import EXPERIENCE_BUCKETS, PARSE_SCORE_BUCKETS
+from skill_taxonomy import skill_ids, taxonomy
+from storage import get_storage
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Facet counts are cached per filter set for this many seconds
+FACET_CACHE_TTL = float(os.getenv("FACET_CACHE_TTL", "60"))
+FACET_CACHE_SIZE = int(os.getenv("FACET_CACHE_SIZE", "256"))
+
+LOCATION_SEPARATOR_RE = re.compile(r"[\s,;/|]+")
+
+facet_cache = TTLCache(FACET_CACHE_SIZE, FACET_CACHE_TTL)
+
+def normalize_location(location: Optional[str]) -> Optional[str]:
+    """Normalized form of a free-text location, as stored in location_key."""
+    if not isinstance(location, str):
+        return None
+    key = LOCATION_SEPARATOR_RE.sub(" ", location.lower()).strip(" .-")
+    return key or None
+
+def search_query(
+    skills: Optional[List[str]] = None,
+    location: Optional[str] = None,
+    min_parse_score: Optional[float] = None,
+    max_parse_score: Optional[float] = None,
+    min_years: Optional[float] = None,
+    max_years: Optional[float] = None,
+    status: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    MongoDB filter for a candidate search. Skills are matched on their canonical
+    IDs (every skill must be present) and location on its normalized key.
+    """
+    query: Dict[str, Any] = {}
+    ids = skill_ids(skills)
+    if ids:
+        query["extracted_info.skill_ids"] = {"$all": ids}
+    location_key = normalize_location(location)
+    if location_key:
+        query["location_key"] = location_key
+    if status:
+        query["status"] = status
+    for field, low, high in [
+        ("parse_score", min_parse_score, max_parse_score),
+        ("experience_timeline.total_years", min_years, max_years),
+    ]:
+        bounds = {}
+        if low is not None:
+            bounds["$gte"] = low
+        if high is not None:
+            bounds["$lte"] = high
+        if bounds:
+            query[field] = bounds
+    return query
+
+async def search_candidates(query: Dict[str, Any], limit: int, cursor: Optional[str] = None, sort: str = "created_at") -> tuple:
+    """One page of candidates matching a search query. Returns the documents and the next cursor."""
+    return await get_storage().list_page("candidates", limit, cursor, sort, query=query)
+
+def _buckets(rows: List[Dict], boundaries: List[float]) -> List[Dict]:
+    upper = dict(zip(boundaries, boundaries[1:]))
+    return [
+        {"min": row["_id"], "max": upper.get(row["_id"]), "count": row["count"]}
+        for row in rows
+    ]
+
+async def candidate_facets(query: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Facet counts (status, top skills and locations, parse score and experience
+    buckets) for the candidates matching a search query, computed by the storage
+    engine in one pass and cached for FACET_CACHE_TTL seconds.
+    """
+    key = json.dumps(query, sort_keys=True, default=str)
+    facets = facet_cache.get(key)
+    if facets is not None:
+        return facets
+
+    result = await get_storage().candidate_facet_rows(query)
+    facets = {
+        "total": result["total"][0]["count"] if result.get("total") else 0,
+        "status": [{"value": row["_id"], "count": row["count"]} for row in result.get("status", [])],
+        "skills": [{"value": taxonomy.name(row["_id"]), "count": row["count"]} for row in result.get("skills", [])],
+        "locations": [{"value": row["_id"], "count": row["count"]} for row in result.get("locations", [])],
+        "parse_score": _buckets(result.get("parse_score", []), PARSE_SCORE_BUCKETS),
+        "experience_years": _buckets(result.get("experience_years", []), EXPERIENCE_BUCKETS),
+    }
+    facet_cache.set(key, facets)
+    return facets
@@ -0,0 +1,127 @@
+import os
+import heapq
+import pickle
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from scoring_features import build_candidate_features, score_matrix
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Worker processes used for sharded scoring
+MATCH_WORKERS = int(os.getenv("MATCH_WORKERS", str(os.cpu_count() or 1)))
+
+# Pools smaller than this are scored in-process; the fan-out costs more than it saves
+MIN_SHARD_SIZE = int(os.getenv("MIN_SHARD_SIZE", "5000"))
+
+# Profile fields score_matrix reads; the compiled JobInfo stays in the parent
+PROFILE_FIELDS = ('role_type', 'job_skills', 'match_skills', 'has_requirements')
+
+# Workers are started from a clean server process rather than forked from the
+# threaded event loop process (spawn where forkserver is unavailable, e.g. Windows)
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+def get_executor() -> ProcessPoolExecutor:
+    """Process pool shared by all sharded scoring runs, started on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=MATCH_WORKERS, mp_context=multiprocessing.get_context(START_METHOD))
+    return _executor
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+class SharedShard:
+    """
+    One shard of the candidate pool, pickled once into a named shared-memory block.
+    The worker attaches to the block by name and builds the shard's features
+    itself, so the per-candidate feature build runs in parallel across workers.
+    """
+
+    def __init__(self, candidates: List[Dict]):
+        payload = pickle.dumps(candidates, protocol=pickle.HIGHEST_PROTOCOL)
+        self.size = len(payload)
+        self.block = shared_memory.SharedMemory(create=True, size=max(self.size, 1))
+        self.block.buf[:self.size] = payload
+        self.name = self.block.name
+
+    def close(self):
+        self.block.close()
+        self.block.unlink()
+
+def _top_pairs(scores: np.ndarray, offset: int, k: int) -> List[List[Tuple[float, int]]]:
+    """Unordered top k (score, candidate row) pairs for each job row of a score matrix."""
+    partials = []
+    k = min(k, scores.shape[1])
+    for row in scores:
+        top = np.argpartition(-row, k - 1)[:k]
+        partials.append([(float(row[i]), offset + int(i)) for i in top])
+    return partials
+
+def _score_shard(block_name: str, size: int, offset: int, profiles: List[Dict[str, Any]], k: int) -> List[List[Tuple[float, int]]]:
+    """
+    Worker task: build the features of one shared shard and score it against every job.
+    Returns the shard's top k (score, candidate row) pairs per job.
+    """
+    block = shared_memory.SharedMemory(name=block_name)
+    try:
+        view = block.buf[:size]
+        try:
+            candidates = pickle.loads(view)
+        finally:
+            view.release()
+    finally:
+        block.close()
+    return _top_pairs(score_matrix(build_candidate_features(candidates), profiles), offset, k)
+
+async def score_top_k_sharded(candidates: List[Dict], profiles: List[Dict[str, Any]], k: int) -> List[List[Tuple[float, int]]]:
+    """
+    Build features and score the pool against every job across the process pool,
+    one shard per task, and merge the partial top k lists.
+    Returns (score, candidate row) pairs per job, best first.
+    """
+    count = len(candidates)
+    if count == 0 or k <= 0:
+        return [[] for _ in profiles]
+
+    light_profiles = [{field: profile[field] for field in PROFILE_FIELDS} for profile in profiles]
+    shard_count = max(1, min(MATCH_WORKERS, count // MIN_SHARD_SIZE))
+    bounds = np.linspace(0, count, shard_count + 1, dtype=np.int64)
+
+    if shard_count == 1:
+        shards = [await asyncio.to_thread(lambda: _top_pairs(score_matrix(build_candidate_features(candidates), light_profiles), 0, k))]
+    else:
+        loop = asyncio.get_running_loop()
+        executor = get_executor()
+        shared = []
+        try:
+            tasks = []
+            for start, end in zip(bounds[:-1], bounds[1:]):
+                # Each shard is submitted as soon as it is pickled, so workers start
+                # building while the next shard is still being written
+                shard = await asyncio.to_thread(SharedShard, candidates[start:end])
+                shared.append(shard)
+                tasks.append(loop.run_in_executor(executor, _score_shard, shard.name, shard.size, int(start), light_profiles, k))
+            shards = await asyncio.gather(*tasks)
+        finally:
+            for shard in shared:
+                shard.close()
+    logger.info(f"Scored {count} candidates against {len(profiles)} jobs in {shard_count} shards")
+
+    # Merge shard partials per job
+    return [
+        heapq.nlargest(k, (pair for shard in shards for pair in shard[job_position]), key=lambda pair: (pair[0], -pair[1]))
+        for job_position in range(len(profiles))
+    ]
@@ -0,0 +1,65 @@
+import logging
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+
+from skill_taxonomy import taxonomy
+from storage import get_storage
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def document_skill_ids(extracted_info: Dict) -> Iterable[int]:
+    """Canonical skill IDs of a job or candidate, computed from its skills if not stored."""
+    extracted_info = extracted_info or {}
+    if extracted_info.get("skill_ids") is not None:
+        return extracted_info["skill_ids"]
+    return taxonomy.skill_ids(extracted_info.get("skills"))
+
+class SkillIndex:
+    """
+    In-memory inverted index from canonical skill ID to candidate IDs.
+    Built once at startup and kept current as candidates are uploaded and deleted.
+    """
+
+    def __init__(self):
+        self.postings: Dict[int, Set[str]] = {}
+        self.candidate_skills: Dict[str, Set[int]] = {}
+        self.ready = False
+
+    async def build(self):
+        """Rebuild the index from the candidates collection."""
+        self.postings = {}
+        self.candidate_skills = {}
+        documents = get_storage().iter_documents('candidates', {"extracted_info.skills": 1, "extracted_info.skill_ids": 1})
+        async for candidate in documents:
+            self.add(str(candidate["_id"]), document_skill_ids(candidate.get("extracted_info")))
+        self.ready = True
+        logger.info(f"Skill index built: {len(self.candidate_skills)} candidates, {len(self.postings)} skills")
+
+    def add(self, candidate_id: str, skill_ids: Iterable[int]):
+        """Index (or re-index) a candidate's canonical skill IDs."""
+        self.remove(candidate_id)
+        keys = set(skill_ids or [])
+        self.candidate_skills[candidate_id] = keys
+        for key in keys:
+            self.postings.setdefault(key, set()).add(candidate_id)
+
+    def remove(self, candidate_id: str):
+        """Drop a candidate from the index."""
+        for key in self.candidate_skills.pop(candidate_id, ()):
+            ids = self.postings.get(key)
+            if ids is not None:
+                ids.discard(candidate_id)
+                if not ids:
+                    del self.postings[key]
+
+    def lookup(self, skill_ids: Iterable[int], limit: Optional[int] = None) -> List[str]:
+        """
+        Return IDs of candidates sharing at least one skill, most shared skills first.
+        """
+        overlap = Counter()
+        for key in set(skill_ids or []):
+            overlap.update(self.postings.get(key, ()))
+        return [candidate_id for candidate_id, _ in overlap.most_common(limit)]
+
+skill_index = SkillIndex()
@@ -0,0 +1,86 @@
+import os
+import re
+import json
+import logging
+import zlib
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+TAXONOMY_PATH = os.getenv(
+    "SKILL_TAXONOMY_PATH",
+    os.path.join(os.path.dirname(__file__), "skill_taxonomy.json")
+)
+
+# Skills outside the taxonomy get a stable ID derived from their normalized text,
+# offset so they never collide with taxonomy IDs
+UNKNOWN_SKILL_ID_BASE = 1 << 31
+
+PARENTHETICAL_RE = re.compile(r'\([^)]*\)')
+SEPARATOR_RE = re.compile(r'[\s_\-]+')
+STRIP_CHARS = " .,;:'\"*"
+VERSION_SUFFIX_RE = re.compile(r'\s*v?\d+(?:\.(?:\d+|x))*$')
+
+def normalize_skill(skill: str) -> str:
+    """
+    Token-level normalization of a skill string:
+    lowercase, drop parentheticals, unify separators and trim punctuation.
+    """
+    text = PARENTHETICAL_RE.sub(" ", str(skill).lower())
+    return SEPARATOR_RE.sub(" ", text).strip(STRIP_CHARS)
+
+class SkillTaxonomy:
+    """
+    Skill taxonomy compiled once into an alias -> canonical ID hash map.
+    """
+
+    def __init__(self, entries: List[Dict]):
+        self.names: Dict[int, str] = {}
+        self.aliases: Dict[str, int] = {}
+        for skill_id, entry in enumerate(entries, start=1):
+            self.names[skill_id] = entry["name"]
+            for alias in [entry["name"], *entry.get("aliases", [])]:
+                key = normalize_skill(alias)
+                if key in self.aliases and self.aliases[key] != skill_id:
+                    logger.warning(f"Duplicate skill alias '{alias}' in taxonomy")
+                    continue
+                self.aliases[key] = skill_id
+
+    @classmethod
+    def load(cls, path: str = TAXONOMY_PATH) -> "SkillTaxonomy":
+        try:
+            with open(path, encoding="utf-8") as f:
+                return cls(json.load(f))
+        except Exception as e:
+            logger.error(f"Failed to load skill taxonomy from {path}: {str(e)}")
+            return cls([])
+
+    def skill_id(self, skill: str) -> Optional[int]:
+        """Canonical ID for a skill string, or None for an empty one."""
+        key = normalize_skill(skill)
+        if not key:
+            return None
+        skill_id = self.aliases.get(key)
+        if skill_id is None:
+            # "Python 3.10", "python3" -> "python"
+            unversioned = VERSION_SUFFIX_RE.sub("", key)
+            if unversioned and unversioned != key:
+                skill_id = self.aliases.get(unversioned)
+        if skill_id is None:
+            skill_id = UNKNOWN_SKILL_ID_BASE | (zlib.crc32(key.encode()) & (UNKNOWN_SKILL_ID_BASE - 1))
+        return skill_id
+
+    def skill_ids(self, skills: Optional[Iterable[str]]) -> FrozenSet[int]:
+        """Canonical ID set for a list of skill strings."""
+        ids = (self.skill_id(skill) for skill in skills or [] if skill)
+        return frozenset(skill_id for skill_id in ids if skill_id is not None)
+
+    def name(self, skill_id: int) -> Optional[str]:
+        return self.names.get(skill_id)
+
+taxonomy = SkillTaxonomy.load()
+
+def skill_ids(skills: Optional[Iterable[str]]) -> List[int]:
+    """Sorted canonical skill IDs, as stored on job and candidate documents."""
+    return sorted(taxonomy.skill_ids(skills))
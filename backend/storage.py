@@ -0,0 +1,538 @@
+import os
+import abc
+import copy
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+import database
+from cache import document_cache
+from database import EXPERIENCE_BUCKETS, FACET_LIMIT, LIST_EXCLUDED_FIELDS, MATCH_OWNER_FIELDS, PARSE_SCORE_BUCKETS, SCORING_VERSION, SHORTLIST_THRESHOLD, db, decode_cursor, encode_cursor, facet_pipeline, report_pipeline
+from skill_taxonomy import UNKNOWN_SKILL_ID_BASE
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Storage engine used by the matching pipeline: "mongo" or "memory"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo")
+
+class Storage(abc.ABC):
+    """
+    Repository interface over jobs, candidates, matches, reports and logs used by
+    the application. Documents are plain dicts as stored in MongoDB; IDs are
+    passed and returned as strings.
+    """
+
+    # Whether other processes write to the same store, so their changes have to be watched
+    shared = True
+
+    async def init(self):
+        """Prepare the store at startup."""
+
+    async def close(self):
+        """Release the store at shutdown."""
+
+    # Jobs and candidates
+
+    @abc.abstractmethod
+    async def find_documents(self, collection: str, document_ids: List[str], projection: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """Documents of a collection with the given IDs; missing IDs are skipped."""
+
+    @abc.abstractmethod
+    async def find_document(self, collection: str, document_id: str, projection: Optional[Dict[str, Any]] = None) -> Optional[Dict]:
+        """The document of a collection with the given _id or file_id."""
+
+    @abc.abstractmethod
+    def iter_documents(self, collection: str, projection: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict]:
+        """Every document of a collection."""
+
+    @abc.abstractmethod
+    async def list_page(self, collection: str, limit: int, cursor: Optional[str] = None, sort: str = "_id", include_text: bool = False, query: Optional[Dict[str, Any]] = None) -> tuple:
+        """
+        One page of a collection (optionally filtered by query), newest first, as
+        database.list_page. Raises ValueError on a malformed cursor.
+        """
+
+    @abc.abstractmethod
+    async def insert_document(self, collection: str, document: Dict) -> str:
+        pass
+
+    @abc.abstractmethod
+    async def set_fields(self, collection: str, updates: Dict[str, Dict[str, Any]]):
+        """Set top-level fields on several documents, given as {document_id: fields}."""
+
+    @abc.abstractmethod
+    async def delete_documents(self, collection: str, query: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Delete the jobs or candidates matching query with their matches, texts and
+        (for jobs) reports. Returns the deleted counts and IDs, as database.delete_documents.
+        """
+
+    @abc.abstractmethod
+    async def save_text(self, text: str, owner: str, owner_id: ObjectId) -> ObjectId:
+        pass
+
+    @abc.abstractmethod
+    async def get_texts(self, owner: str, owner_ids: List[str]) -> Dict[str, str]:
+        """Texts of the given documents of an owner collection, by document ID."""
+
+    @abc.abstractmethod
+    def iter_texts(self, owner: str) -> AsyncIterator[tuple]:
+        """(document ID, text) for every document of an owner collection."""
+
+    @abc.abstractmethod
+    async def candidate_facet_rows(self, query: Dict[str, Any]) -> Dict[str, List[Dict]]:
+        """Facet counts of the candidates matching a search query, shaped as database.facet_pipeline returns them."""
+
+    # Matches
+
+    @abc.abstractmethod
+    async def upsert_matches(self, matches: List[Dict], unset: Optional[List[str]] = None) -> int:
+        """
+        Upsert match results keyed on (job_id, candidate_id, scoring_version), as
+        database.upsert_matches. Returns the number written; raises if the write fails.
+        """
+
+    async def save_matches(self, job_id: str, matches: List[Dict], unset: Optional[List[str]] = None) -> int:
+        """Upsert match results for a job, keyed on (job_id, candidate_id, scoring_version)."""
+        return await self.upsert_matches([{**match, "job_id": job_id} for match in matches], unset)
+
+    @abc.abstractmethod
+    async def get_stored_matches(self, job_id: str, candidate_ids: List[str]) -> Dict[str, Dict]:
+        pass
+
+    @abc.abstractmethod
+    async def get_matches(self, job_id: str, shortlist: Optional[bool] = None, limit: int = 0, skip: int = 0) -> List[Dict]:
+        pass
+
+    @abc.abstractmethod
+    async def count_matches(self, job_id: str, shortlist: Optional[bool] = None) -> int:
+        pass
+
+    @abc.abstractmethod
+    async def get_unassessed_matches(self, job_id: str, min_python_score: float, limit: int) -> List[Dict]:
+        """Best matches of a job by Python score that have no Claude analysis yet."""
+
+    # Reports
+
+    @abc.abstractmethod
+    async def report_rows(self, job_id: str, candidate_ids: Optional[List[str]] = None, shortlist_only: bool = False) -> List[Dict]:
+        """One report row per stored match of a job, joined to its candidate, best final score first."""
+
+    @abc.abstractmethod
+    async def save_report(self, report: Dict) -> Optional[str]:
+        """Write a report, replacing any report with the same _id. Returns its ID."""
+
+    @abc.abstractmethod
+    async def get_report(self, report_id: str) -> Optional[Dict]:
+        pass
+
+    @abc.abstractmethod
+    async def get_reports(self, job_id: str) -> List[Dict]:
+        """Reports of a job, newest first."""
+
+    # Logs
+
+    @abc.abstractmethod
+    async def insert_logs(self, entries: List[Dict]):
+        pass
+
+def _invalidate(collection: str, document_ids: Optional[List[str]]):
+    """Drop written documents from the document cache; None drops the whole collection."""
+    if document_ids is None:
+        document_cache.clear(collection)
+        return
+    for document_id in document_ids:
+        document_cache.invalidate(collection, document_id)
+
+class MongoStorage(Storage):
+    """Storage backed by the Motor database."""
+
+    async def init(self):
+        await database.init_db()
+
+    async def close(self):
+        await database.close_db()
+
+    async def find_documents(self, collection, document_ids, projection=None):
+        object_ids = [ObjectId(document_id) for document_id in document_ids if ObjectId.is_valid(document_id)]
+        if not object_ids:
+            return []
+        return await db[collection].find({"_id": {"$in": object_ids}}, projection).to_list(length=None)
+
+    async def find_document(self, collection, document_id, projection=None):
+        query = {"file_id": document_id}
+        if ObjectId.is_valid(document_id):
+            query = {"$or": [{"_id": ObjectId(document_id)}, query]}
+        return await db[collection].find_one(query, projection)
+
+    async def iter_documents(self, collection, projection=None):
+        async for document in db[collection].find({}, projection):
+            yield document
+
+    async def list_page(self, collection, limit, cursor=None, sort="_id", include_text=False, query=None):
+        return await database.list_page(collection, limit, cursor, sort, include_text, query)
+
+    async def insert_document(self, collection, document):
+        result = await db[collection].insert_one(document)
+        return str(result.inserted_id)
+
+    async def set_fields(self, collection, updates):
+        if updates:
+            await db[collection].bulk_write(
+                [UpdateOne({"_id": ObjectId(document_id)}, {"$set": fields}) for document_id, fields in updates.items()],
+                ordered=False
+            )
+            _invalidate(collection, list(updates))
+
+    async def delete_documents(self, collection, query):
+        counts = await database.delete_documents(collection, query)
+        _invalidate(collection, counts["ids"])
+        return counts
+
+    async def save_text(self, text, owner, owner_id):
+        return await database.save_text(text, owner, owner_id)
+
+    async def get_texts(self, owner, owner_ids):
+        return await database.get_texts(owner, owner_ids)
+
+    async def iter_texts(self, owner):
+        async for owner_id, text in database.iter_texts(owner):
+            yield owner_id, text
+
+    async def candidate_facet_rows(self, query):
+        return (await db.candidates.aggregate(facet_pipeline(query)).to_list(length=None) or [{}])[0]
+
+    async def upsert_matches(self, matches, unset=None):
+        return await database.upsert_matches(matches, unset)
+
+    async def get_stored_matches(self, job_id, candidate_ids):
+        return await database.get_stored_matches(job_id, candidate_ids)
+
+    async def get_matches(self, job_id, shortlist=None, limit=0, skip=0):
+        return await database.get_matches(job_id, shortlist, limit, skip)
+
+    async def count_matches(self, job_id, shortlist=None):
+        return await database.count_matches(job_id, shortlist)
+
+    async def get_unassessed_matches(self, job_id, min_python_score, limit):
+        cursor = db.matches.find(
+            {"job_id": job_id, "scoring_version": SCORING_VERSION, "claude_analysis": None, "python_score": {"$gte": min_python_score}},
+            {"candidate_id": 1, "python_score": 1}
+        ).sort("python_score", -1).limit(limit)
+        return await cursor.to_list(length=None)
+
+    async def report_rows(self, job_id, candidate_ids=None, shortlist_only=False):
+        return await db.matches.aggregate(report_pipeline(job_id, candidate_ids, shortlist_only)).to_list(length=None)
+
+    async def save_report(self, report):
+        return await database.save_report(report)
+
+    async def get_report(self, report_id):
+        return await database.get_report(report_id)
+
+    async def get_reports(self, job_id):
+        return await database.get_reports(job_id)
+
+    async def insert_logs(self, entries):
+        if entries:
+            await db.logs.insert_many(entries, ordered=False)
+
+def _project(document: Dict, projection: Optional[Dict[str, Any]]) -> Dict:
+    """Copy of a document with a MongoDB-style inclusion or exclusion projection applied."""
+    if not projection:
+        return copy.deepcopy(document)
+    if not any(projection.values()):
+        projected = copy.deepcopy(document)
+        for path in projection:
+            parent = projected
+            *parents, leaf = path.split(".")
+            for key in parents:
+                parent = parent.get(key) if isinstance(parent, dict) else None
+            if isinstance(parent, dict):
+                parent.pop(leaf, None)
+        return projected
+    projected = {"_id": document["_id"]}
+    for path in projection:
+        source, target = document, projected
+        *parents, leaf = path.split(".")
+        for key in parents:
+            source = source.get(key) if isinstance(source, dict) else None
+            if not isinstance(source, dict):
+                break
+            target = target.setdefault(key, {})
+        else:
+            if leaf in source:
+                target[leaf] = copy.deepcopy(source[leaf])
+    return projected
+
+def _values(document: Dict, path: str) -> List[Any]:
+    """Values at a dotted path, with arrays expanded as MongoDB matches them."""
+    value = document
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return []
+        value = value[key]
+    return list(value) if isinstance(value, list) else [value]
+
+def _bracket(value: Any) -> Optional[type]:
+    if isinstance(value, bool) or value is None:
+        return None
+    return float if isinstance(value, (int, float)) else type(value)
+
+def _compare(values: List[Any], operator: str, operand: Any) -> bool:
+    if operator == "$all":
+        return all(item in values for item in operand)
+    if operator == "$in":
+        return any(item in values for item in operand) or (not values and None in operand)
+    if operator == "$ne":
+        return operand not in values and not (operand is None and not values)
+    if operator == "$exists":
+        return bool(values) == bool(operand)
+    compare = {"$gt": lambda a, b: a > b, "$gte": lambda a, b: a >= b, "$lt": lambda a, b: a < b, "$lte": lambda a, b: a <= b}[operator]
+    # Only values of the operand's type bracket compare (numbers with numbers), as in MongoDB
+    return any(_bracket(value) is not None and _bracket(value) == _bracket(operand) and compare(value, operand) for value in values)
+
+def _matches_query(document: Dict, query: Dict[str, Any]) -> bool:
+    """Whether a document matches a MongoDB filter (the operators the search and list queries use)."""
+    for field, condition in query.items():
+        if field == "$and":
+            if not all(_matches_query(document, clause) for clause in condition):
+                return False
+        elif field == "$or":
+            if not any(_matches_query(document, clause) for clause in condition):
+                return False
+        else:
+            values = _values(document, field)
+            if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+                if not all(_compare(values, operator, operand) for operator, operand in condition.items()):
+                    return False
+            elif condition not in values and not (condition is None and not values):
+                return False
+    return True
+
+def _count_rows(values) -> List[Dict]:
+    """{_id, count} rows for a facet, most frequent first."""
+    return [{"_id": value, "count": count} for value, count in sorted(Counter(values).items(), key=lambda item: (-item[1], item[0] is None, item[0] if item[0] is not None else 0))]
+
+def _bucket_rows(values, boundaries: List[float]) -> List[Dict]:
+    """{_id, count} rows per non-empty bucket, as $bucket returns them."""
+    counts = Counter()
+    for value in values:
+        lower = next((low for low, high in zip(boundaries, boundaries[1:]) if isinstance(value, (int, float)) and low <= value < high), "unknown")
+        counts[lower] += 1
+    return [{"_id": low, "count": counts[low]} for low in boundaries + ["unknown"] if counts[low]]
+
+class MemoryStorage(Storage):
+    """
+    Storage held in process memory, for benchmarks and load tests that measure
+    the pipeline without a database. Not shared between processes.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self.collections: Dict[str, Dict[str, Dict]] = {'jobs': {}, 'candidates': {}, 'texts': {}, 'reports': {}}
+        self.matches: Dict[tuple, Dict] = {}
+        self.logs: List[Dict] = []
+
+    async def find_documents(self, collection, document_ids, projection=None):
+        documents = self.collections[collection]
+        return [_project(documents[str(document_id)], projection) for document_id in document_ids if str(document_id) in documents]
+
+    async def find_document(self, collection, document_id, projection=None):
+        documents = self.collections[collection]
+        document = documents.get(str(document_id)) or next(
+            (document for document in documents.values() if document.get("file_id") == document_id), None
+        )
+        return _project(document, projection) if document is not None else None
+
+    async def iter_documents(self, collection, projection=None):
+        for document in list(self.collections[collection].values()):
+            yield _project(document, projection)
+
+    async def list_page(self, collection, limit, cursor=None, sort="_id", include_text=False, query=None):
+        query = query or {}
+        if cursor:
+            query = {"$and": [query, decode_cursor(cursor, sort)]}
+        documents = [document for document in self.collections[collection].values() if _matches_query(document, query)]
+        # Newest first, documents without the sort field last
+        documents.sort(key=lambda document: document["_id"], reverse=True)
+        if sort != "_id":
+            documents.sort(key=lambda document: (document.get(sort) is not None, document.get(sort) or 0), reverse=True)
+        next_cursor = encode_cursor(documents[limit - 1], sort) if len(documents) > limit else None
+        projection = None if include_text else {field: 0 for field in LIST_EXCLUDED_FIELDS}
+        page = [_project(document, projection) for document in documents[:limit]]
+        if include_text:
+            texts = await self.get_texts(collection, [str(document["_id"]) for document in page])
+            for document in page:
+                if str(document["_id"]) in texts:
+                    document["text"] = texts[str(document["_id"])]
+        return page, next_cursor
+
+    async def insert_document(self, collection, document):
+        document.setdefault("_id", ObjectId())
+        self.collections[collection][str(document["_id"])] = copy.deepcopy(document)
+        return str(document["_id"])
+
+    async def set_fields(self, collection, updates):
+        for document_id, fields in updates.items():
+            document = self.collections[collection].get(str(document_id))
+            if document is not None:
+                document.update(copy.deepcopy(fields))
+        _invalidate(collection, list(updates))
+
+    async def delete_documents(self, collection, query):
+        documents = self.collections[collection]
+        ids = [document_id for document_id, document in documents.items() if _matches_query(document, query)]
+        for document_id in ids:
+            del documents[document_id]
+        wanted = set(ids)
+        owner_field = MATCH_OWNER_FIELDS[collection]
+        matches = [key for key, match in self.matches.items() if match[owner_field] in wanted]
+        for key in matches:
+            del self.matches[key]
+        reports = [report_id for report_id, report in self.collections['reports'].items() if collection == 'jobs' and str(report.get("job_id")) in wanted]
+        for report_id in reports:
+            del self.collections['reports'][report_id]
+        texts = [text_id for text_id, blob in self.collections['texts'].items() if blob["owner"] == collection and str(blob["owner_id"]) in wanted]
+        for text_id in texts:
+            del self.collections['texts'][text_id]
+        _invalidate(collection, ids if query else None)
+        return {
+            "deleted": len(ids),
+            "matches": len(matches),
+            "reports": len(reports),
+            "texts": len(texts),
+            "ids": ids if query else None
+        }
+
+    async def save_text(self, text, owner, owner_id):
+        return ObjectId(await self.insert_document('texts', {"owner": owner, "owner_id": owner_id, "text": text, "size": len(text)}))
+
+    async def get_texts(self, owner, owner_ids):
+        wanted = set(str(owner_id) for owner_id in owner_ids)
+        return {
+            str(blob["owner_id"]): blob["text"]
+            for blob in self.collections['texts'].values()
+            if blob["owner"] == owner and str(blob["owner_id"]) in wanted
+        }
+
+    async def iter_texts(self, owner):
+        for blob in list(self.collections['texts'].values()):
+            if blob["owner"] == owner:
+                yield str(blob["owner_id"]), blob["text"]
+
+    async def candidate_facet_rows(self, query):
+        candidates = [candidate for candidate in self.collections['candidates'].values() if _matches_query(candidate, query)]
+        skill_ids = [skill_id for candidate in candidates for skill_id in _values(candidate, "extracted_info.skill_ids") if skill_id < UNKNOWN_SKILL_ID_BASE]
+        locations = [candidate["location_key"] for candidate in candidates if candidate.get("location_key") is not None]
+        return {
+            "total": [{"count": len(candidates)}] if candidates else [],
+            "status": _count_rows(candidate.get("status") for candidate in candidates),
+            "skills": _count_rows(skill_ids)[:FACET_LIMIT],
+            "locations": _count_rows(locations)[:FACET_LIMIT],
+            "parse_score": _bucket_rows((candidate.get("parse_score") for candidate in candidates), PARSE_SCORE_BUCKETS),
+            "experience_years": _bucket_rows((next(iter(_values(candidate, "experience_timeline.total_years")), None) for candidate in candidates), EXPERIENCE_BUCKETS),
+        }
+
+    async def upsert_matches(self, matches, unset=None):
+        now = datetime.utcnow()
+        for match in matches:
+            key = (match["job_id"], match["candidate_id"], SCORING_VERSION)
+            stored = self.matches.setdefault(key, {"_id": ObjectId()})
+            stored.update(copy.deepcopy(match))
+            stored.update({"scoring_version": SCORING_VERSION, "updated_at": now})
+            for field in unset or []:
+                stored.pop(field, None)
+            stored["final_score"] = stored.get("claude_score") if stored.get("claude_score") is not None else stored.get("python_score")
+            stored["shortlist"] = stored["final_score"] is not None and stored["final_score"] >= SHORTLIST_THRESHOLD
+        return len(matches)
+
+    def _job_matches(self, job_id: str) -> List[Dict]:
+        return [match for (match_job_id, _, version), match in self.matches.items() if match_job_id == job_id and version == SCORING_VERSION]
+
+    async def get_stored_matches(self, job_id, candidate_ids):
+        wanted = set(candidate_ids)
+        return {match["candidate_id"]: copy.deepcopy(match) for match in self._job_matches(job_id) if match["candidate_id"] in wanted}
+
+    async def get_matches(self, job_id, shortlist=None, limit=0, skip=0):
+        matches = [match for match in self._job_matches(job_id) if shortlist is None or match["shortlist"] == shortlist]
+        matches.sort(key=lambda match: (-(match["final_score"] or 0), str(match["_id"])))
+        matches = matches[skip:skip + limit] if limit else matches[skip:]
+        return [{**copy.deepcopy(match), "_id": str(match["_id"])} for match in matches]
+
+    async def count_matches(self, job_id, shortlist=None):
+        return sum(1 for match in self._job_matches(job_id) if shortlist is None or match["shortlist"] == shortlist)
+
+    async def get_unassessed_matches(self, job_id, min_python_score, limit):
+        matches = [
+            match for match in self._job_matches(job_id)
+            if match.get("claude_analysis") is None and (match.get("python_score") or 0) >= min_python_score
+        ]
+        matches.sort(key=lambda match: -match["python_score"])
+        return [{"candidate_id": match["candidate_id"], "python_score": match["python_score"]} for match in matches[:limit]]
+
+    async def report_rows(self, job_id, candidate_ids=None, shortlist_only=False):
+        wanted = set(candidate_ids) if candidate_ids is not None else None
+        rows = []
+        for match in await self.get_matches(job_id, True if shortlist_only else None):
+            analysis = match.get("claude_analysis") or {}
+            if wanted is not None and match["candidate_id"] not in wanted:
+                continue
+            if shortlist_only and not (isinstance(match.get("claude_score"), (int, float)) and analysis.get("strengths") and analysis.get("gaps")):
+                continue
+            candidate = self.collections['candidates'].get(match["candidate_id"])
+            if candidate is None:
+                continue
+            info = candidate.get("extracted_info") or {}
+            latest = (info.get("experience") or [{}])[0]
+            rows.append({
+                "candidate_id": match["candidate_id"],
+                "name": info.get("name") or "Unknown",
+                "email": info.get("email") or "",
+                "phone": info.get("phone") or "",
+                "current_role": latest.get("job_title") or "",
+                "current_company": latest.get("company") or "",
+                "python_score": match.get("python_score") or 0,
+                "claude_score": match.get("claude_score") or 0,
+                "shortlisted": match.get("shortlist", False),
+                "strengths": analysis.get("strengths", []),
+                "gaps": analysis.get("gaps", [])
+            })
+        return rows
+
+    async def save_report(self, report):
+        return await self.insert_document('reports', report)
+
+    async def get_report(self, report_id):
+        report = self.collections['reports'].get(str(report_id))
+        if report is None:
+            return None
+        report = copy.deepcopy(report)
+        report["id"] = str(report.pop("_id"))
+        report["job_id"] = str(report["job_id"])
+        return report
+
+    async def get_reports(self, job_id):
+        reports = [report for report in self.collections['reports'].values() if str(report.get("job_id")) == str(job_id)]
+        reports.sort(key=lambda report: report.get("created_at") or datetime.min, reverse=True)
+        return [await self.get_report(str(report["_id"])) for report in reports]
+
+    async def insert_logs(self, entries):
+        self.logs.extend(copy.deepcopy(entries))
+
+_storage: Storage = MemoryStorage() if STORAGE_BACKEND == "memory" else MongoStorage()
+
+def get_storage() -> Storage:
+    return _storage
+
+def set_storage(storage: Storage):
+    """Swap the storage engine, e.g. for a benchmark run."""
+    global _storage
+    _storage = storage
+    logger.info(f"Storage backend set to {type(storage).__name__}")
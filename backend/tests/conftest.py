@@ -0,0 +1,54 @@
+import os
+import sys
+import random
+from pathlib import Path
+
+import pytest
+
+# Backend modules import each other as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Never reach the Claude API from tests; load_dotenv does not override a set variable
+os.environ["ANTHROPIC_API_KEY"] = ""
+
+SKILLS = ['python', 'java', 'sql', 'aws', 'spark', 'excel', 'hr', 'recruitment', 'talent', 'leadership', 'management', 'docker']
+TITLES = ['Data Engineer', 'HR Manager', 'Chef', 'Software Developer', 'Accountant']
+DURATIONS = ['2015-2020', '2019 - Present', '3 years', 'Jan 2018 - Mar 2021', '']
+DEGREES = ['BSc Computer Science', 'BA Psychology', 'Art', 'MBA']
+
+def make_candidate(rng: random.Random, index: int) -> dict:
+    """A candidate document as stored after parsing, with some fields left empty."""
+    from experience import normalize_timeline
+
+    info = {
+        'name': rng.choice([None, 'Candidate']),
+        'summary': rng.choice([None, 'Summary']),
+        'skills': rng.sample(SKILLS, rng.randint(0, 6)),
+        'experience': [
+            {'job_title': rng.choice(TITLES), 'company': 'Acme', 'duration': rng.choice(DURATIONS)}
+            for _ in range(rng.randint(0, 3))
+        ],
+        'education': [{'degree': rng.choice(DEGREES)} for _ in range(rng.randint(0, 2))],
+    }
+    candidate = {'_id': '%024x' % index, 'extracted_info': info}
+    # Half the pool has a cached timeline, as candidates parsed before timelines existed do not
+    if rng.random() < 0.5:
+        candidate['experience_timeline'] = normalize_timeline(info['experience'])
+    return candidate
+
+@pytest.fixture
+def candidate_pool():
+    rng = random.Random(1)
+    return [make_candidate(rng, index) for index in range(1000)]
+
+@pytest.fixture
+def jobs():
+    from models import JobInfo
+
+    return [
+        JobInfo(title='Data Engineer', skills=['Python', 'SQL', 'AWS', 'Excel'], requirements=['SQL']),
+        JobInfo(title='HR lead', skills=['HR', 'Talent', 'Excel'], requirements=['HR']),
+        JobInfo(title='Chef', skills=['cooking'], requirements=[]),
+        JobInfo(title='Accountant', skills=['Excel', 'Tax'], requirements=['Tax']),
+        JobInfo(title='Nothing'),
+    ]
@@ -0,0 +1,28 @@
+import asyncio
+
+from cache import document_cache
+from loaders import RequestLoaders
+import storage as storage_module
+from storage import MemoryStorage
+
+def test_cached_documents_are_copies():
+    document_cache.clear()
+    document_cache.set('jobs', 'a', None, {'_id': 'a', 'extracted_info': {'skills': ['SQL']}})
+    first = document_cache.get('jobs', 'a', None)
+    first['extracted_info']['skills'].append('Python')
+    assert document_cache.get('jobs', 'a', None) == {'_id': 'a', 'extracted_info': {'skills': ['SQL']}}
+
+def test_local_writes_invalidate(monkeypatch):
+    storage = MemoryStorage()
+    monkeypatch.setattr(storage_module, '_storage', storage)
+
+    async def run():
+        document_cache.clear()
+        job_id = await storage.insert_document('jobs', {'status': 'open'})
+        assert (await RequestLoaders().jobs.load(job_id))['status'] == 'open'
+        await storage.set_fields('jobs', {job_id: {'status': 'closed'}})
+        assert (await RequestLoaders().jobs.load(job_id))['status'] == 'closed'
+        await storage.delete_documents('jobs', {'status': 'closed'})
+        assert await RequestLoaders().jobs.load(job_id) is None
+
+    asyncio.run(run())
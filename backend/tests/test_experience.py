@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+from experience import TIMELINE_MAX_AGE_DAYS, TIMELINE_VERSION, duration_years, is_timeline_stale, merge_intervals, normalize_timeline, parse_interval
+
+REFERENCE = datetime(2024, 6, 15)
+
+def test_parse_interval_formats():
+    assert parse_interval("2015-2020", REFERENCE) == (2015 * 12, 2020 * 12, False)
+    assert parse_interval("March 2003 – January 2005", REFERENCE) == (2003 * 12 + 2, 2005 * 12 + 1, False)
+    assert parse_interval("03/2019 - 05/2021", REFERENCE) == (2019 * 12 + 2, 2021 * 12 + 5, False)
+    assert parse_interval("2 years", REFERENCE) is None
+    assert parse_interval("2020 - 2018", REFERENCE) is None
+
+def test_ongoing_end_dates_run_to_the_reference_month():
+    for duration in ("2022 - Present", "Jan 2022 to current", "2022 – Now"):
+        start, end, ongoing = parse_interval(duration, REFERENCE)
+        assert ongoing
+        assert end == 2024 * 12 + 6
+    assert duration_years("2022 - Present", REFERENCE) == (2024 * 12 + 6 - 2022 * 12) / 12
+
+def test_duration_years_without_a_range():
+    assert duration_years("3 years", REFERENCE) == 3
+    assert duration_years("1 year 6 months", REFERENCE) == 1.5
+    assert duration_years("", REFERENCE) == 0
+
+def test_merge_intervals():
+    assert merge_intervals([(10, 20), (0, 5), (15, 30), (30, 31)]) == [[0, 5], [10, 31]]
+
+def test_overlapping_roles_are_not_double_counted():
+    timeline = normalize_timeline([
+        {"job_title": "Software Engineer", "duration": "2015-2020"},
+        {"job_title": "Freelance Developer", "duration": "2018-2021"},
+        {"job_title": "HR Manager", "duration": "2 years"},
+        "not a role",
+    ], REFERENCE)
+    assert timeline["intervals"] == [[2015 * 12, 2021 * 12]]
+    assert timeline["total_years"] == 8
+    assert timeline["relevant_years"]["technical"] == 6
+    assert timeline["relevant_years"]["hr"] == 2
+    assert not any(timeline["current_role"].values())
+
+def test_current_role():
+    timeline = normalize_timeline([{"job_title": "Data Engineer", "duration": "2020 - Present"}], REFERENCE)
+    assert timeline["current_role"]["technical"]
+    assert not timeline["current_role"]["hr"]
+
+def test_staleness_by_version_and_age():
+    timeline = normalize_timeline([], REFERENCE)
+    assert timeline["version"] == TIMELINE_VERSION
+    assert not is_timeline_stale(timeline, REFERENCE + timedelta(days=TIMELINE_MAX_AGE_DAYS))
+    assert is_timeline_stale(timeline, REFERENCE + timedelta(days=TIMELINE_MAX_AGE_DAYS + 1))
+    assert is_timeline_stale({**timeline, "version": TIMELINE_VERSION - 1}, REFERENCE)
+    assert is_timeline_stale({**timeline, "reference_date": "2024-06-15"}, REFERENCE)
+    assert is_timeline_stale(None)
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+import storage
+from logger import LOG_HIGH_WATER, LOG_SAMPLE_RATE, LogSink
+
+def entry(level: str, message: str = "message") -> dict:
+    return {'level': level, 'message': message, 'timestamp': None, 'metadata': None}
+
+@pytest.fixture
+def memory(monkeypatch):
+    memory = storage.MemoryStorage()
+    monkeypatch.setattr(storage, "_storage", memory)
+    return memory
+
+def test_low_priority_entries_are_sampled_then_dropped():
+    sink = LogSink(maxsize=100, batch_size=1000)
+    for index in range(1000):
+        sink.enqueue(entry('INFO', str(index)))
+    # Below the high-water mark everything is kept, then 1 in LOG_SAMPLE_RATE until the queue is full
+    high_water = int(LOG_HIGH_WATER * 100)
+    assert [item['message'] for item in sink.queue][:high_water] == [str(index) for index in range(high_water)]
+    assert [item['message'] for item in sink.queue][high_water + 1] == str(high_water + 2 * LOG_SAMPLE_RATE - 1)
+    assert len(sink.queue) == 100
+    assert sink.dropped == {'INFO': 1000 - 100}
+
+def test_errors_displace_the_oldest_entries_when_full():
+    sink = LogSink(maxsize=10, batch_size=1000)
+    for index in range(10):
+        sink.enqueue(entry('WARNING', str(index)))
+    for index in range(3):
+        sink.enqueue(entry('ERROR', f"error {index}"))
+    assert len(sink.queue) == 10
+    assert [item['message'] for item in sink.queue][:2] == ['3', '4']
+    assert [item['level'] for item in sink.queue][-3:] == ['ERROR'] * 3
+    assert sink.dropped == {'WARNING': 3}
+
+def test_drop_summary_is_written_with_the_next_batch(memory):
+    sink = LogSink(maxsize=5, batch_size=2)
+    for index in range(8):
+        sink.enqueue(entry('ERROR', str(index)))
+    asyncio.run(sink.flush())
+    assert [log['message'] for log in memory.logs if log['level'] == 'ERROR'] == ['3', '4', '5', '6', '7']
+    summaries = [log for log in memory.logs if log['level'] == 'WARNING']
+    assert len(summaries) == 1
+    assert summaries[0]['metadata'] == {'dropped': {'ERROR': 3}}
+    assert sink.stats() == {'queued': 0, 'dropped': 0}
+
+def test_stop_flushes_everything_queued(memory):
+    async def scenario():
+        sink = LogSink(maxsize=1000, batch_size=50, flush_seconds=60)
+        sink.start()
+        for index in range(120):
+            sink.enqueue(entry('INFO', str(index)))
+        await sink.stop()
+        return sink
+
+    sink = asyncio.run(scenario())
+    assert [log['message'] for log in memory.logs] == [str(index) for index in range(120)]
+    assert sink.stats() == {'queued': 0, 'dropped': 0}
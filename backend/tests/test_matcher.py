@@ -0,0 +1,30 @@
+from matcher import ScoringCandidate, calculate_python_score, compile_job_profile, python_score_upper_bound, rank_top_k, score_candidate
+from models import CandidateInfo
+
+def test_upper_bound_never_below_score(jobs, candidate_pool):
+    for job in jobs:
+        profile = compile_job_profile(job)
+        for candidate in candidate_pool:
+            score = score_candidate(profile, candidate, {})[0]
+            assert python_score_upper_bound(profile, candidate) + 1e-6 >= score
+
+def test_rank_top_k_matches_full_sort(jobs, candidate_pool):
+    for job in jobs:
+        profile = compile_job_profile(job)
+        full = sorted((score_candidate(profile, candidate, {})[0] for candidate in candidate_pool), reverse=True)
+        top, pruned = rank_top_k(profile, candidate_pool, 20, {})
+        assert [entry[0] for entry in top] == full[:20]
+        assert 0 <= pruned <= len(candidate_pool) - 20
+
+def test_scoring_candidate_scores_like_candidate_info(jobs, candidate_pool):
+    for job in jobs:
+        profile = compile_job_profile(job)
+        for candidate in candidate_pool:
+            timeline = candidate.get('experience_timeline')
+            expected = calculate_python_score(job, CandidateInfo(**candidate['extracted_info']), timeline, profile)
+            assert calculate_python_score(job, ScoringCandidate(candidate), timeline, profile) == expected
+
+def test_rank_top_k_without_room(jobs, candidate_pool):
+    profile = compile_job_profile(jobs[0])
+    assert rank_top_k(profile, candidate_pool, 0, {}) == ([], len(candidate_pool))
+    assert rank_top_k(profile, candidate_pool, -1, {}) == ([], len(candidate_pool))
@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import database
+import migrations
+from experience import TIMELINE_VERSION, normalize_timeline
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+CANDIDATES = 600
+BATCH_SIZE = 50
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+@pytest.fixture
+def mongo_db(monkeypatch):
+    """An in-memory Motor database, seeded with candidates that need migration 1."""
+    db = mongomock_motor.AsyncMongoMockClient()["test"]
+    monkeypatch.setattr(database, "db", db)
+    monkeypatch.setattr(migrations, "db", db)
+
+    run(db.candidates.insert_many([
+        {"extracted_info": {"education": ["BSc", {"degree": "MSc"}, 5], "experience": [{"job_title": "Developer"}]}}
+        for _ in range(CANDIDATES)
+    ]))
+    return db
+
+def test_interrupted_migration_resumes_from_checkpoints(mongo_db, monkeypatch):
+    write_batch = migrations.Migration.write_batch
+    calls = {"count": 0}
+
+    async def failing_write_batch(self, documents):
+        calls["count"] += 1
+        if calls["count"] == 5:
+            raise RuntimeError("interrupted")
+        return await write_batch(self, documents)
+
+    monkeypatch.setattr(migrations.Migration, "write_batch", failing_write_batch)
+    with pytest.raises(RuntimeError):
+        run(migrations.run_migrations(1, BATCH_SIZE, 4))
+    state = run(mongo_db.migrations.find_one({"_id": 1}))
+    assert state["status"] == "interrupted"
+    assert 0 < state["processed"] < CANDIDATES
+    assert any(checkpoint["last_id"] is not None for checkpoint in state["ranges"])
+
+    monkeypatch.setattr(migrations.Migration, "write_batch", write_batch)
+    results = run(migrations.run_migrations(1, BATCH_SIZE, 4))
+    assert [stats["version"] for stats in results] == [1]
+    # Only the batches in flight when the run stopped are visited again
+    assert state["processed"] + results[0]["processed"] < CANDIDATES + 4 * BATCH_SIZE
+    assert run(mongo_db.candidates.count_documents({"extracted_info.education": {"$elemMatch": {"$type": "string"}}})) == 0
+    assert run(mongo_db.candidates.count_documents({"extracted_info.education": {"$size": 2}})) == CANDIDATES
+    assert run(mongo_db.migrations.find_one({"_id": 1}))["status"] == "completed"
+
+    # A completed migration is not run again
+    assert run(migrations.run_migrations(1, BATCH_SIZE, 4)) == []
+
+def test_held_lease_stops_the_run(mongo_db):
+    run(mongo_db.migrations.insert_one({"_id": 2, "status": "running", "heartbeat": datetime.utcnow(), "ranges": []}))
+    with pytest.raises(migrations.MigrationLeaseHeld):
+        run(migrations.run_migrations(3, BATCH_SIZE, 4))
+    # Migrations before the held one ran; none after it did
+    assert run(mongo_db.migrations.find_one({"_id": 1}))["status"] == "completed"
+    assert run(mongo_db.migrations.find_one({"_id": 3})) is None
+
+def test_expired_lease_is_taken_over(mongo_db):
+    heartbeat = datetime.utcnow() - timedelta(seconds=migrations.MIGRATION_LEASE_SECONDS + 1)
+    ranges = [{"low": None, "high": None, "last_id": None, "done": False}]
+    run(mongo_db.migrations.insert_one({"_id": 1, "status": "running", "heartbeat": heartbeat, "ranges": ranges, "processed": 0, "updated": 0}))
+    results = run(migrations.run_migrations(1, BATCH_SIZE, 4))
+    assert results[0]["processed"] == CANDIDATES
+    assert run(mongo_db.migrations.find_one({"_id": 1}))["status"] == "completed"
+
+def test_timeline_migration_visits_only_stale_timelines(mongo_db):
+    fresh = normalize_timeline([{"job_title": "Developer", "duration": "2019 - Present"}])
+    run(mongo_db.candidates.update_many({}, {"$set": {"experience_timeline": fresh}}))
+    stale_ids = [document["_id"] for document in run(mongo_db.candidates.find({}, {"_id": 1}).limit(30).to_list(length=30))]
+    run(mongo_db.candidates.update_many({"_id": {"$in": stale_ids}}, {"$unset": {"experience_timeline": ""}}))
+    migration = next(migration for migration in migrations.MIGRATIONS if migration.version == 6)
+    stats = run(migrations.run_migration(migration, BATCH_SIZE, 4))
+    assert stats["processed"] == len(stale_ids)
+    assert run(mongo_db.candidates.count_documents({"experience_timeline.version": TIMELINE_VERSION})) == CANDIDATES
@@ -0,0 +1,24 @@
+import asyncio
+
+import storage as storage_module
+from reports import generate_report, reserve_report
+from storage import MemoryStorage
+
+def test_reserved_report_resolves_without_matches(monkeypatch):
+    storage = MemoryStorage()
+    monkeypatch.setattr(storage_module, '_storage', storage)
+
+    async def run():
+        job_id = await storage.insert_document('jobs', {'extracted_info': {'title': 'Chef'}})
+        report_id = await reserve_report(job_id)
+        assert (await storage.get_report(report_id))['status'] == 'processing'
+        assert await generate_report(job_id, report_id) is None
+        report = await storage.get_report(report_id)
+        assert report['status'] == 'empty' and report['content'] == []
+        assert len(await storage.get_reports(job_id)) == 1
+
+    asyncio.run(run())
+
+def test_reserve_report_for_missing_job(monkeypatch):
+    monkeypatch.setattr(storage_module, '_storage', MemoryStorage())
+    assert asyncio.run(reserve_report('%024x' % 1)) is None
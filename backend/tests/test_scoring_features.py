@@ -0,0 +1,29 @@
+import numpy as np
+
+from matcher import compile_job_profile, score_candidate
+from matrix_matcher import top_n_per_job
+from scoring_features import build_candidate_features, score_matrix
+
+def test_score_matrix_matches_per_candidate_scoring(jobs, candidate_pool):
+    profiles = [compile_job_profile(job) for job in jobs]
+    scores = score_matrix(build_candidate_features(candidate_pool), profiles)
+    assert scores.shape == (len(jobs), len(candidate_pool))
+    for row, profile in enumerate(profiles):
+        for column, candidate in enumerate(candidate_pool):
+            assert round(float(scores[row, column]), 2) == score_candidate(profile, candidate, {})[0]
+
+def test_score_matrix_ignores_malformed_entries(jobs):
+    candidates = [
+        {'_id': 'a', 'extracted_info': {'name': 'A', 'experience': ['Engineer 2015-2020'], 'education': ['BSc']}},
+        {'_id': 'b', 'extracted_info': {'skills': ['SQL'], 'experience': [None, {'job_title': 'Data Engineer', 'duration': '2015-2020'}]}},
+    ]
+    profiles = [compile_job_profile(job) for job in jobs]
+    scores = score_matrix(build_candidate_features(candidates), profiles)
+    for row, profile in enumerate(profiles):
+        for column, candidate in enumerate(candidates):
+            assert round(float(scores[row, column]), 2) == score_candidate(profile, candidate, {})[0]
+
+def test_top_n_per_job_is_best_first():
+    scores = np.array([[10.0, 50.0, 30.0, 40.0], [1.0, 2.0, 3.0, 4.0]])
+    assert top_n_per_job(scores, 3) == [[(50.0, 1), (40.0, 3), (30.0, 2)], [(4.0, 3), (3.0, 2), (2.0, 1)]]
+    assert top_n_per_job(scores, 0) == [[], []]
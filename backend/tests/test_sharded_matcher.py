@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+import sharded_matcher
+from matcher import compile_job_profile
+from matrix_matcher import top_n_per_job
+from scoring_features import build_candidate_features, score_matrix
+
+@pytest.fixture
+def small_shards(monkeypatch):
+    """Shard even the test pool across two worker processes."""
+    monkeypatch.setattr(sharded_matcher, "MIN_SHARD_SIZE", 100)
+    monkeypatch.setattr(sharded_matcher, "MATCH_WORKERS", 2)
+    yield
+    sharded_matcher.shutdown_executor()
+
+def test_sharded_top_k_matches_in_process(small_shards, jobs, candidate_pool):
+    profiles = [compile_job_profile(job) for job in jobs]
+    scores = score_matrix(build_candidate_features(candidate_pool), profiles)
+    expected = top_n_per_job(scores, 25)
+    ranked = asyncio.run(sharded_matcher.score_top_k_sharded(candidate_pool, profiles, 25))
+    assert [[score for score, _ in pairs] for pairs in ranked] == [[score for score, _ in pairs] for pairs in expected]
+    for pairs, row in zip(ranked, scores):
+        assert all(row[index] == score for score, index in pairs)
+
+def test_sharded_top_k_empty():
+    assert asyncio.run(sharded_matcher.score_top_k_sharded([], [{}], 5)) == [[]]
@@ -0,0 +1,29 @@
+import zlib
+
+from skill_taxonomy import UNKNOWN_SKILL_ID_BASE, SkillTaxonomy, normalize_skill, skill_ids, taxonomy
+
+def test_aliases_resolve_to_the_canonical_skill():
+    python = taxonomy.skill_id("Python")
+    assert taxonomy.name(python) == "Python"
+    for alias in ("python", "PY", "Python 3", "python3", "Python 3.10", "python (advanced)", " cpython. "):
+        assert taxonomy.skill_id(alias) == python
+    assert taxonomy.skill_id("PostgreSQL") == taxonomy.skill_id("postgres")
+    assert taxonomy.skill_id("Apache_Spark") == taxonomy.skill_id("spark")
+    assert taxonomy.skill_id("PySpark") != taxonomy.skill_id("Spark")
+
+def test_normalize_skill():
+    assert normalize_skill("  Machine-Learning (ML)  ") == "machine learning"
+    assert normalize_skill("CI_CD;") == "ci cd"
+
+def test_unknown_skills_get_stable_ids():
+    skill_id = taxonomy.skill_id("Underwater Basket-Weaving")
+    assert skill_id == UNKNOWN_SKILL_ID_BASE | (zlib.crc32(b"underwater basket weaving") & (UNKNOWN_SKILL_ID_BASE - 1))
+    # The same text maps to the same ID in any process and under any taxonomy
+    assert skill_id == 2462831776
+    assert SkillTaxonomy([]).skill_id("underwater basket weaving") == skill_id
+    assert skill_id >= UNKNOWN_SKILL_ID_BASE > max(taxonomy.names)
+
+def test_skill_ids():
+    assert skill_ids(["SQL", "t-sql", None, "", "Excel"]) == sorted({taxonomy.skill_id("SQL"), taxonomy.skill_id("Excel")})
+    assert skill_ids(None) == []
+    assert taxonomy.skill_id("  ") is None
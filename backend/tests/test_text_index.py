@@ -0,0 +1,92 @@
+import asyncio
+import math
+import random
+from collections import Counter
+
+import pytest
+
+import storage
+from text_index import BM25_B, BM25_K1, TextIndex, snippets, tokenize
+
+def naive_bm25(documents, query):
+    """Reference BM25 scores (any term matching) computed directly from the texts."""
+    tokens = {doc_id: Counter(tokenize(text)) for doc_id, text in documents.items()}
+    average = sum(sum(counts.values()) for counts in tokens.values()) / len(tokens)
+    scores = {}
+    for term in dict.fromkeys(tokenize(query)):
+        containing = [doc_id for doc_id, counts in tokens.items() if term in counts]
+        idf = math.log(1 + (len(tokens) - len(containing) + 0.5) / (len(containing) + 0.5))
+        for doc_id in containing:
+            count = tokens[doc_id][term]
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * sum(tokens[doc_id].values()) / average)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * count * (BM25_K1 + 1) / (count + norm)
+    return scores
+
+@pytest.fixture
+def documents():
+    rng = random.Random(7)
+    vocabulary = [f"w{i}" for i in range(300)] + ["pyspark", "databricks", "python", "sql"]
+    return {f"doc{i}": " ".join(rng.choices(vocabulary, k=rng.randint(5, 80))) for i in range(400)}
+
+def build(documents):
+    index = TextIndex("candidates")
+    for doc_id, text in documents.items():
+        index.add(doc_id, text)
+    return index
+
+def test_scores_match_reference_bm25(documents):
+    index = build(documents)
+    expected = naive_bm25(documents, "python sql w7")
+    total, hits = index.search("python sql w7", limit=len(documents), match_all=False)
+    assert total == len(expected)
+    for doc_id, score in hits:
+        assert score == pytest.approx(expected[doc_id], rel=1e-4)
+    assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
+
+def test_match_all_requires_every_term(documents):
+    index = build(documents)
+    total, hits = index.search("python sql", limit=len(documents))
+    wanted = {doc_id for doc_id, text in documents.items() if {"python", "sql"} <= set(tokenize(text))}
+    assert total == len(wanted)
+    assert {doc_id for doc_id, _ in hits} == wanted
+
+def test_pages_follow_the_full_ranking(documents):
+    index = build(documents)
+    _, everything = index.search("python databricks", limit=len(documents), match_all=False)
+    _, page = index.search("python databricks", limit=10, skip=10, match_all=False)
+    assert [score for _, score in page] == pytest.approx([score for _, score in everything[10:20]])
+
+def test_removal_and_compaction_match_a_fresh_index(documents):
+    index = build(documents)
+    removed = list(documents)[:200]
+    for doc_id in removed:
+        index.remove(doc_id)
+    remaining = {doc_id: text for doc_id, text in documents.items() if doc_id not in removed}
+    assert len(index.ids) < len(documents)  # compacted
+    total, hits = index.search("python sql w7", limit=len(remaining), match_all=False)
+    fresh_total, fresh_hits = build(remaining).search("python sql w7", limit=len(remaining), match_all=False)
+    assert total == fresh_total
+    assert dict(hits) == pytest.approx(dict(fresh_hits))
+
+def test_build_reads_texts_from_storage(monkeypatch):
+    memory = storage.MemoryStorage()
+    monkeypatch.setattr(storage, "_storage", memory)
+
+    async def scenario():
+        for doc_id, text in [("a", "Python and SQL"), ("b", "Java only")]:
+            await memory.save_text(text, "candidates", doc_id)
+        index = TextIndex("candidates")
+        await index.build()
+        return index.search("python")
+
+    total, hits = asyncio.run(scenario())
+    assert total == 1
+    assert [doc_id for doc_id, _ in hits] == ["a"]
+
+def test_snippets_mark_terms_and_escape_html():
+    fragments = snippets("Intro. " * 40 + "Built <pipelines> with PySpark & Databricks. " + "filler " * 60, "pyspark databricks")
+    assert len(fragments) == 1
+    assert "<mark>PySpark</mark> &amp; <mark>Databricks</mark>" in fragments[0]
+    assert "&lt;pipelines&gt;" in fragments[0]
+    assert fragments[0].startswith("…") and fragments[0].endswith("…")
+    assert snippets("nothing relevant", "pyspark") == []
@@ -0,0 +1,213 @@
+import os
+import re
+import asyncio
+import html
+import math
+import logging
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from storage import get_storage
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# BM25 parameters: term frequency saturation and document length normalization
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+
+# Removed documents are compacted out of the postings once they make up this share of slots
+COMPACT_RATIO = 0.25
+
+# Documents indexed between yields to the event loop while building
+BUILD_YIELD_EVERY = 200
+
+# Snippets returned per hit, and characters of context around the matched terms
+SNIPPET_COUNT = 2
+SNIPPET_CHARS = 160
+
+# Words, keeping the symbols in names like "c++" and "c#"
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+TEXT_TOKEN_RE = re.compile(TOKEN_RE.pattern, re.IGNORECASE)
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall((text or "").lower())
+
+class TextIndex:
+    """
+    In-memory inverted index with BM25 ranking over the full text of one
+    collection's documents. Each document gets a slot; postings hold slot
+    numbers and term frequencies in compact arrays, and removed slots are
+    skipped until enough accumulate to compact them away.
+    """
+
+    def __init__(self, owner: str):
+        self.owner = owner
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.ids: List[Optional[str]] = []
+        self.slots: Dict[str, int] = {}
+        self.lengths = array('I')
+        self.alive = bytearray()
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def add(self, doc_id: str, text: str):
+        """Index (or re-index) a document's text."""
+        self.remove(doc_id)
+        counts = Counter(tokenize(text))
+        slot = len(self.ids)
+        self.ids.append(doc_id)
+        self.slots[doc_id] = slot
+        length = sum(counts.values())
+        self.lengths.append(length)
+        self.alive.append(1)
+        self.total_length += length
+        postings = self.postings
+        for term, count in counts.items():
+            entry = postings.get(term)
+            if entry is None:
+                entry = postings[term] = (array('i'), array('H'))
+            entry[0].append(slot)
+            entry[1].append(count if count < 0xFFFF else 0xFFFF)
+
+    def remove(self, doc_id: str):
+        slot = self.slots.pop(doc_id, None)
+        if slot is None:
+            return
+        self.ids[slot] = None
+        self.alive[slot] = 0
+        self.total_length -= self.lengths[slot]
+        if len(self.ids) - len(self.slots) > COMPACT_RATIO * len(self.ids):
+            self._compact()
+
+    def _compact(self):
+        """Renumber the live slots and drop removed ones from every posting list."""
+        alive = np.frombuffer(self.alive, dtype=np.uint8).astype(bool)
+        remap = np.full(len(self.ids), -1, dtype=np.int32)
+        remap[alive] = np.arange(int(alive.sum()), dtype=np.int32)
+        postings = {}
+        for term, (docs, counts) in self.postings.items():
+            new_docs = remap[np.frombuffer(docs, dtype=np.int32)]
+            keep = new_docs >= 0
+            if keep.any():
+                postings[term] = (
+                    array('i', new_docs[keep].tobytes()),
+                    array('H', np.frombuffer(counts, dtype=np.uint16)[keep].tobytes())
+                )
+        self.postings = postings
+        self.lengths = array('I', np.frombuffer(self.lengths, dtype=np.uint32)[alive].tobytes())
+        self.ids = [doc_id for doc_id in self.ids if doc_id is not None]
+        self.slots = {doc_id: slot for slot, doc_id in enumerate(self.ids)}
+        self.alive = bytearray(b'\x01' * len(self.ids))
+
+    def search(self, query: str, limit: int = 20, skip: int = 0, match_all: bool = True) -> Tuple[int, List[Tuple[str, float]]]:
+        """
+        Rank documents against the query terms with BM25. With match_all set,
+        only documents containing every term are returned.
+        Returns the number of matching documents and one page of (ID, score), best first.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self.slots:
+            return 0, []
+
+        alive = np.frombuffer(self.alive, dtype=np.uint8).astype(bool)
+        lengths = np.frombuffer(self.lengths, dtype=np.uint32).astype(np.float32)
+        norms = BM25_K1 * (1 - BM25_B + BM25_B * lengths / (self.total_length / len(self.slots) or 1))
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        hits = np.zeros(len(self.ids), dtype=np.int16)
+        for term in terms:
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            docs = np.frombuffer(entry[0], dtype=np.int32)
+            live = alive[docs]
+            docs = docs[live]
+            counts = np.frombuffer(entry[1], dtype=np.uint16)[live].astype(np.float32)
+            if not len(docs):
+                continue
+            idf = math.log(1 + (len(self.slots) - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * counts * (BM25_K1 + 1) / (counts + norms[docs])
+            hits[docs] += 1
+
+        matched = np.nonzero(hits == len(terms) if match_all else hits > 0)[0]
+        total = len(matched)
+        wanted = min(skip + limit, total)
+        if skip >= wanted:
+            return total, []
+        matched_scores = scores[matched]
+        top = np.argpartition(-matched_scores, wanted - 1)[:wanted]
+        top = top[np.argsort(-matched_scores[top], kind="stable")][skip:]
+        return total, [(self.ids[matched[i]], float(matched_scores[i])) for i in top]
+
+    async def build(self):
+        """
+        Rebuild the index from the stored texts of the collection. Documents are
+        indexed as they stream in, so searches during a build see a partial index.
+        """
+        self.__init__(self.owner)
+        async for doc_id, text in get_storage().iter_texts(self.owner):
+            self.add(doc_id, text)
+            if len(self.ids) % BUILD_YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+        logger.info(f"Text index built: {len(self)} {self.owner}, {len(self.postings)} terms")
+
+    async def refresh(self, doc_id: str):
+        """Re-read one document's text, e.g. after another worker stored it."""
+        texts = await get_storage().get_texts(self.owner, [doc_id])
+        if doc_id in texts:
+            self.add(doc_id, texts[doc_id])
+
+def snippets(text: str, query: str, count: int = SNIPPET_COUNT, width: int = SNIPPET_CHARS) -> List[str]:
+    """
+    Up to count non-overlapping excerpts of text covering the most query terms,
+    in text order, HTML-escaped with the terms wrapped in <mark> tags.
+    """
+    terms = set(tokenize(query))
+    text = text or ""
+    matches = [match for match in TEXT_TOKEN_RE.finditer(text) if match.group().lower() in terms]
+    if not matches:
+        return []
+
+    # Each window starts at a match; prefer windows covering more distinct terms, then more matches
+    windows = []
+    for i, first in enumerate(matches):
+        inside = []
+        for match in matches[i:]:
+            if match.end() > first.start() + width:
+                break
+            inside.append(match)
+        windows.append((-len({match.group().lower() for match in inside}), -len(inside), first.start(), inside))
+    windows.sort(key=lambda window: window[:3])
+
+    chosen = []
+    for _, _, start, inside in windows:
+        if len(chosen) >= count:
+            break
+        low = max(0, start - width // 4)
+        high = min(len(text), low + width)
+        if any(low < other_high and other_low < high for other_low, other_high, _ in chosen):
+            continue
+        chosen.append((low, high, inside))
+
+    fragments = []
+    for low, high, inside in sorted(chosen, key=lambda window: window[0]):
+        parts = []
+        position = low
+        for match in inside:
+            if match.start() < position or match.end() > high:
+                continue
+            parts.append(html.escape(text[position:match.start()]))
+            parts.append(f"<mark>{html.escape(text[match.start():match.end()])}</mark>")
+            position = match.end()
+        parts.append(html.escape(text[position:high]))
+        fragment = " ".join("".join(parts).split())
+        fragments.append(("…" if low > 0 else "") + fragment + ("…" if high < len(text) else ""))
+    return fragments
+
+candidate_text_index = TextIndex("candidates")
+job_text_index = TextIndex("jobs")
@@ -0,0 +1,148 @@
+import os
+import re
+import logging
+import zlib
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+from storage import get_storage
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Number of hashed feature buckets per vector
+VECTOR_DIM = int(os.getenv("VECTOR_DIM", "1024"))
+
+# Character n-gram length used alongside whole words, so near-synonyms
+# like "pyspark" and "spark" still share features
+NGRAM_SIZE = 3
+
+TOKEN_RE = re.compile(r'[a-z0-9+#/.]+')
+
+def _as_list(value: Any) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [str(item) for item in value if item]
+
+def job_text(info: Dict[str, Any]) -> str:
+    """Text used to vectorize a job's extracted info."""
+    info = info or {}
+    parts = [info.get('title'), info.get('summary')]
+    for field in ('requirements', 'responsibilities', 'skills'):
+        parts.extend(_as_list(info.get(field)))
+    return " ".join(part for part in parts if part)
+
+def candidate_text(info: Dict[str, Any]) -> str:
+    """Text used to vectorize a candidate's extracted info."""
+    info = info or {}
+    parts = [info.get('summary')]
+    parts.extend(_as_list(info.get('skills')))
+    parts.extend(_as_list(info.get('certifications')))
+    for exp in info.get('experience') or []:
+        if isinstance(exp, dict):
+            parts.append(exp.get('job_title'))
+            parts.extend(_as_list(exp.get('responsibilities')))
+    for edu in info.get('education') or []:
+        if isinstance(edu, dict):
+            parts.append(edu.get('degree'))
+    return " ".join(str(part) for part in parts if part)
+
+def vectorize(text: str, dim: int = VECTOR_DIM) -> np.ndarray:
+    """
+    Hash words and character n-grams of text into a sublinear term-frequency vector.
+    Uses crc32 so vectors are stable across processes.
+    """
+    counts = np.zeros(dim, dtype=np.float32)
+    for token in TOKEN_RE.findall((text or "").lower()):
+        counts[zlib.crc32(token.encode()) % dim] += 1
+        padded = f"<{token}>"
+        for i in range(max(1, len(padded) - NGRAM_SIZE + 1)):
+            counts[zlib.crc32(padded[i:i + NGRAM_SIZE].encode()) % dim] += 1
+    nonzero = counts > 0
+    counts[nonzero] = 1 + np.log(counts[nonzero])
+    return counts
+
+class VectorIndex:
+    """
+    Local TF-IDF index over hashed feature vectors, stored as one float32 matrix.
+    Rows are added and removed in place and document frequencies are kept up to
+    date, so no change rebuilds the matrix; a query weights only the rows it reads.
+    """
+
+    def __init__(self, dim: int = VECTOR_DIM):
+        self.dim = dim
+        self.ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+        self.df = np.zeros(dim, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _reserve(self, size: int):
+        if size > self.matrix.shape[0]:
+            grown = np.zeros((max(size, 2 * self.matrix.shape[0], 64), self.dim), dtype=np.float32)
+            grown[:len(self.ids)] = self.matrix[:len(self.ids)]
+            self.matrix = grown
+
+    def add(self, doc_id: str, text: str):
+        """Index (or re-index) a document."""
+        self.remove(doc_id)
+        vector = vectorize(text, self.dim)
+        self._reserve(len(self.ids) + 1)
+        self.positions[doc_id] = len(self.ids)
+        self.matrix[len(self.ids)] = vector
+        self.ids.append(doc_id)
+        self.df += vector > 0
+
+    def remove(self, doc_id: str):
+        """Drop a document, moving the last row into its slot."""
+        position = self.positions.pop(doc_id, None)
+        if position is None:
+            return
+        self.df -= self.matrix[position] > 0
+        last = len(self.ids) - 1
+        if position != last:
+            self.matrix[position] = self.matrix[last]
+            self.ids[position] = self.ids[last]
+            self.positions[self.ids[position]] = position
+        self.matrix[last] = 0
+        self.ids.pop()
+
+    def _idf(self) -> np.ndarray:
+        return (np.log((1 + len(self.ids)) / (1 + self.df)) + 1).astype(np.float32)
+
+    def similarities(self, text: str, doc_ids: Iterable[str]) -> Dict[str, float]:
+        """
+        Cosine similarity between text and each indexed document in doc_ids.
+        Only the requested rows are IDF-weighted and normalized, so the cost
+        follows the number of documents asked for, not the size of the index.
+        """
+        rows = [(doc_id, self.positions[doc_id]) for doc_id in doc_ids if doc_id in self.positions]
+        if not rows:
+            return {}
+        idf = self._idf()
+        query = vectorize(text, self.dim) * idf
+        norm = np.linalg.norm(query)
+        if norm:
+            query /= norm
+        weighted = self.matrix[[position for _, position in rows]] * idf
+        norms = np.linalg.norm(weighted, axis=1)
+        norms[norms == 0] = 1
+        scores = (weighted @ query) / norms
+        return {doc_id: float(score) for (doc_id, _), score in zip(rows, scores)}
+
+class CandidateVectorIndex(VectorIndex):
+    """Vector index over candidates' extracted info."""
+
+    async def build(self):
+        """Rebuild the index from the candidates collection."""
+        self.__init__(self.dim)
+        async for candidate in get_storage().iter_documents('candidates', {"extracted_info": 1}):
+            self.add(str(candidate["_id"]), candidate_text(candidate.get("extracted_info")))
+        logger.info(f"Candidate vector index built: {len(self)} candidates")
+
+candidate_vectors = CandidateVectorIndex()
@@ -3,6 +3,15 @@ import axios from "axios";
 
 const API_BASE_URL = 'http://localhost:8000';
 
+// Items loaded per request from the paginated list endpoints
+const PAGE_SIZE = 100;
+
+// One page of a paginated list endpoint, with the X-Next-Cursor header for the next one (null on the last page)
+const fetchPage = async (url, cursor = null) => {
+  const response = await axios.get(url, { params: { limit: PAGE_SIZE, cursor } });
+  return { items: response.data, cursor: response.headers['x-next-cursor'] || null };
+};
+
 class ErrorBoundary extends React.Component {
   constructor(props) {
     super(props);
@@ -37,6 +46,8 @@ class ErrorBoundary extends React.Component {
 export default function App() {
   const [jdFiles, setJdFiles] = useState([]);
   const [candidates, setCandidates] = useState([]);
+  const [jobsCursor, setJobsCursor] = useState(null);
+  const [candidatesCursor, setCandidatesCursor] = useState(null);
   const [hoverJD, setHoverJD] = useState(false);
   const [hoverCV, setHoverCV] = useState(false);
   const [jdLoading, setJdLoading] = useState(false);
@@ -77,26 +88,52 @@ export default function App() {
     }
   }, [matchingResults]);
 
+  // Load the first page of jobs; later pages are fetched on demand with fetchMoreJobs
   const fetchJobs = async () => {
     try {
-      const response = await axios.get(`${API_BASE_URL}/jobs/all`);
-      setJdFiles(response.data);
+      const page = await fetchPage(`${API_BASE_URL}/jobs/all`);
+      setJdFiles(page.items);
+      setJobsCursor(page.cursor);
     } catch (error) {
       console.error('Failed to fetch jobs:', error);
       setError('Failed to fetch jobs. Please try again.');
     }
   };
 
+  const fetchMoreJobs = async () => {
+    try {
+      const page = await fetchPage(`${API_BASE_URL}/jobs/all`, jobsCursor);
+      setJdFiles(prev => [...prev, ...page.items]);
+      setJobsCursor(page.cursor);
+    } catch (error) {
+      console.error('Failed to fetch more jobs:', error);
+      setError('Failed to fetch more jobs. Please try again.');
+    }
+  };
+
+  // Load the first page of candidates; later pages are fetched on demand with fetchMoreCandidates
   const fetchCandidates = async () => {
     try {
-      const response = await axios.get(`${API_BASE_URL}/candidates/all`);
-      setCandidates(response.data);
+      const page = await fetchPage(`${API_BASE_URL}/candidates/all`);
+      setCandidates(page.items);
+      setCandidatesCursor(page.cursor);
     } catch (error) {
       console.error('Failed to fetch candidates:', error);
       setError('Failed to fetch candidates. Please try again.');
     }
   };
 
+  const fetchMoreCandidates = async () => {
+    try {
+      const page = await fetchPage(`${API_BASE_URL}/candidates/all`, candidatesCursor);
+      setCandidates(prev => [...prev, ...page.items]);
+      setCandidatesCursor(page.cursor);
+    } catch (error) {
+      console.error('Failed to fetch more candidates:', error);
+      setError('Failed to fetch more candidates. Please try again.');
+    }
+  };
+
   const uploadFiles = async (files) => {
     setJdLoading(true);
     setError("");
@@ -189,40 +226,9 @@ export default function App() {
       setJdLoading(true);
       setError("");
 
-      // Get current jobs
-      const res = await axios.get(`${API_BASE_URL}/jobs/all`);
-      const jobs = res.data || [];
-
-      if (jobs.length === 0) {
-        setError("No jobs to delete");
-        return;
-      }
-
-      // Delete jobs one by one
-      let deletedCount = 0;
-      let failedCount = 0;
-
-      for (const job of jobs) {
-        try {
-          // Ensure we have a valid ID to use
-          const jobId = job.job_id || job._id;
-          if (!jobId) {
-            console.error(`Job ${job.filename} has no valid ID`);
-            failedCount++;
-            continue;
-          }
-
-          // Convert ObjectId to string if needed
-          const id = typeof jobId === 'object' ? jobId.toString() : jobId;
-          
-          await axios.delete(`${API_BASE_URL}/jobs/${id}`);
-          console.log(`Successfully deleted job: ${job.filename}`);
-          deletedCount++;
-        } catch (err) {
-          console.error(`Failed to delete job ${job.filename}:`, err);
-          failedCount++;
-        }
-      }
+      // Delete every job, with its matches and reports, in one request
+      const res = await axios.delete(`${API_BASE_URL}/jobs/all`);
+      const deletedCount = res.data?.deleted || 0;
 
       // Clear selected job and text if any job was deleted
       if (deletedCount > 0) {
@@ -234,9 +240,7 @@ export default function App() {
       await fetchJobs();
 
       // Show summary
-      if (failedCount > 0) {
-        setError(`Deleted ${deletedCount} jobs, but failed to delete ${failedCount} jobs`);
-      } else if (deletedCount > 0) {
+      if (deletedCount > 0) {
         setError(`Successfully deleted all ${deletedCount} jobs`);
         // Clear error after 3 seconds if successful
         setTimeout(() => setError(""), 3000);
@@ -276,35 +280,9 @@ export default function App() {
       setCvLoading(true);
       setError("");
 
-      const res = await axios.get(`${API_BASE_URL}/candidates/all`);
-      const candidates = res.data || [];
-
-      if (candidates.length === 0) {
-        setError("No candidates to delete");
-        return;
-      }
-
-      let deletedCount = 0;
-      let failedCount = 0;
-
-      for (const candidate of candidates) {
-        try {
-          const candidateId = candidate.candidate_id || candidate._id;
-          if (!candidateId) {
-            console.error(`Candidate ${candidate.filename} has no valid ID`);
-            failedCount++;
-            continue;
-          }
-
-          const id = typeof candidateId === 'object' ? candidateId.toString() : candidateId;
-          await axios.delete(`${API_BASE_URL}/candidates/${id}`);
-          console.log(`Successfully deleted candidate: ${candidate.filename}`);
-          deletedCount++;
-        } catch (err) {
-          console.error(`Failed to delete candidate ${candidate.filename}:`, err);
-          failedCount++;
-        }
-      }
+      // Delete every candidate, with its matches, in one request
+      const res = await axios.delete(`${API_BASE_URL}/candidates/all`);
+      const deletedCount = res.data?.deleted || 0;
 
       if (deletedCount > 0) {
         setSelectedCandidate(null);
@@ -313,9 +291,7 @@ export default function App() {
       
       await fetchCandidates();
 
-      if (failedCount > 0) {
-        setError(`Deleted ${deletedCount} candidates, but failed to delete ${failedCount} candidates`);
-      } else if (deletedCount > 0) {
+      if (deletedCount > 0) {
         setError(`Successfully deleted all ${deletedCount} candidates`);
         setTimeout(() => setError(""), 3000);
       } else {
@@ -354,10 +330,12 @@ export default function App() {
       setIsMatching(true);
       setError(null);
 
-      const response = await axios.post(`${API_BASE_URL}/match`, {
-        job_id: selectedJob.job_id,
-        candidate_ids: selectedCandidateForMatch ? [selectedCandidateForMatch] : candidates.map(c => c.candidate_id)
-      });
+      const response = selectedCandidateForMatch
+        ? await axios.post(`${API_BASE_URL}/match`, {
+            job_id: selectedJob.job_id,
+            candidate_ids: [selectedCandidateForMatch]
+          })
+        : await axios.post(`${API_BASE_URL}/match/${selectedJob.job_id}/top`);
 
       if (response.data && response.data.matches) {
         const results = {
@@ -734,6 +712,14 @@ export default function App() {
                         </div>
                       </div>
                     ))}
+                    {jobsCursor && (
+                      <button
+                        onClick={fetchMoreJobs}
+                        className="w-full py-2 text-sm text-blue-600 hover:text-blue-800 font-medium"
+                      >
+                        Load more jobs
+                      </button>
+                    )}
                   </div>
                 </div>
               </div>
@@ -960,6 +946,14 @@ export default function App() {
                             )}
                           </div>
                         ))}
+                      {candidatesCursor && (
+                        <button
+                          onClick={fetchMoreCandidates}
+                          className="w-full py-2 text-sm text-blue-600 hover:text-blue-800 font-medium"
+                        >
+                          Load more candidates
+                        </button>
+                      )}
                     </div>
                   </div>
 